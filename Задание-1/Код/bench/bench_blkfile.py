@@ -0,0 +1,154 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from srr.blkfile import BlkSource, spent_coinbases, unxor, write_blk_file  # noqa: E402
+from srr.fees import calculate_fee  # noqa: E402
+from srr.wire import dsha256, script_address  # noqa: E402
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+BLOCKS = 300
+TXS_PER_BLOCK = 200
+GENESIS_TIME = 1600000000
+
+
+# ----------------------------- ✦ SYNTHETIC CHAIN ✦ -----------------------------
+def varint(n):
+    return bytes([n]) if n < 0xFD else b"\xfd" + n.to_bytes(2, "little")
+
+
+def serialize_tx(inputs, outputs):
+    body = varint(len(inputs))
+    for prev, vout, script in inputs:
+        body += prev + vout.to_bytes(4, "little") + varint(len(script)) + script + b"\xff" * 4
+    body += varint(len(outputs))
+    for value, script in outputs:
+        body += value.to_bytes(8, "little") + varint(len(script)) + script
+    return (1).to_bytes(4, "little") + body + bytes(4)
+
+
+def p2pkh(rng):
+    return b"\x76\xa9\x14" + rng.randbytes(20) + b"\x88\xac"
+
+
+def make_chain(blocks=BLOCKS, txs_per_block=TXS_PER_BLOCK, seed=1):
+    # Цепочка с настоящими тратами: (сырые блоки по высоте, сирота, эталон)
+    rng = random.Random(seed)
+    utxos = []  # (txid во внутреннем порядке, vout, value, script, высота coinbase или None)
+    raw_blocks, prev = [], bytes(32)
+    truth = {"spent": set(), "fees": {}, "outputs": {}}
+    for height in range(blocks):
+        script = p2pkh(rng)
+        coinbase = serialize_tx(
+            [(bytes(32), 0xFFFFFFFF, b"\x03" + height.to_bytes(3, "little") + rng.randbytes(8))],
+            [(5000000000, script)],
+        )
+        txs, new = [coinbase], [(dsha256(coinbase), 0, 5000000000, script, height)]
+        rng.shuffle(utxos)
+        for _ in range(min(txs_per_block - 1, len(utxos) // 2)):
+            spend = [utxos.pop() for _ in range(rng.randint(1, 2))]
+            total = sum(u[2] for u in spend)
+            fee = rng.randint(1, min(total // 10, 100000))
+            first = rng.randint((total - fee) // 4, (total - fee) * 3 // 4)
+            outputs = [(first, p2pkh(rng)), (total - fee - first, p2pkh(rng))]
+            tx = serialize_tx([(u[0], u[1], rng.randbytes(106)) for u in spend], outputs)
+            txid = dsha256(tx)
+            truth["fees"][txid[::-1].hex()] = fee
+            for u in spend:
+                if u[4] is not None:
+                    truth["spent"].add(u[4])
+            txs.append(tx)
+            new.extend((txid, n, value, s, None) for n, (value, s) in enumerate(outputs))
+        utxos.extend(new)
+        header = (
+            (0x20000000).to_bytes(4, "little")
+            + prev
+            + rng.randbytes(32)
+            + (GENESIS_TIME + height * 600).to_bytes(4, "little")
+            + rng.randbytes(8)
+        )
+        raw_blocks.append(header + varint(len(txs)) + b"".join(txs))
+        truth["outputs"][height] = [script_address(script)]
+        prev = dsha256(header)
+    # Сирота на высоте blocks-2: ссылается на того же родителя, но цепочку не продолжает
+    orphan = bytearray(raw_blocks[-2])
+    orphan[76:80] = rng.randbytes(4)
+    return raw_blocks, bytes(orphan), truth
+
+
+def write_blocks_dir(directory, raw_blocks, orphan, key=None):
+    # Блоки по двум файлам вперемешку, как после начальной синхронизации узла
+    order = list(raw_blocks) + [orphan]
+    random.Random(2).shuffle(order)
+    half = len(order) // 2
+    for number, part in enumerate([order[:half], order[half:]]):
+        path = os.path.join(directory, f"blk{number:05d}.dat")
+        write_blk_file(path, part)
+        if key:
+            with open(path, "rb") as f:
+                data = unxor(f.read(), key, 0)  # XOR симметричен
+            with open(path, "wb") as f:
+                f.write(data)
+    if key:
+        with open(os.path.join(directory, "xor.dat"), "wb") as f:
+            f.write(key)
+
+
+# ----------------------------- ✦ MAIN ✦ -----------------------------
+def check(source, raw_blocks, truth):
+    assert len(source.index) == len(raw_blocks)
+    for height in (0, 1, len(raw_blocks) // 2, len(raw_blocks) - 1):
+        block = source.get_block_by_height(height)
+        assert block["hash"] == dsha256(raw_blocks[height][:80])[::-1].hex()
+        assert [out.get("addr") for out in block["tx"][0]["out"]] == truth["outputs"][height]
+        assert source.get_block_by_hash(block["hash"])["height"] == height
+    found = spent_coinbases(source, 0, len(raw_blocks) - 1, os.path.join(source.index.index_dir, "spent"))
+    assert {h for h, _, _ in found} == truth["spent"]
+    # Тот же ответ через интерфейс источника (как у CoinbaseScan)
+    via_source = {h for h, r in source.fetch_coinbases(range(len(raw_blocks))) if r and r[0][2]["out"][0]["spent"]}
+    assert via_source == truth["spent"]
+
+
+def main():
+    raw_blocks, orphan, truth = make_chain()
+    size_mb = sum(map(len, raw_blocks)) / 2**20
+    print(f"Цепочка: {len(raw_blocks)} блоков, {size_mb:.1f} МБ, {len(truth['fees'])} транзакций")
+    for key in (None, bytes.fromhex("a1b2c3d4e5f60718")):
+        with tempfile.TemporaryDirectory() as blocks_dir, tempfile.TemporaryDirectory() as index_dir:
+            write_blocks_dir(blocks_dir, raw_blocks, orphan, key)
+            label = "xor.dat" if key else "без xor"
+
+            started = time.perf_counter()
+            source = BlkSource(blocks_dir, index_dir)
+            index_s = time.perf_counter() - started
+            check(source, raw_blocks, truth)
+
+            started = time.perf_counter()
+            for height in range(100):
+                source.get_block_by_height(height)
+            first_100_s = time.perf_counter() - started
+
+            started = time.perf_counter()
+            spent_coinbases(source, 0, 99, os.path.join(index_dir, "spent-bench"))
+            srr1_s = time.perf_counter() - started
+
+            resolving = BlkSource(blocks_dir, index_dir, resolve_prevouts=True)
+            started = time.perf_counter()
+            block = resolving.get_block_by_height(len(raw_blocks) - 1)
+            resolve_s = time.perf_counter() - started
+            for tx in block["tx"][1:]:
+                assert calculate_fee(tx) == truth["fees"][tx["hash"]]
+            source.close()
+            resolving.close()
+
+            print(f"[{label}] индекс: {index_s * 1000:.0f} мс; 100 блоков в JSON: {first_100_s * 1000:.0f} мс;"
+                  f" СРР-1 0-99: {srr1_s * 1000:.0f} мс; индекс txid + блок с prev_out: {resolve_s * 1000:.0f} мс")
+
+
+if __name__ == "__main__":
+    main()
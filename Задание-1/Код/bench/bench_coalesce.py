@@ -0,0 +1,111 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from srr.cache import MemoryCache  # noqa: E402
+from srr.client import HttpClient, SingleFlight  # noqa: E402
+from srr.fakeserver import GENESIS_TIME, FakeServerProcess, tx_hash  # noqa: E402
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+SEED = 1  # seed цепочки FakeServerProcess по умолчанию
+DAY_MS = (GENESIS_TIME + 86400 - GENESIS_TIME % 86400) * 1000
+
+
+# ----------------------------- ✦ WORKLOADS ✦ -----------------------------
+# Упрощённые запросы скриптов к REST API; каждый - своим пулом потоков, как в srr
+def coinbase_scan(client, heights):
+    # СРР-1: блок по высоте и его coinbase
+    def one(height):
+        block = client.get_json(f"/block-height/{height}?format=json")["blocks"][0]
+        return client.get_json(f"/rawtx/{block['tx'][0]['hash']}")["hash"]
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        return list(pool.map(one, heights))
+
+
+def fee_analysis(client, heights):
+    # СРР-2: блоки по высоте и родительские транзакции входов - одни и те же
+    # родители встречаются у многих входов
+    def parent(tx_index):
+        height, position = divmod(tx_index, 100000)
+        return client.get_json(f"/rawtx/{tx_hash(SEED, height, position)}")["out"][0]["value"]
+
+    parents = []
+    for height in heights:
+        block = client.get_json(f"/block-height/{height}?format=json")["blocks"][0]
+        # Родители из генезис-блока (в нём одна транзакция) пропускаются
+        parents += [
+            inp["prev_out"]["tx_index"] for tx in block["tx"][1:] for inp in tx["inputs"]
+            if inp["prev_out"]["tx_index"] >= 100000
+        ]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        return list(pool.map(parent, parents))
+
+
+def day_stats(client, limit=10):
+    # СРР-3: список блоков суток и первые limit блоков целиком
+    hashes = [block["hash"] for block in client.get_json(f"/blocks/{DAY_MS}?format=json")[:limit]]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        return [len(block["tx"]) for block in pool.map(lambda h: client.get_json(f"/rawblock/{h}"), hashes)]
+
+
+def digest(result):
+    return hashlib.sha1(json.dumps(result).encode()).hexdigest()[:12]
+
+
+def run_all(client, args):
+    # Анализы идут одновременно, как в общем пакетном задании или сервисе
+    jobs = [
+        ("СРР-1", lambda: coinbase_scan(client, range(1, args.heights + 1))),
+        ("СРР-2", lambda: fee_analysis(client, range(1, args.fee_blocks + 1))),
+        ("СРР-3 #1", lambda: day_stats(client)),
+        ("СРР-3 #2", lambda: day_stats(client)),
+    ]
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        futures = [(name, pool.submit(job)) for name, job in jobs]
+        return {name: digest(future.result()) for name, future in futures}
+
+
+# ----------------------------- ✦ MAIN ✦ -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Одновременные анализы: без слияния запросов и с ним")
+    parser.add_argument("--heights", type=int, default=60)
+    parser.add_argument("--fee-blocks", type=int, default=3)
+    parser.add_argument("--txs-per-block", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.03, help="задержка ответа сервера, сек.")
+    args = parser.parse_args(argv)
+
+    with FakeServerProcess("--seed", SEED, "--latency", args.latency, "--heights", 400,
+                           "--txs-per-block", args.txs_per_block) as fake:
+        run_all(HttpClient(fake.base_url, cache=False, flight=None), args)  # прогрев генерации блоков
+        reference = None
+        for label, make in (
+            ("без слияния", lambda: (None, None)),
+            ("single-flight", lambda: (SingleFlight(), None)),
+            ("single-flight + LRU", lambda: (SingleFlight(), MemoryCache(16 * 1024 * 1024))),
+        ):
+            flight, memory = make()
+            client = HttpClient(fake.base_url, cache=False, memory=False if memory is None else memory, flight=flight, pool_size=32)
+            fake.reset_stats()
+            started = time.perf_counter()
+            results = run_all(client, args)
+            elapsed = time.perf_counter() - started
+            reference = reference or results
+            assert results == reference, (label, results, reference)
+            stats = fake.stats()
+            print(f"{label:>20}: {stats['requests']:>5} запросов, {stats['bytes'] / 1024:7.0f} КБ, {elapsed:5.2f} с")
+            if flight is not None:
+                print(f"{'':>22}single-flight: {flight.stats()}")
+            if memory is not None:
+                print(f"{'':>22}LRU: {memory.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from srr.fees import fee_ratio_items, min_max_ratio, tx_id  # noqa: E402
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+TX_COUNTS = [100, 1000, 2000, 5000]
+MISSING_PREV_OUT = 0.0  # доля транзакций без prev_out.value в данных блока
+
+
+# ----------------------------- ✦ HELPERS ✦ -----------------------------
+def make_full_txs(tx_count):
+    txs = [{"hash": "cb", "inputs": [{"coinbase": "00"}], "out": [{"value": 2500000000}]}]
+    for i in range(1, tx_count):
+        value_in = 100000 + i
+        txs.append(
+            {
+                "hash": f"{i:064x}",
+                "inputs": [{"prev_out": {"value": value_in}}],
+                "out": [{"value": value_in - 1000 - i % 500}],
+            }
+        )
+    return txs
+
+
+def make_block(full_txs, missing=MISSING_PREV_OUT):
+    # Часть транзакций - без prev_out.value, как бывает в ответе /block-height
+    txs = []
+    for i, tx in enumerate(full_txs):
+        if i and i < len(full_txs) * missing:
+            tx = dict(tx, inputs=[{"prev_out": {}}])
+        txs.append(tx)
+    return {"tx": txs}
+
+
+class CountingSource:
+    def __init__(self, block, full_txs):
+        self.block = block
+        self.by_id = {tx_id(tx): tx for tx in full_txs}
+        self.requests = 0
+
+    def get_block(self):
+        self.requests += 1
+        return self.block
+
+    def get_transaction(self, txid):
+        self.requests += 1
+        return self.by_id[txid]
+
+
+def legacy(source):
+    # Старый СРР-2.py: блок + /rawtx на каждую транзакцию
+    items = []
+    for short_tx in source.get_block()["tx"]:
+        tx = source.get_transaction(tx_id(short_tx))
+        items.extend(fee_ratio_items({"tx": [tx]}))
+    return min_max_ratio(items)
+
+
+def engine(source):
+    block = source.get_block()
+    return min_max_ratio(fee_ratio_items(block, get_transaction=source.get_transaction))
+
+
+# ----------------------------- ✦ MASTER FN ✦ -----------------------------
+def main():
+    print(f"{'tx':>6} {'старый: запросов':>18} {'новый: запросов':>17} {'новый: сек.':>12}")
+    for tx_count in TX_COUNTS:
+        full_txs = make_full_txs(tx_count)
+        block = make_block(full_txs)
+
+        old = CountingSource(block, full_txs)
+        old_result = legacy(old)
+
+        new = CountingSource(block, full_txs)
+        started = time.perf_counter()
+        new_result = engine(new)
+        elapsed = time.perf_counter() - started
+
+        assert [i[1] for i in old_result] == [i[1] for i in new_result]
+        print(f"{tx_count:>6} {old.requests:>18} {new.requests:>17} {elapsed:>12.4f}")
+
+
+if __name__ == "__main__":
+    main()
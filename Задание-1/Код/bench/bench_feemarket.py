@@ -0,0 +1,110 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from srr.columnar import DEFAULT_PERCENTILES, BlockColumns  # noqa: E402
+from srr.fakeserver import SyntheticChain  # noqa: E402
+from srr.feemarket import FeeMarket  # noqa: E402
+from srr.parallel import analyze_bodies  # noqa: E402
+
+
+# ----------------------------- ✦ HELPERS ✦ -----------------------------
+def exact_values(block):
+    # Те же отношения и сат/vB, что считает FeeMarket, - для точных перцентилей
+    cols = BlockColumns.from_blocks([block])
+    mask = cols.fee_mask()
+    fees, vsizes = cols.fee[mask], cols.vsize[mask]
+    ratio = fees / cols.output_sum[mask]
+    feerate = fees[vsizes > 0] / vsizes[vsizes > 0]
+    keys = [(float(r), cols.txids[i]) for r, i in zip(ratio, np.flatnonzero(mask))]
+    return ratio, feerate, keys
+
+
+def max_relative_error(sketch, exact):
+    # Сравнение с ближайшим рангом: скетч не интерполирует между соседними значениями
+    values = sketch.percentiles(DEFAULT_PERCENTILES)
+    worst = 0.0
+    for p in DEFAULT_PERCENTILES:
+        truth = float(np.percentile(exact, p, method="lower"))
+        worst = max(worst, abs(values[p] - truth) / truth)
+    return worst
+
+
+# ----------------------------- ✦ MAIN ✦ -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Рынок комиссий: скетчи против точных перцентилей")
+    parser.add_argument("--blocks", type=int, default=10000)
+    parser.add_argument("--txs-per-block", type=int, default=40)
+    parser.add_argument("--parts", type=int, default=7, help="частей для проверки слияния")
+    parser.add_argument("--pool-blocks", type=int, default=1000, help="блоков для прогона через пул процессов")
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args(argv)
+
+    chain = SyntheticChain(heights=args.blocks + 1, txs_per_block=args.txs_per_block)
+    blocks = [chain.block(h) for h in range(1, args.blocks + 1)]
+    chain.block.cache_clear()
+
+    started = time.perf_counter()
+    market = FeeMarket()
+    for block in blocks:
+        market.add_block(block)
+    elapsed = time.perf_counter() - started
+    print(f"{args.blocks} блоков, {market.tx_count} транзакций: {elapsed:.2f} с,"
+          f" {market.tx_count / elapsed:,.0f} транзакций/с")
+
+    ratios, feerates, keys = [], [], []
+    for block in blocks:
+        ratio, feerate, block_keys = exact_values(block)
+        ratios.append(ratio)
+        feerates.append(feerate)
+        keys.extend(block_keys)
+    ratios, feerates = np.concatenate(ratios), np.concatenate(feerates)
+
+    sketch_bytes = market.ratio.nbytes + market.feerate.nbytes
+    print(f"Память: скетчи {sketch_bytes / 1024:.1f} КБ против {(ratios.nbytes + feerates.nbytes) / 1024:.0f} КБ"
+          f" точных значений")
+    for title, sketch, exact in (("отношение", market.ratio, ratios), ("сат/vB", market.feerate, feerates)):
+        error = max_relative_error(sketch, exact)
+        assert error <= sketch.alpha + 1e-9, (title, error)
+        print(f"{title:>10}: наибольшая относительная ошибка перцентилей {error * 100:.3f}%"
+              f" (предел {sketch.alpha * 100:g}%)")
+
+    keys.sort()
+    assert [(r, txid) for r, txid, *_ in market.highest.items()] == keys[::-1][:market.top]
+    # У наименьших при равном отношении выше больший txid - как у ключа (-ratio, txid)
+    lowest = sorted(keys, key=lambda k: (-k[0], k[1]), reverse=True)[:market.top]
+    assert [(r, txid) for r, txid, *_ in market.lowest.items()] == lowest
+    assert market.histogram.sum() == len(feerates)
+    print("Top-K и гистограмма совпадают с полным перебором")
+
+    # Частичные итоги по поддиапазонам, слитые по порядку, - то же, что один проход
+    step = -(-len(blocks) // args.parts)
+    merged = FeeMarket()
+    for start in range(0, len(blocks), step):
+        part = FeeMarket()
+        for block in blocks[start:start + step]:
+            part.add_block(block)
+        merged.merge(part)
+    assert merged.same(market)
+    print(f"Слияние {args.parts} частей совпадает с одним проходом")
+
+    bodies = [json.dumps(block, separators=(",", ":")).encode() for block in blocks[:args.pool_blocks]]
+    reference = FeeMarket()
+    for block in blocks[:args.pool_blocks]:
+        reference.add_block(block)
+    started = time.perf_counter()
+    pooled = analyze_bodies((bodies[i:i + 50] for i in range(0, len(bodies), 50)), args.workers, FeeMarket)
+    elapsed = time.perf_counter() - started
+    assert pooled.same(reference)
+    print(f"Пул из {args.workers} процессов, {len(bodies)} блоков: {elapsed:.2f} с, итог совпадает")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from srr import fees, model  # noqa: E402
+from srr.fakeserver import SyntheticChain  # noqa: E402
+from srr.stats import tx_addresses  # noqa: E402
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+TXS_PER_BLOCK = 3000
+REPEATS = 20
+
+
+# ----------------------------- ✦ HELPERS ✦ -----------------------------
+def retained(build):
+    # Сколько памяти остаётся занятой результатом build() после сборки мусора
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def timed(fn):
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        fn()
+    return (time.perf_counter() - started) / REPEATS
+
+
+def dict_addresses(block):
+    return sum(len(tx_addresses(tx)) for tx in block["tx"])
+
+
+def model_addresses(block):
+    return sum(len(tx.addresses()) for tx in block.txs)
+
+
+# ----------------------------- ✦ MAIN ✦ -----------------------------
+def main():
+    raw = json.dumps(SyntheticChain(txs_per_block=TXS_PER_BLOCK).block(500)).encode()
+
+    as_dict, dict_bytes = retained(lambda: json.loads(raw))
+    as_model, model_bytes = retained(lambda: model.parse_block(json.loads(raw)))
+    assert fees.min_max_ratio(fees.fee_ratio_items(as_dict)) == fees.min_max_ratio(
+        model.fee_ratio_items(as_model)
+    )
+    assert dict_addresses(as_dict) == model_addresses(as_model)
+
+    print(f"Блок: {len(as_model)} транзакций, JSON {len(raw) / 2**20:.1f} МБ")
+    print(f"{'':<24} {'dict':>10} {'model':>10}")
+    print(f"{'память блока, МБ':<24} {dict_bytes / 2**20:>10.2f} {model_bytes / 2**20:>10.2f}")
+    rows = [
+        ("мин./макс. отношение, мс",
+         lambda: fees.min_max_ratio(fees.fee_ratio_items(as_dict)),
+         lambda: fees.min_max_ratio(model.fee_ratio_items(as_model))),
+        ("адреса транзакций, мс", lambda: dict_addresses(as_dict), lambda: model_addresses(as_model)),
+        ("разбор из JSON, мс", lambda: json.loads(raw), lambda: model.parse_block(json.loads(raw))),
+    ]
+    for name, dict_fn, model_fn in rows:
+        print(f"{name:<24} {timed(dict_fn) * 1000:>10.2f} {timed(model_fn) * 1000:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
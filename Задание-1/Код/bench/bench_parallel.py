@@ -0,0 +1,85 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from srr.fakeserver import SyntheticChain  # noqa: E402
+from srr.parallel import CHUNK_BLOCKS, _release, _to_segment, analyze_bodies, analyze_segment  # noqa: E402
+from srr.stats import BlockStats, day_answers  # noqa: E402
+
+
+# ----------------------------- ✦ HELPERS ✦ -----------------------------
+def chunked(bodies, size=CHUNK_BLOCKS):
+    return [bodies[i:i + size] for i in range(0, len(bodies), size)]
+
+
+def serial(bodies):
+    stats = BlockStats()
+    for body in bodies:
+        stats.add_block(json.loads(body))
+    return stats
+
+
+def parent_share(bodies):
+    # Работа, которая остаётся в родителе при любом числе процессов:
+    # упаковка в разделяемую память и слияние частичных итогов
+    partials, packing = [], 0.0
+    for part in chunked(bodies):
+        started = time.perf_counter()
+        shm, spans = _to_segment(part)
+        packing += time.perf_counter() - started
+        partials.append(analyze_segment(shm.name, spans))
+        _release(shm)
+    started = time.perf_counter()
+    stats = BlockStats()
+    for partial in partials:
+        stats.merge(partial)
+    return packing + time.perf_counter() - started, stats
+
+
+def check_equivalent(a, b):
+    assert day_answers(a) == day_answers(b)
+    assert a.addresses.top(20) == b.addresses.top(20)
+    assert a.addresses.names == b.addresses.names
+    assert a.addresses.tx_addr_ids == b.addresses.tx_addr_ids
+    assert [x["hash"] for x in a.blocks] == [x["hash"] for x in b.blocks]
+
+
+# ----------------------------- ✦ MAIN ✦ -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="СРР-3 на сутках/неделе: один процесс против пула")
+    parser.add_argument("--blocks", type=int, default=144, help="144 - сутки, 1008 - неделя")
+    parser.add_argument("--txs-per-block", type=int, default=1000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args(argv)
+
+    chain = SyntheticChain(heights=args.blocks + 1, txs_per_block=args.txs_per_block)
+    bodies = [json.dumps(chain.block(h), separators=(",", ":")).encode() for h in range(1, args.blocks + 1)]
+    print(f"{args.blocks} блоков, {sum(map(len, bodies)) / 2**20:.0f} МБ JSON; ядер: {os.cpu_count()}")
+
+    started = time.perf_counter()
+    reference = serial(bodies)
+    serial_s = time.perf_counter() - started
+    print(f"{'один процесс':>16}: {serial_s:6.2f} с")
+
+    share_s, merged = parent_share(bodies)
+    check_equivalent(reference, merged)
+    fraction = share_s / serial_s
+    for workers in args.workers:
+        started = time.perf_counter()
+        stats = analyze_bodies(chunked(bodies), workers)
+        elapsed = time.perf_counter() - started
+        check_equivalent(reference, stats)
+        # Закон Амдала по доле работы родителя - ожидаемое ускорение при достаточном числе ядер
+        expected = 1 / (fraction + (1 - fraction) / workers)
+        print(f"{f'пул, {workers} проц.':>16}: {elapsed:6.2f} с; ускорение {serial_s / elapsed:4.2f}x,"
+              f" ожидаемое при {workers} ядрах {expected:4.2f}x")
+    print(f"Доля родителя (упаковка + слияние): {fraction * 100:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
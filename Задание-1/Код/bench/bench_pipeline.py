@@ -0,0 +1,129 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import argparse
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from srr.fakeserver import FakeServerProcess  # noqa: E402
+from srr.metrics import METRICS  # noqa: E402
+from srr.pipeline import analyze_pipeline, block_pipeline  # noqa: E402
+from srr.source import BlockchainInfoSource  # noqa: E402
+from srr.stats import BlockStats, day_answers  # noqa: E402
+
+
+# ----------------------------- ✦ HELPERS ✦ -----------------------------
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def serial(source, hashes):
+    # Как цикл СРР-3: поток блока разбирается и считается, потом следующий
+    stats = BlockStats()
+    for block_hash in hashes:
+        stream = source.open_block_stream(block_hash)
+        try:
+            stats.add_stream(stream)
+        finally:
+            stream.close()
+    return stats
+
+
+def read_body(source, block_hash):
+    stream = source.open_block_stream(block_hash)
+    try:
+        return stream.read()
+    finally:
+        stream.close()
+
+
+def fetch_only(source, hashes):
+    return [read_body(source, block_hash) for block_hash in hashes]
+
+
+def cpu_only(bodies):
+    stats = BlockStats()
+    for body in bodies:
+        stats.add_stream(io.BytesIO(body))
+    return stats
+
+
+def peak_mb(fn, *args):
+    tracemalloc.start()
+    try:
+        fn(*args)
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally:
+        tracemalloc.stop()
+
+
+def queue_report():
+    report = METRICS.report()
+    peaks = {series: value for series, value in report["counters"].items() if series.startswith("pipeline_queue_peak")}
+    waits = {name: row["seconds"] for name, row in report["stages"].items() if name.startswith("queue.")}
+    return peaks, waits
+
+
+# ----------------------------- ✦ MAIN ✦ -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Загрузка и потоковый анализ блоков: подряд против конвейера")
+    parser.add_argument("--blocks", type=int, default=30)
+    parser.add_argument("--txs-per-block", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.15, help="задержка ответа сервера, сек.")
+    parser.add_argument("--fetch-workers", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args(argv)
+
+    with FakeServerProcess("--latency", args.latency, "--heights", args.blocks + 1,
+                           "--txs-per-block", args.txs_per_block) as fake:
+        def make():
+            return BlockchainInfoSource(fake.base_url, cache=False)
+
+        hashes = [block["hash"] for block in make().get_blocks_by_heights(range(1, args.blocks + 1))]
+        fetch_only(make(), hashes)  # прогрев: сервер генерирует блоки при первом обращении
+
+        bodies, network = timed(fetch_only, make(), hashes)
+        reference, cpu = timed(cpu_only, bodies)
+        print(f"{args.blocks} блоков по {args.txs_per_block} транзакций, задержка {args.latency * 1000:.0f} мс")
+        print(f"{'только сеть':>22}: {network:6.2f} с")
+        print(f"{'только разбор и анализ':>22}: {cpu:6.2f} с")
+        stats, elapsed = timed(serial, make(), hashes)
+        assert day_answers(stats) == day_answers(reference)
+        print(f"{'подряд (как СРР-3)':>22}: {elapsed:6.2f} с; сумма стадий {network + cpu:5.2f} с")
+
+        for workers in args.fetch_workers:
+            METRICS.reset()
+            stats, elapsed = timed(lambda: analyze_pipeline(make(), hashes, fetch_workers=workers))
+            assert day_answers(stats) == day_answers(reference)
+            assert stats.addresses.top(20) == reference.addresses.top(20)
+            peaks, waits = queue_report()
+            print(f"{f'конвейер, {workers} загр.':>22}: {elapsed:6.2f} с; max(сеть / {workers}, CPU)"
+                  f" {max(network / workers, cpu):5.2f} с")
+            print(f"{'':>24}пики очередей {peaks}; ожидания, с: {waits}")
+
+        # Память: в конвейере потоки и счётчики блоков, а не их JSON
+        largest = max(bodies, key=len)
+        print(f"{'пик памяти':>22}: конвейер {peak_mb(analyze_pipeline, make(), hashes):6.1f} МБ,"
+              f" подряд {peak_mb(serial, make(), hashes):6.1f} МБ; один блок json.loads"
+              f" {peak_mb(json.loads, largest):6.1f} МБ")
+
+        # Медленный потребитель: загрузка упирается в полные очереди, в работе не больше window блоков
+        METRICS.reset()
+        pipeline = block_pipeline(make(), fetch_workers=4)
+        held = 0
+        for _ in pipeline.run(hashes):
+            held = max(held, sum(pipeline.depths().values()))
+            time.sleep(args.latency)
+        peaks, waits = queue_report()
+        assert held <= pipeline.window
+        print(f"{'медленный анализ':>22}: в очередях не больше {held} блоков (окно {pipeline.window});"
+              f" ожидания, с: {waits}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from srr.dayindex import DayIndex  # noqa: E402
+from srr.fakeserver import GENESIS_TIME, FakeServerProcess  # noqa: E402
+from srr.pipeline import analyze_pipeline  # noqa: E402
+from srr.planner import DayPlan, QUESTIONS, parse_questions  # noqa: E402
+from srr.source import BlockchainInfoSource, RpcSource  # noqa: E402
+from srr.stats import day_answers  # noqa: E402
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+DAY_MS = (GENESIS_TIME + 86400 - GENESIS_TIME % 86400) * 1000
+
+
+# ----------------------------- ✦ HELPERS ✦ -----------------------------
+class Counting:
+    # Поток, считающий байты, которые клиент действительно получил из сети:
+    # tell() у ответа urllib3 - прочитанное из сокета до распаковки gzip
+    def __init__(self, stream, counter):
+        self.stream = stream
+        self.counter = counter
+        self.position = 0
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        position = self.stream.tell()
+        self.counter[0] += position - self.position
+        self.position = position
+        return data
+
+    def close(self):
+        self.stream.close()
+
+
+def counted(source):
+    # Тела /rawblock в байтах, прочитанных клиентом (сервер считает отправленное целиком)
+    counter = [0]
+    open_block_stream = source.open_block_stream
+
+    def wrapper(block_hash):
+        stream = open_block_stream(block_hash)
+        return Counting(stream, counter) if stream is not None else None
+
+    source.open_block_stream = wrapper
+    return counter
+
+
+def client_kb(read, stats):
+    # REST: тела /rawblock, полученные клиентом, плюс прочие ответы; RPC - все ответы
+    rawblock = stats["by_endpoint"].get("/rawblock", {}).get("bytes", 0)
+    return (read[0] + stats["bytes"] - rawblock) / 1024
+
+
+def eager(source, timestamp):
+    # Как было в СРР-3-FIX: все 10 блоков целиком до любого вопроса
+    return analyze_pipeline(source, [block["hash"] for block in source.get_blocks_by_time(timestamp)[:10]])
+
+
+# ----------------------------- ✦ MAIN ✦ -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="СРР-3-FIX: все блоки целиком против ленивого плана")
+    parser.add_argument("--txs-per-block", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.02, help="задержка ответа сервера, сек.")
+    parser.add_argument("--questions", nargs="+", default=["3,4", "5", "1-5", "6-8", "1-8"])
+    args = parser.parse_args(argv)
+
+    with FakeServerProcess("--latency", args.latency, "--heights", 400, "--txs-per-block", args.txs_per_block) as fake:
+        for label, make in (
+            ("REST", lambda: BlockchainInfoSource(fake.base_url, cache=False)),
+            ("JSON-RPC", lambda: RpcSource(fake.base_url)),
+        ):
+            eager(make(), DAY_MS)  # прогрев: сервер генерирует блоки при первом обращении
+            source = make()
+            read = counted(source)
+            fake.reset_stats()
+            started = time.perf_counter()
+            reference = day_answers(eager(source, DAY_MS))
+            elapsed = time.perf_counter() - started
+            base = client_kb(read, fake.stats())
+            print(f"{label}: все блоки целиком - {base:8.0f} КБ, {elapsed:5.2f} с")
+
+            for spec in args.questions:
+                questions = parse_questions(spec)
+                source = make()
+                read = counted(source)
+                with tempfile.TemporaryDirectory() as tmp:
+                    days = DayIndex(source, os.path.join(tmp, "days.sqlite3"))
+                    fake.reset_stats()
+                    started = time.perf_counter()
+                    answers = DayPlan(days, DAY_MS).answers(questions)
+                    elapsed = time.perf_counter() - started
+                    days.close()
+                for question, value in answers.items():
+                    assert value == reference[QUESTIONS[question][0]], (spec, question, value)
+                stats = fake.stats()
+                size = client_kb(read, stats)
+                print(f"{'вопросы ' + spec:>16}: {size:8.0f} КБ ({size / base * 100:5.1f}%),"
+                      f" {stats['requests']:>3} запросов, {elapsed:5.2f} с")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import gzip
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from srr import model, wire  # noqa: E402
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+TX_COUNTS = [500, 2000, 4000]
+SEGWIT_SHARE = 0.6
+REPEATS = 5
+
+# Генезис-блок: известные хэш, txid и адрес выхода (P2PK)
+GENESIS_HEX = (
+    "0100000000000000000000000000000000000000000000000000000000000000000000003ba3edfd7a7b12b2"
+    "7ac72c3e67768f617fc81bc3888a51323a9fb8aa4b1e5e4a29ab5f49ffff001d1dac2b7c01010000000100"
+    "00000000000000000000000000000000000000000000000000000000000000ffffffff4d04ffff001d0104"
+    "455468652054696d65732030332f4a616e2f32303039204368616e63656c6c6f72206f6e206272696e6b20"
+    "6f66207365636f6e64206261696c6f757420666f722062616e6b73ffffffff0100f2052a01000000434104"
+    "678afdb0fe5548271967f1a67130b7105cd6a828e03909a67962e0ea1f61deb649f6bc3f4cef38c4f35504"
+    "e51ec112de5c384df7ba0b8d578a4c702b6bf11d5fac00000000"
+)
+GENESIS_HASH = "000000000019d6689c085ae165831e934ff763ae46a2a6c172b3f1b60a8ce26f"
+GENESIS_TXID = "4a5e1e4baab89f3a32518a88c31bc87f618f76673e2cc77ab2127b7afdeda33b"
+GENESIS_ADDR = "1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa"
+
+
+# ----------------------------- ✦ SERIALIZER ✦ -----------------------------
+def varint(n):
+    if n < 0xFD:
+        return bytes([n])
+    if n <= 0xFFFF:
+        return b"\xfd" + n.to_bytes(2, "little")
+    return b"\xfe" + n.to_bytes(4, "little")
+
+
+def random_script(rng):
+    kind = rng.random()
+    payload = rng.randbytes(20)
+    if kind < 0.5:
+        return b"\x76\xa9\x14" + payload + b"\x88\xac"
+    if kind < 0.7:
+        return b"\xa9\x14" + payload + b"\x87"
+    if kind < 0.95:
+        return b"\x00\x14" + payload
+    return b"\x6a\x08" + rng.randbytes(8)  # OP_RETURN, без адреса
+
+
+def make_tx(rng, height=None):
+    # (байты со witness, байты без witness, JSON в формате blockchain.info)
+    coinbase = height is not None
+    segwit = not coinbase and rng.random() < SEGWIT_SHARE
+    inputs_raw, inputs_json = [], []
+    for _ in range(1 if coinbase else rng.randint(1, 3)):
+        if coinbase:
+            prev, vout = bytes(32), 0xFFFFFFFF
+            script = b"\x03" + height.to_bytes(3, "little") + rng.randbytes(20)
+            inputs_json.append({"sequence": 4294967295, "script": script.hex()})
+        else:
+            prev, vout = rng.randbytes(32), rng.randrange(4)
+            script = b"" if segwit else rng.randbytes(107)
+            inputs_json.append(
+                {
+                    "sequence": 4294967295,
+                    "witness": "",
+                    "script": script.hex(),
+                    "prev_out": {
+                        "spent": True,
+                        "tx_index": rng.getrandbits(48),
+                        "n": vout,
+                        "value": rng.randint(10**4, 10**9),
+                        "addr": wire.script_address(b"\x00\x14" + rng.randbytes(20)),
+                        "script": "0014" + rng.randbytes(20).hex(),
+                    },
+                }
+            )
+        inputs_raw.append(prev[::-1] + vout.to_bytes(4, "little") + varint(len(script)) + script + b"\xff" * 4)
+
+    outputs_raw, outputs_json = [], []
+    for n in range(rng.randint(1, 3)):
+        value = rng.randint(546, 10**9)
+        script = random_script(rng)
+        outputs_raw.append(value.to_bytes(8, "little") + varint(len(script)) + script)
+        out = {"type": 0, "spent": False, "value": value, "n": n, "script": script.hex()}
+        addr = wire.script_address(script)
+        if addr:
+            out["addr"] = addr
+        outputs_json.append(out)
+
+    body = varint(len(inputs_raw)) + b"".join(inputs_raw) + varint(len(outputs_raw)) + b"".join(outputs_raw)
+    version, lock_time = (2).to_bytes(4, "little"), bytes(4)
+    stripped = version + body + lock_time
+    if segwit:
+        witness = b"".join(b"\x02\x48" + rng.randbytes(72) + b"\x21" + rng.randbytes(33) for _ in inputs_raw)
+        full = version + b"\x00\x01" + body + witness + lock_time
+    else:
+        full = stripped
+    txid = wire.dsha256(stripped)[::-1].hex()
+    tx_json = {
+        "hash": txid,
+        "ver": 2,
+        "vin_sz": len(inputs_json),
+        "vout_sz": len(outputs_json),
+        "size": len(full),
+        "weight": len(stripped) * 3 + len(full),
+        "lock_time": 0,
+        "inputs": inputs_json,
+        "out": outputs_json,
+    }
+    return full, tx_json
+
+
+def make_block(tx_count, height=700000, seed=1):
+    rng = random.Random(seed)
+    txs = [make_tx(rng, height)] + [make_tx(rng) for _ in range(tx_count - 1)]
+    prev_block = rng.randbytes(32)
+    timestamp = 1630000000
+    header = (
+        (0x20000000).to_bytes(4, "little")
+        + prev_block
+        + rng.randbytes(32)
+        + timestamp.to_bytes(4, "little")
+        + rng.randbytes(8)
+    )
+    raw = header + varint(len(txs)) + b"".join(full for full, _ in txs)
+    block_json = {
+        "hash": wire.dsha256(header)[::-1].hex(),
+        "ver": 0x20000000,
+        "prev_block": prev_block[::-1].hex(),
+        "time": timestamp,
+        "n_tx": len(txs),
+        "size": len(raw),
+        "height": height,
+        "tx": [tx_json for _, tx_json in txs],
+    }
+    return raw, block_json
+
+
+# ----------------------------- ✦ EQUIVALENCE ✦ -----------------------------
+def check_genesis():
+    block = wire.parse_block(GENESIS_HEX)
+    assert block.hash.hex() == GENESIS_HASH
+    assert block.txs[0].hash == GENESIS_TXID
+    assert block.txs[0].output_addrs == (GENESIS_ADDR,)
+    assert list(block.txs[0].output_values) == [5000000000]
+
+
+def check_equivalent(from_wire, from_json):
+    # Поля, которые есть в обоих представлениях; суммы входов в wire-формате отсутствуют
+    assert from_wire.hash == from_json.hash
+    assert from_wire.prev_block == from_json.prev_block
+    assert (from_wire.height, from_wire.time, from_wire.size) == (
+        from_json.height,
+        from_json.time,
+        from_json.size,
+    )
+    assert len(from_wire.txs) == len(from_json.txs)
+    for a, b in zip(from_wire.txs, from_json.txs):
+        assert a.txid == b.txid, (a, b)
+        assert (a.size, a.weight, a.coinbase) == (b.size, b.weight, b.coinbase)
+        assert a.output_values == b.output_values
+        assert a.output_addrs == b.output_addrs
+        assert a.output_sum == b.output_sum
+        assert len(a.input_values) == len(b.input_values)
+    assert from_wire.miner == from_json.miner
+
+
+# ----------------------------- ✦ MAIN ✦ -----------------------------
+def timed(fn):
+    started = time.perf_counter()
+    for _ in range(REPEATS):
+        fn()
+    return (time.perf_counter() - started) / REPEATS
+
+
+def main():
+    check_genesis()
+    print(f"{'транзакций':>10} {'JSON КБ':>9} {'hex КБ':>8} {'JSON gz':>8} {'hex gz':>8}"
+          f" {'JSON мс':>8} {'hex мс':>8}")
+    for tx_count in TX_COUNTS:
+        raw, block_json = make_block(tx_count)
+        json_body = json.dumps(block_json, separators=(",", ":")).encode()
+        hex_body = raw.hex().encode()
+        check_equivalent(wire.parse_block(hex_body.decode()), model.parse_block(json.loads(json_body)))
+
+        json_ms = timed(lambda: model.parse_block(json.loads(json_body))) * 1000
+        hex_ms = timed(lambda: wire.parse_block(hex_body.decode())) * 1000
+        print(
+            f"{tx_count:>10} {len(json_body) / 1024:>9.0f} {len(hex_body) / 1024:>8.0f}"
+            f" {len(gzip.compress(json_body, 1)) / 1024:>8.0f} {len(gzip.compress(hex_body, 1)) / 1024:>8.0f}"
+            f" {json_ms:>8.1f} {hex_ms:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
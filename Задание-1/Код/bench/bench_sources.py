@@ -0,0 +1,79 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from srr.fakeserver import GENESIS_TIME, FakeServerProcess  # noqa: E402
+from srr.fees import calculate_fee  # noqa: E402
+from srr.scan import coinbase_spent  # noqa: E402
+from srr.source import BlockchainInfoSource, RpcSource  # noqa: E402
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+DAY_MS = (GENESIS_TIME + 86400 - GENESIS_TIME % 86400) * 1000
+
+
+# ----------------------------- ✦ EQUIVALENCE ✦ -----------------------------
+def spent_heights(source, heights):
+    found = []
+    for height, result in source.fetch_coinbases(heights):
+        assert not isinstance(result, Exception), (height, result)
+        found.extend((height, block_hash, txid) for block_hash, txid, tx in result if coinbase_spent(tx))
+    return found
+
+
+def check_equivalent(rest, rpc, args):
+    # Один и тот же блок и транзакция через REST и через RPC
+    for height in (1, args.heights // 2, args.heights - 1):
+        a, b = rest.get_block_by_height(height), rpc.get_block_by_height(height)
+        assert (a["hash"], a["prev_block"], a["time"], a["n_tx"], a["fee"]) == (
+            b["hash"], b["prev_block"], b["time"], b["n_tx"], b["fee"]
+        )
+        for tx_a, tx_b in zip(a["tx"], b["tx"]):
+            assert tx_a["hash"] == tx_b["hash"]
+            assert calculate_fee(tx_a) == calculate_fee(tx_b)
+            assert [o.get("addr") for o in tx_a["out"]] == [o.get("addr") for o in tx_b["out"]]
+        txid = a["tx"][-1]["hash"]
+        assert calculate_fee(rest.get_transaction(txid)) == calculate_fee(rpc.get_transaction(txid))
+    day = [b["hash"] for b in rest.get_blocks_by_time(DAY_MS)]
+    assert [b["hash"] for b in rpc.get_blocks_by_time(DAY_MS)] == day
+
+
+# ----------------------------- ✦ MAIN ✦ -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="СРР-1 через blockchain.info и через JSON-RPC пачками")
+    parser.add_argument("--heights", type=int, default=1000, help="высот в фейковой цепочке")
+    parser.add_argument("--scan", type=int, default=100, help="высот в прогоне СРР-1 (0..N-1)")
+    parser.add_argument("--latency", type=float, default=0.05, help="задержка ответа сервера, сек.")
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args(argv)
+
+    with FakeServerProcess("--latency", args.latency, "--heights", args.heights, "--txs-per-block", 100) as fake:
+        rest = BlockchainInfoSource(fake.base_url, workers=args.workers, cache=False)
+        rpc = RpcSource(fake.base_url)
+        check_equivalent(rest, rpc, args)
+
+        print(f"СРР-1 на высотах 0-{args.scan - 1}, задержка сервера {args.latency * 1000:.0f} мс")
+        reference = None
+        for label, source in (
+            ("REST, 1 поток", BlockchainInfoSource(fake.base_url, workers=1, cache=False)),
+            (f"REST, {args.workers} потоков", rest),
+            ("JSON-RPC пачками", rpc),
+        ):
+            fake.reset_stats()
+            started = time.perf_counter()
+            found = spent_heights(source, range(args.scan))
+            elapsed = time.perf_counter() - started
+            stats = fake.stats()
+            if reference is None:
+                reference = found
+            assert found == reference, label
+            print(f"{label:>20}: {stats['requests']:>4} HTTP-запросов, {stats['bytes'] / 1024:>7.0f} КБ,"
+                  f" {elapsed:>6.2f} с; потрачено {len(found)}")
+        print(f"RPC: {rpc.calls} вызовов в {rpc.posts} POST за всё время прогона")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from srr.cache import ResponseCache  # noqa: E402
+from srr.client import HttpClient  # noqa: E402
+from srr.fakeserver import GENESIS_TIME, FakeServerProcess  # noqa: E402
+from srr.fees import fee_ratio_items, min_max_ratio, tx_id  # noqa: E402
+from srr.fetcher import CoinbaseFetcher  # noqa: E402
+from srr.source import BlockchainInfoSource  # noqa: E402
+from srr.stats import BlockStats, analyze_day  # noqa: E402
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+DAY_MS = (GENESIS_TIME + 86400 - GENESIS_TIME % 86400) * 1000  # первые полные сутки цепочки
+
+
+# ----------------------------- ✦ SCENARIOS ✦ -----------------------------
+def srr1_sequential(client, args):
+    fetcher = CoinbaseFetcher(workers=1, client=client)
+    return sum(len(r) for _, r in fetcher.fetch(range(args.heights)) if not isinstance(r, Exception))
+
+
+def srr1_concurrent(client, args):
+    fetcher = CoinbaseFetcher(workers=args.workers, client=client)
+    return sum(len(r) for _, r in fetcher.fetch(range(args.heights)) if not isinstance(r, Exception))
+
+
+def srr2_per_tx(client, args):
+    # Старый СРР-2.py: /rawtx на каждую транзакцию блока
+    block = client.get_json(f"/block-height/{args.fee_height}?format=json")["blocks"][0]
+    items = []
+    for short_tx in block["tx"]:
+        items.extend(fee_ratio_items({"tx": [client.get_json(f"/rawtx/{tx_id(short_tx)}")]}))
+    return min_max_ratio(items)[0]
+
+
+def srr2_block_only(client, args):
+    block = client.get_json(f"/block-height/{args.fee_height}?format=json")["blocks"][0]
+    return min_max_ratio(fee_ratio_items(block, get_transaction=lambda t: client.get_json(f"/rawtx/{t}")))[0]
+
+
+def srr3_json(client, args):
+    stats = BlockStats()
+    for block in client.get_json(f"/blocks/{DAY_MS}?format=json")[:10]:
+        stats.add_block(client.get_json(f"/rawblock/{block['hash']}"))
+    return stats.total_transactions
+
+
+def srr3_stream(client, args):
+    return analyze_day(BlockchainInfoSource(client=client), DAY_MS).total_transactions
+
+
+SCENARIOS = [
+    ("СРР-1 последовательно", srr1_sequential, False),
+    ("СРР-1 параллельно", srr1_concurrent, False),
+    ("СРР-2 /rawtx на каждую tx", srr2_per_tx, False),
+    ("СРР-2 только блок", srr2_block_only, False),
+    ("СРР-3 JSON целиком", srr3_json, False),
+    ("СРР-3 потоком", srr3_stream, False),
+    ("СРР-3 потоком, тёплый кэш", srr3_stream, True),
+]
+
+
+# ----------------------------- ✦ RUNNER ✦ -----------------------------
+def run_scenario(fake, fn, args, cache=False, trace=True):
+    client = HttpClient(fake.base_url, cache=cache, pool_size=max(4, args.workers))
+    fake.reset_stats()
+    if trace:
+        tracemalloc.start()
+    started = time.perf_counter()
+    result = fn(client, args)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] if trace else 0
+    if trace:
+        tracemalloc.stop()
+    client.close()
+    served = fake.stats()
+    return {
+        "seconds": elapsed,
+        "requests": served["requests"],
+        "bytes": served["bytes"],
+        "peak_mb": peak / 2**20,
+        "result": result,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарк анализов СРР на локальном сервере")
+    parser.add_argument("--latency", type=float, default=0.02, help="задержка сервера, сек.")
+    parser.add_argument("--heights", type=int, default=100, help="высоты для СРР-1")
+    parser.add_argument("--fee-height", type=int, default=399, help="блок для СРР-2")
+    parser.add_argument("--txs-per-block", type=int, default=300)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--only", help="подстрока в названии сценария")
+    parser.add_argument("--no-trace", action="store_true", help="без замера пика памяти (быстрее)")
+    args = parser.parse_args(argv)
+
+    fake = FakeServerProcess(
+        "--latency", args.latency, "--txs-per-block", args.txs_per_block, "--heights", 1000
+    )
+    with fake, tempfile.TemporaryDirectory() as tmp:
+        print(f"{'сценарий':<28} {'сек.':>8} {'запросов':>9} {'КБ по сети':>11} {'пик МБ':>8}")
+        for name, fn, warm in SCENARIOS:
+            if args.only and args.only not in name:
+                continue
+            cache = False
+            if warm:
+                cache = ResponseCache(os.path.join(tmp, f"{fn.__name__}.sqlite3"))
+                run_scenario(fake, fn, args, cache=cache, trace=False)
+            # Время - прогона без tracemalloc (он замедляет разбор в разы), пик памяти - отдельного
+            row = run_scenario(fake, fn, args, cache=cache, trace=False)
+            if not args.no_trace:
+                row["peak_mb"] = run_scenario(fake, fn, args, cache=cache)["peak_mb"]
+            print(
+                f"{name:<28} {row['seconds']:>8.3f} {row['requests']:>9}"
+                f" {row['bytes'] / 1024:>11.1f} {row['peak_mb']:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# ----------------------------- ✦ СРР: общие модули для скриптов анализа ✦ -----------------------------
@@ -0,0 +1,147 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+from array import array
+
+import numpy as np
+
+
+# ----------------------------- ✦ ADDRESS INDEX ✦ -----------------------------
+class AddressIndex:
+    # Словарь адресов и индекс «адрес -> транзакции».
+    # Каждый адрес получает целый id при первой встрече; транзакции нумеруются
+    # по порядку добавления. Для адреса хранится возрастающий список номеров
+    # транзакций (array('I')), для транзакции - id её адресов (CSR: плоский
+    # массив + смещения). Счётчики ведутся при добавлении, поэтому число
+    # транзакций адреса - O(1), а топ-N и совместные появления считаются на NumPy.
+
+    def __init__(self):
+        self.ids = {}  # адрес -> id
+        self.names = []  # id -> адрес
+        self.postings = []  # id -> номера транзакций
+        self.tx_counts = array("I")  # id -> в скольких транзакциях участвует
+        self.receiving = array("I")  # id -> в скольких транзакциях получает (выходы)
+        self.tx_addr_ids = array("I")
+        self.tx_offsets = array("Q", [0])
+        self.txids = []
+        self.top_cache = {}  # (n, receiving) -> ответ top(); сбрасывается при add_tx
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def tx_total(self):
+        return len(self.tx_offsets) - 1
+
+    def intern(self, addr):
+        addr_id = self.ids.get(addr)
+        if addr_id is None:
+            addr_id = self.ids[addr] = len(self.names)
+            self.names.append(addr)
+            self.postings.append(array("I"))
+            self.tx_counts.append(0)
+            self.receiving.append(0)
+        return addr_id
+
+    # ----------------------------- ✦ FEED ✦ -----------------------------
+    def add_tx(self, outputs, inputs=(), txid=None):
+        # outputs/inputs - адреса выходов и prev_out входов (повторы допускаются)
+        ordinal = self.tx_total
+        self.top_cache.clear()
+        seen = set()
+        for addr in outputs:
+            addr_id = self.intern(addr)
+            if addr_id not in seen:
+                seen.add(addr_id)
+                self.receiving[addr_id] += 1
+                self._post(addr_id, ordinal)
+        for addr in inputs:
+            addr_id = self.intern(addr)
+            if addr_id not in seen:
+                seen.add(addr_id)
+                self._post(addr_id, ordinal)
+        self.tx_offsets.append(len(self.tx_addr_ids))
+        self.txids.append(txid)
+        return ordinal
+
+    def _post(self, addr_id, ordinal):
+        self.postings[addr_id].append(ordinal)
+        self.tx_counts[addr_id] += 1
+        self.tx_addr_ids.append(addr_id)
+
+    def merge(self, other):
+        # Дописывает транзакции other после своих - результат тот же, что при
+        # add_tx всех транзакций подряд: новые адреса получают id в порядке
+        # первого появления, номера транзакций other сдвигаются на tx_total
+        base, flat_base = self.tx_total, len(self.tx_addr_ids)
+        self.top_cache.clear()
+        remap = np.fromiter((self.intern(addr) for addr in other.names), dtype=np.uint32, count=len(other.names))
+        for other_id, self_id in enumerate(remap.tolist()):
+            postings = np.frombuffer(other.postings[other_id], dtype=np.uint32) + np.uint32(base)
+            self.postings[self_id].frombytes(postings.tobytes())
+            self.tx_counts[self_id] += other.tx_counts[other_id]
+            self.receiving[self_id] += other.receiving[other_id]
+        ids = remap[np.frombuffer(other.tx_addr_ids, dtype=np.uint32)]
+        self.tx_addr_ids.frombytes(ids.tobytes())
+        offsets = np.frombuffer(other.tx_offsets, dtype=np.uint64)[1:] + np.uint64(flat_base)
+        self.tx_offsets.frombytes(offsets.tobytes())
+        self.txids.extend(other.txids)
+
+    # ----------------------------- ✦ QUERIES ✦ -----------------------------
+    def tx_count(self, addr):
+        addr_id = self.ids.get(addr)
+        return self.tx_counts[addr_id] if addr_id is not None else 0
+
+    def receiving_count(self, addr):
+        addr_id = self.ids.get(addr)
+        return self.receiving[addr_id] if addr_id is not None else 0
+
+    def transactions(self, addr):
+        addr_id = self.ids.get(addr)
+        return [self.txids[i] for i in self.postings[addr_id]] if addr_id is not None else []
+
+    def co_occurrence(self, a, b):
+        # Число транзакций, где встречаются оба адреса
+        id_a, id_b = self.ids.get(a), self.ids.get(b)
+        if id_a is None or id_b is None:
+            return 0
+        small, large = sorted((self.postings[id_a], self.postings[id_b]), key=len)
+        small = np.frombuffer(small, dtype=np.uint32)
+        large = np.frombuffer(large, dtype=np.uint32)
+        # Списки уже отсортированы: бинарный поиск меньшего в большем
+        pos = np.minimum(np.searchsorted(large, small), len(large) - 1)
+        return int(np.count_nonzero(large[pos] == small))
+
+    def top(self, n=10, receiving=False):
+        # [(адрес, число транзакций)] по убыванию; при равенстве - встреченный раньше
+        key = (n, receiving)
+        if key not in self.top_cache:
+            counts = np.frombuffer(self.receiving if receiving else self.tx_counts, dtype=np.uint32)
+            self.top_cache[key] = self._top_ids(counts, n)
+        return self.top_cache[key]
+
+    def cooccurring(self, addr, n=10):
+        # Адреса, чаще всего встречающиеся в одних транзакциях с addr
+        addr_id = self.ids.get(addr)
+        if addr_id is None:
+            return []
+        ordinals = np.frombuffer(self.postings[addr_id], dtype=np.uint32).astype(np.int64)
+        offsets = np.frombuffer(self.tx_offsets, dtype=np.uint64).astype(np.int64)
+        starts, lengths = offsets[ordinals], offsets[ordinals + 1] - offsets[ordinals]
+        # Индексы всех адресов этих транзакций в плоском массиве одним вектором
+        base = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        flat = base + np.arange(int(lengths.sum()))
+        ids = np.frombuffer(self.tx_addr_ids, dtype=np.uint32)[flat]
+        counts = np.bincount(ids, minlength=len(self.names))
+        counts[addr_id] = 0
+        return self._top_ids(counts, n)
+
+    def _top_ids(self, counts, n):
+        n = min(n, int(np.count_nonzero(counts)))
+        if n <= 0:
+            return []
+        counts = counts.astype(np.int64)
+        # Все кандидаты не меньше n-го значения, чтобы равенства на границе
+        # решались порядком появления, а не порядком argpartition
+        threshold = np.partition(counts, len(counts) - n)[len(counts) - n]
+        top = np.flatnonzero(counts >= threshold)
+        top = top[np.lexsort((top, -counts[top]))][:n]
+        return [(self.names[i], int(counts[i])) for i in top.tolist()]
@@ -0,0 +1,100 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import argparse
+import csv
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from srr.source import open_source
+from srr.stats import DAY_QUESTIONS, analyze_day, day_answers, day_to_ms
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+FIELDS = ["date", "blocks"] + list(DAY_QUESTIONS) + ["error"]
+
+
+# ----------------------------- ✦ HELPERS ✦ -----------------------------
+def date_range(start, end):
+    day = date.fromisoformat(start)
+    last = date.fromisoformat(end)
+    while day <= last:
+        yield day.isoformat()
+        day += timedelta(days=1)
+
+
+def analyze_date(source, day, limit=10):
+    try:
+        stats = analyze_day(source, day_to_ms(day), limit=limit)
+        if not stats.blocks:
+            return {"date": day, "blocks": 0, "error": "БЛОКОВ С ТАКОЙ ДАТОЙ - НЕТ"}
+        return {"date": day, "blocks": len(stats.blocks), **day_answers(stats)}
+    except Exception as e:
+        return {"date": day, "error": f"{type(e).__name__}: {e}"}
+
+
+class RowWriter:
+    # Пишет строку сразу по готовности и сбрасывает буфер: частичные результаты не теряются
+
+    def __init__(self, out, fmt):
+        self.out = out
+        self.fmt = fmt
+        if fmt == "csv":
+            self.csv = csv.DictWriter(out, fieldnames=FIELDS, extrasaction="ignore")
+            self.csv.writeheader()
+
+    def write(self, row):
+        if self.fmt == "csv":
+            self.csv.writerow(row)
+        else:
+            self.out.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self.out.flush()
+
+
+def run(dates, source, workers=4, limit=10, writer=None):
+    # Даты обрабатываются параллельно одним общим источником (пул соединений, лимит, кэш);
+    # строки пишутся по порядку дат - каждая, как только готовы она и все более ранние
+    rows = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(analyze_date, source, day, limit) for day in sorted(dates)]
+        for future in futures:
+            row = future.result()
+            rows.append(row)
+            if writer:
+                writer.write(row)
+    return rows
+
+
+# ----------------------------- ✦ MASTER FN ✦ -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m srr.batch", description="СРР-3 для диапазона или списка дат"
+    )
+    parser.add_argument("dates", nargs="*", help="даты YYYY-MM-DD")
+    parser.add_argument("--from", dest="start", help="начало диапазона YYYY-MM-DD")
+    parser.add_argument("--to", dest="end", help="конец диапазона YYYY-MM-DD (включительно)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=5.0, help="запросов в секунду")
+    parser.add_argument("--limit", type=int, default=10, help="сколько первых блоков дня брать")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default="csv")
+    parser.add_argument("--out", help="файл результата (по умолчанию stdout)")
+    parser.add_argument("--source", "--base-url", dest="source", default=None,
+                        help="источник данных (по умолчанию SRR_SOURCE или blockchain.info)")
+    args = parser.parse_args(argv)
+
+    dates = list(args.dates)
+    if args.start:
+        dates.extend(date_range(args.start, args.end or args.start))
+    if not dates:
+        parser.error("нужны даты или --from/--to")
+
+    out = open(args.out, "w", newline="", encoding="utf-8") if args.out else sys.stdout
+    try:
+        with open_source(args.source, workers=args.workers, rate=args.rate) as source:
+            run(dates, source, workers=args.workers, limit=args.limit, writer=RowWriter(out, args.format))
+    finally:
+        if args.out:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
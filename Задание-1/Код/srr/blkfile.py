@@ -0,0 +1,497 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import shutil
+from collections import OrderedDict
+
+import numpy as np
+
+from srr.source import DataSource, to_seconds
+from srr.spent import MASK64, HashTable, SpentIndex, txid_prefix
+from srr.wire import dsha256, parse_block
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+DEFAULT_INDEX_DIR = os.environ.get(
+    "SRR_BLK_INDEX_DIR", os.path.join(os.path.expanduser("~"), ".cache", "srr", "blkindex")
+)
+MAGICS = {
+    bytes.fromhex("f9beb4d9"),  # mainnet
+    bytes.fromhex("0b110907"),  # testnet3
+    bytes.fromhex("1c163f28"),  # testnet4
+    bytes.fromhex("0a03cf40"),  # signet
+    bytes.fromhex("fabfb5da"),  # regtest
+}
+BLK_FILE = re.compile(r"^blk(\d{5})\.dat$")
+# V32, а не S32: numpy обрезает у S-строк нулевые байты в конце
+ENTRY = np.dtype(
+    [
+        ("hash", "V32"),
+        ("prev", "V32"),
+        ("file", "<u4"),
+        ("offset", "<u8"),
+        ("size", "<u4"),
+        ("time", "<u4"),
+    ]
+)
+PARSED_BLOCKS = 64  # разобранных блоков в памяти (для get_transaction и prev_out)
+COLLIDED = MASK64  # высота в индексе txid: префикс у транзакций разных блоков, см. collisions
+
+
+# ----------------------------- ✦ HELPERS ✦ -----------------------------
+def blk_files(blocks_dir):
+    # [(номер, путь)] файлов blk?????.dat по возрастанию номера
+    found = []
+    for name in os.listdir(blocks_dir):
+        match = BLK_FILE.match(name)
+        if match:
+            found.append((int(match.group(1)), os.path.join(blocks_dir, name)))
+    return sorted(found)
+
+
+def read_xor_key(blocks_dir):
+    # Bitcoin Core 28+ может обфусцировать blk-файлы ключом из blocks/xor.dat
+    try:
+        with open(os.path.join(blocks_dir, "xor.dat"), "rb") as f:
+            key = f.read()
+    except FileNotFoundError:
+        return None
+    return key if key.strip(b"\x00") else None
+
+
+def unxor(data, key, offset):
+    # Байт файла на позиции i хранится как byte ^ key[i % len(key)]
+    if key is None:
+        return data
+    buf = np.frombuffer(data, dtype=np.uint8)
+    shift = offset % len(key)
+    pad = np.frombuffer((key[shift:] + key[:shift]) * (len(buf) // len(key) + 1), dtype=np.uint8)
+    return (buf ^ pad[: len(buf)]).tobytes()
+
+
+def scan_file(path, start=0, key=None):
+    # Записи blk-файла: magic(4) + размер(4) + блок. Возвращает
+    # ([(смещение блока, размер, заголовок)], конец последней целой записи).
+    # Останавливается на нулевом хвосте (файлы выделяются заранее) и на
+    # недописанной записи - с этого места продолжит следующий вызов.
+    records = []
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size <= start:
+            return records, start
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            pos, end = start, len(view)
+            while pos + 88 <= end:
+                prefix = unxor(view[pos:pos + 8], key, pos)
+                size = int.from_bytes(prefix[4:8], "little")
+                if prefix[:4] not in MAGICS or pos + 8 + size > end:
+                    break
+                records.append((pos + 8, size, unxor(view[pos + 8:pos + 88], key, pos + 8)))
+                pos += 8 + size
+    return records, pos
+
+
+def write_blk_file(path, raw_blocks, magic=bytes.fromhex("fabfb5da")):
+    # Маленькие blk-файлы для проверок и бенчмарков (по умолчанию magic regtest)
+    with open(path, "wb") as f:
+        for raw in raw_blocks:
+            f.write(magic + len(raw).to_bytes(4, "little") + raw)
+
+
+# ----------------------------- ✦ INDEX ✦ -----------------------------
+class BlkIndex:
+    # Индекс заголовков blk-файлов: хэш, родитель, файл, смещение, размер, время.
+    # Хранится в index_dir (entries.npy + state.json) и дополняется только новыми
+    # записями. Блоки лежат в файлах в порядке получения узлом, а не по высоте:
+    # высоты восстанавливаются по ссылкам на родителя, основная цепочка - самая длинная.
+
+    def __init__(self, blocks_dir, index_dir=None):
+        self.blocks_dir = blocks_dir
+        tag = hashlib.sha256(os.path.abspath(blocks_dir).encode()).hexdigest()[:16]
+        self.index_dir = index_dir or os.path.join(DEFAULT_INDEX_DIR, tag)
+        os.makedirs(self.index_dir, exist_ok=True)
+        self.key = read_xor_key(blocks_dir)
+        try:
+            with open(os.path.join(self.index_dir, "state.json")) as f:
+                self.scanned = {int(k): v for k, v in json.load(f)["scanned"].items()}
+            self.entries = np.load(os.path.join(self.index_dir, "entries.npy"))
+        except FileNotFoundError:
+            self.scanned = {}
+            self.entries = np.zeros(0, dtype=ENTRY)
+        self._link()
+
+    def update(self):
+        # Дочитывает новые записи из blk-файлов; возвращает число новых блоков
+        rows = []
+        for number, path in blk_files(self.blocks_dir):
+            records, self.scanned[number] = scan_file(path, self.scanned.get(number, 0), self.key)
+            for offset, size, header in records:
+                time = int.from_bytes(header[68:72], "little")
+                rows.append((dsha256(header)[::-1], bytes(header[4:36])[::-1], number, offset, size, time))
+        if rows:
+            self.entries = np.concatenate([self.entries, np.array(rows, dtype=ENTRY)])
+            np.save(os.path.join(self.index_dir, "entries.npy"), self.entries)
+            self._link()
+        with open(os.path.join(self.index_dir, "state.json"), "w") as f:
+            json.dump({"blocks_dir": os.path.abspath(self.blocks_dir), "scanned": self.scanned}, f)
+        return len(rows)
+
+    def _link(self):
+        hashes = self.entries["hash"].tolist()
+        self.by_hash = {h: i for i, h in enumerate(hashes)}
+        parent = [self.by_hash.get(p, -1) for p in self.entries["prev"].tolist()]
+        depth = [-1] * len(hashes)
+        for i in range(len(hashes)):
+            chain, j = [], i
+            while j >= 0 and depth[j] < 0:
+                chain.append(j)
+                j = parent[j]
+            base = depth[j] if j >= 0 else -1
+            for k in reversed(chain):
+                base += 1
+                depth[k] = base
+        # Вершина - самая длинная цепочка; при равной длине - записанная раньше
+        self.main_chain = []
+        if depth:
+            j = max(range(len(depth)), key=lambda i: (depth[i], -i))
+            self.main_chain = [0] * (depth[j] + 1)
+            while j >= 0:
+                self.main_chain[depth[j]] = j
+                j = parent[j]
+        self.height_of = {i: h for h, i in enumerate(self.main_chain)}
+        self.times = self.entries["time"][self.main_chain] if self.main_chain else np.zeros(0)
+
+    def __len__(self):
+        return len(self.main_chain)
+
+    def entry(self, height):
+        return self.entries[self.main_chain[height]]
+
+    def height(self, block_hash):
+        return self.height_of.get(self.by_hash.get(bytes.fromhex(block_hash)))
+
+    def block_hash(self, height):
+        return bytes(self.entry(height)["hash"]).hex()
+
+    def is_main(self, block_hash, height):
+        # Лежит ли block_hash на высоте height основной цепочки; None или height < 0 -
+        # проверять нечего (состояние сохранено до появления хэша или пустое)
+        if block_hash is None or height < 0:
+            return True
+        return height < len(self) and self.block_hash(height) == block_hash
+
+    def heights_between(self, start_ts, end_ts):
+        # Высоты основной цепочки со временем заголовка в [start_ts, end_ts)
+        return np.flatnonzero((self.times >= start_ts) & (self.times < end_ts)).tolist()
+
+
+# ----------------------------- ✦ SOURCE ✦ -----------------------------
+class BlkSource(DataSource):
+    # Блоки из blk*.dat без сети, в формате ответов blockchain.info, который
+    # ожидают скрипты: get_block_by_height / get_block_by_hash / get_transaction.
+    # Входы описываются как {"txid", "vout"}. С resolve_prevouts=True к ним
+    # добавляется prev_out (value, addr) по индексу транзакций; с spent=SpentIndex
+    # у выходов появляется флаг spent.
+
+    def __init__(self, blocks_dir, index_dir=None, resolve_prevouts=False, spent=None):
+        self.index = BlkIndex(blocks_dir, index_dir)
+        self.name = "blk:" + os.path.abspath(blocks_dir)
+        self.index.update()
+        self.resolve_prevouts = resolve_prevouts
+        self.spent = spent
+        self.maps = {}
+        self.parsed = OrderedDict()
+        self.txids = None
+        self.txids_height = -1
+        self.txids_hash = None  # блок на txids_height при построении индекса txid
+        self.spent_dir = None  # индекс трат строит сам источник (fetch_coinbases)
+        self.collisions = {}  # полный txid -> высота для префиксов, общих у разных блоков
+
+    # ----------------------------- ✦ RAW ✦ -----------------------------
+    def _map(self, number, end=0):
+        # Узел дописывает блоки в открытый им blk-файл: отображение короче end
+        # открывается заново (старое закроется, когда на него не останется ссылок)
+        view = self.maps.get(number)
+        if view is None or len(view) < end:
+            path = os.path.join(self.index.blocks_dir, f"blk{number:05d}.dat")
+            with open(path, "rb") as f:
+                view = self.maps[number] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return view
+
+    def raw_block(self, height):
+        entry = self.index.entry(height)
+        offset, size = int(entry["offset"]), int(entry["size"])
+        view = memoryview(self._map(int(entry["file"]), offset + size))[offset:offset + size]
+        return unxor(view, self.index.key, offset) if self.index.key else view
+
+    def block_model(self, height):
+        block = self.parsed.get(height)
+        if block is None:
+            block = parse_block(self.raw_block(height))
+            block.height = height
+            self.parsed[height] = block
+            if len(self.parsed) > PARSED_BLOCKS:
+                self.parsed.popitem(last=False)
+        else:
+            self.parsed.move_to_end(height)
+        return block
+
+    # ----------------------------- ✦ TX INDEX ✦ -----------------------------
+    def index_transactions(self, end=None):
+        # Префикс txid -> высота; дополняется до end, состояние хранится рядом с индексом.
+        # Совпавший префикс в пределах блока находит перебор блока в find_tx; если же
+        # префикс уже занят другой высотой, обе транзакции уходят в collisions
+        # полными txid, а в таблице остаётся метка COLLIDED.
+        # Если основная цепочка сменилась ниже txids_height (победил более длинный форк),
+        # высоты в таблице устарели, а удалять из неё нельзя - индекс строится заново
+        if self.txids is not None and not self.index.is_main(self.txids_hash, self.txids_height):
+            self._drop_txids()
+        if self.txids is None:
+            self._load_txids()
+            if not self.index.is_main(self.txids_hash, self.txids_height):
+                self._drop_txids()
+                self._load_txids()
+        end = len(self.index) - 1 if end is None else end
+        if end <= self.txids_height:
+            return
+        for height in range(self.txids_height + 1, end + 1):
+            for tx in self.block_model(height).txs:
+                self._index_tx(tx.hash, height)
+        self.txids_height = end
+        self.txids_hash = self.index.block_hash(end)
+        self.txids.flush()
+        with open(os.path.join(self.index.index_dir, "txids.collisions.json"), "w") as f:
+            json.dump(self.collisions, f)
+        with open(os.path.join(self.index.index_dir, "txids.state.json"), "w") as f:
+            json.dump({"height": end, "hash": self.txids_hash}, f)
+
+    def _load_txids(self):
+        self.txids = HashTable(os.path.join(self.index.index_dir, "txids"))
+        try:
+            with open(os.path.join(self.index.index_dir, "txids.state.json")) as f:
+                state = json.load(f)
+            self.txids_height, self.txids_hash = state["height"], state.get("hash")
+        except FileNotFoundError:
+            self.txids_height, self.txids_hash = -1, None
+        try:
+            with open(os.path.join(self.index.index_dir, "txids.collisions.json")) as f:
+                self.collisions = json.load(f)
+        except FileNotFoundError:
+            self.collisions = {}
+
+    def _drop_txids(self):
+        self.txids = None
+        for name in os.listdir(self.index.index_dir):
+            if name.startswith("txids."):
+                os.remove(os.path.join(self.index.index_dir, name))
+
+    def _index_tx(self, txid, height):
+        prefix = txid_prefix(txid)
+        known = self.txids.get(prefix)
+        if known is None or known == height:
+            self.txids.put(prefix, height)
+            return
+        if known != COLLIDED:
+            for tx in self.block_model(known).txs:
+                if txid_prefix(tx.hash) == prefix:
+                    self.collisions[tx.hash] = known
+            self.txids.put(prefix, COLLIDED)
+        self.collisions[txid] = height
+
+    def find_tx(self, txid):
+        self.index_transactions()
+        height = self.txids.get(txid_prefix(txid))
+        if height == COLLIDED:
+            height = self.collisions.get(txid)
+        if height is not None:
+            raw = bytes.fromhex(txid)
+            for tx in self.block_model(height).txs:
+                if tx.txid == raw:
+                    return tx, height
+        return None, None
+
+    # ----------------------------- ✦ JSON ✦ -----------------------------
+    def tx_json(self, tx, height):
+        inputs = [{"coinbase": "", "sequence": 4294967295}] if tx.coinbase else []
+        for prev_txid, vout in tx.prevouts or ():
+            inp = {"txid": prev_txid.hex(), "vout": vout}
+            if self.resolve_prevouts:
+                prev_tx, _ = self.find_tx(prev_txid.hex())
+                if prev_tx is not None and vout < len(prev_tx.output_values):
+                    inp["prev_out"] = {"n": vout, "value": prev_tx.output_values[vout]}
+                    if prev_tx.output_addrs[vout] is not None:
+                        inp["prev_out"]["addr"] = prev_tx.output_addrs[vout]
+            inputs.append(inp)
+        outs = []
+        for n, value in enumerate(tx.output_values):
+            out = {"n": n, "value": value}
+            if tx.output_addrs[n] is not None:
+                out["addr"] = tx.output_addrs[n]
+            if self.spent is not None:
+                out["spent"] = self.spent.spender(tx.hash, n) is not None
+            outs.append(out)
+        return {
+            "hash": tx.hash,
+            "size": tx.size,
+            "weight": tx.weight,
+            "block_height": height,
+            "inputs": inputs,
+            "out": outs,
+        }
+
+    def block_json(self, height):
+        block = self.block_model(height)
+        return {
+            "hash": block.hash.hex(),
+            "prev_block": block.prev_block.hex(),
+            "time": block.time,
+            "size": block.size,
+            "n_tx": len(block.txs),
+            "height": height,
+            "main_chain": True,
+            "tx": [self.tx_json(tx, height) for tx in block.txs],
+        }
+
+    # ----------------------------- ✦ INTERFACE ✦ -----------------------------
+    def get_block_by_height(self, height):
+        return self.block_json(height) if 0 <= height < len(self.index) else None
+
+    def get_block_by_hash(self, block_hash):
+        height = self.index.height(block_hash)
+        return self.block_json(height) if height is not None else None
+
+    def get_transaction(self, txid):
+        tx, height = self.find_tx(txid)
+        return self.tx_json(tx, height) if tx is not None else None
+
+    def get_block_summaries(self, block_hashes):
+        # Размер - из индекса заголовков, число транзакций - по разобранному блоку;
+        # комиссии без prev_out входов неизвестны (fee = None)
+        summaries = []
+        for block_hash in block_hashes:
+            height = self.index.height(block_hash)
+            if height is None:
+                summaries.append(None)
+                continue
+            block = self.block_model(height)
+            summaries.append({
+                "hash": block_hash,
+                "height": height,
+                "time": block.time,
+                "size": block.size,
+                "n_tx": len(block.txs),
+                "fee": block.fee,
+            })
+        return summaries
+
+    def get_blocks_by_time(self, timestamp):
+        # Аналог /blocks/{мс}: блоки основной цепочки за сутки с начала timestamp
+        start = to_seconds(timestamp)
+        return [
+            {"hash": self.index.block_hash(h), "height": h, "time": int(self.index.times[h])}
+            for h in self.index.heights_between(start, start + 86400)
+        ]
+
+    def get_latest_block(self):
+        # Узел мог дописать blk-файлы: индекс дочитывается, разобранные блоки
+        # по высотам сбрасываются (основная цепочка могла смениться)
+        if self.index.update():
+            self.parsed.clear()
+        height = len(self.index) - 1
+        return {"hash": self.index.block_hash(height), "height": height} if height >= 0 else None
+
+    def fetch_coinbases(self, heights):
+        # Флаги spent - по индексу трат, который строится по всей цепочке при первом
+        # вызове и дополняется, когда get_latest_block дочитал новые блоки
+        if self.spent is None or (self.spent_dir and self.spent.last_height < len(self.index) - 1):
+            self.spent_dir = os.path.join(self.index.index_dir, "spent")
+            self.spent = update_spent_index(self, self.spent_dir)
+        for height in heights:
+            if not 0 <= height < len(self.index):
+                yield height, []
+                continue
+            coinbase = self.block_model(height).txs[0]
+            yield height, [(self.index.block_hash(height), coinbase.hash, self.tx_json(coinbase, height))]
+
+    def close(self):
+        for view in self.maps.values():
+            view.close()
+        self.maps.clear()
+
+
+def update_spent_index(source, spent_dir):
+    # Индекс потраченных выходов по всей цепочке из blk-файлов (продолжается с прошлого раза).
+    # Если блок его последней высоты ушёл из основной цепочки (победил более длинный
+    # форк), траты ушедших блоков из таблиц не удалить - индекс строится заново
+    index = SpentIndex(spent_dir)
+    record = index.coinbases.get(index.last_height) if index.last_height >= 0 else None
+    if record is not None and not source.index.is_main(record[0], index.last_height):
+        index.coinbases.close()
+        shutil.rmtree(spent_dir)
+        index = SpentIndex(spent_dir)
+    for height in range(index.last_height + 1, len(source.index)):
+        block = source.block_model(height)
+        index.ingest_block(
+            {"hash": source.index.block_hash(height), "tx": [_spending_view(tx) for tx in block.txs]}, height
+        )
+    index.flush()
+    return index
+
+
+def spent_coinbases(source, start, end, spent_dir):
+    # СРР-1 по локальным блокам: индекс трат, затем проверка coinbase
+    index = update_spent_index(source, spent_dir)
+    found, missing = index.spent_coinbases(start, end)
+    # Высоты, проиндексированные до журнала coinbase, - по самим блокам
+    for height in missing:
+        coinbase = source.block_model(height).txs[0]
+        if index.is_spent(coinbase.hash, len(coinbase.output_values)):
+            found.append((height, source.index.block_hash(height), coinbase.hash))
+    return sorted(found)
+
+
+def _spending_view(tx):
+    # Минимальный вид транзакции для SpentIndex.ingest_block (формат bitcoind)
+    return {
+        "txid": tx.hash,
+        "vin": [{"txid": t.hex(), "vout": n} for t, n in tx.prevouts or ()],
+        "vout_sz": len(tx.output_values),
+    }
+
+
+# ----------------------------- ✦ CLI ✦ -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m srr.blkfile", description="Блоки из blk*.dat узла Bitcoin Core"
+    )
+    parser.add_argument("blocks_dir", help="каталог blocks/ узла")
+    parser.add_argument("--index-dir", default=None)
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("index", help="построить/дополнить индекс высот")
+    block_cmd = commands.add_parser("block", help="блок по высоте в JSON")
+    block_cmd.add_argument("height", type=int)
+    coinbases = commands.add_parser("spent-coinbases", help="СРР-1 по локальным блокам")
+    coinbases.add_argument("start", type=int)
+    coinbases.add_argument("end", type=int)
+    args = parser.parse_args(argv)
+
+    source = BlkSource(args.blocks_dir, args.index_dir)
+    if args.command == "index":
+        print(f"Блоков в основной цепочке: {len(source.index)}, записей в индексе: {len(source.index.entries)}")
+    elif args.command == "block":
+        print(json.dumps(source.get_block_by_height(args.height), indent=1))
+    else:
+        spent_dir = os.path.join(source.index.index_dir, "spent")
+        spent = spent_coinbases(source, args.start, args.end, spent_dir)
+        for height, block_hash, txid in spent:
+            print(f"\nБлок: {height}")
+            print(f"Хэш:  {block_hash}")
+            print(f"ID транзакции:  {txid}")
+        print(f"\nОбщее кол-во потраченных коинбэйс-транзакций: {len(spent)}")
+    source.close()
+
+
+if __name__ == "__main__":
+    main()
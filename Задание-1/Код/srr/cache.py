@@ -0,0 +1,318 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import io
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+from srr.metrics import METRICS
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+DEFAULT_PATH = os.environ.get(
+    "SRR_CACHE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "srr", "blockchain.sqlite3"),
+)
+DEFAULT_MAX_BYTES = int(os.environ.get("SRR_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+# Предел LRU разобранных ответов в памяти - по длине их JSON
+DEFAULT_MEMORY_BYTES = int(os.environ.get("SRR_MEMORY_CACHE_BYTES", 64 * 1024 * 1024))
+
+RECENT_DAY_TTL = 10 * 60  # список блоков за последние сутки ещё дополняется
+LATEST_TTL = 30
+UNSPENT_TX_TTL = 60 * 60  # флаг spent у выходов может поменяться
+RECENT_BLOCK_TTL = 10 * 60  # блок у вершины ещё может уйти в reorg
+RECENT_BLOCK_AGE = 24 * 60 * 60
+
+BLOCKS_BY_DAY = re.compile(r"^/blocks/(\d+)")
+
+
+# ----------------------------- ✦ HELPERS ✦ -----------------------------
+def cache_key(url):
+    # Схема и хост входят в ключ: ответы фейкового сервера, записи и других
+    # base_url не выдаются потом за ответы blockchain.info
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc.lower()}{parts.path}" + (f"?{parts.query}" if parts.query else "")
+
+
+def cache_path(origin, default_origin):
+    # Файл кэша по умолчанию для хоста origin: основной - для default_origin,
+    # для прочих (фейковый сервер, зеркала) - отдельный рядом с ним
+    parts = urlsplit(origin)
+    if f"{parts.scheme}://{parts.netloc.lower()}" == default_origin:
+        return DEFAULT_PATH
+    root, ext = os.path.splitext(DEFAULT_PATH)
+    host = re.sub(r"[^\w.-]", "_", parts.netloc.lower())
+    return f"{root}-{host}{ext}"
+
+
+def ttl_for(key, data):
+    # None - ответ неизменяемый и живёт в кэше до вытеснения по размеру
+    key = urlsplit(key).path
+    match = BLOCKS_BY_DAY.match(key)
+    if match:
+        ts = int(match.group(1))
+        if ts > 10**11:  # миллисекунды
+            ts //= 1000
+        return RECENT_DAY_TTL if time.time() - ts < 2 * 24 * 60 * 60 else None
+
+    if key.startswith("/latestblock"):
+        return LATEST_TTL
+
+    if key.startswith("/block-height/") and isinstance(data, dict):
+        newest = max((block.get("time", 0) for block in data.get("blocks", [])), default=0)
+        if time.time() - newest < RECENT_BLOCK_AGE:
+            return RECENT_BLOCK_TTL
+
+    if key.startswith("/rawtx/") and isinstance(data, dict):
+        if any(not out.get("spent") for out in data.get("out", [])):
+            return UNSPENT_TX_TTL
+
+    return None
+
+
+# ----------------------------- ✦ CACHE ✦ -----------------------------
+class ResponseCache:
+    # Постоянный кэш JSON-ответов в SQLite (zlib), с TTL для изменяемых
+    # эндпоинтов и LRU-вытеснением при превышении max_bytes.
+
+    def __init__(self, path=DEFAULT_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " body BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " expires REAL,"
+            " accessed REAL NOT NULL)"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed)")
+        self.total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    def _lookup(self, key):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT body, expires FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            now = time.time()
+            if row is None or (row[1] is not None and row[1] < now):
+                self.misses += 1
+                METRICS.count("cache_lookups", result="miss")
+                return None
+            self.db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        METRICS.count("cache_lookups", result="hit")
+        return row[0]
+
+    def get(self, key):
+        found = self.get_sized(key)
+        return None if found is None else found[0]
+
+    def get_sized(self, key):
+        # (данные, длина JSON) или None - длина нужна MemoryCache
+        body = self._lookup(key)
+        if body is None:
+            return None
+        with METRICS.stage("decode.cache"):
+            raw = zlib.decompress(body)
+            return json.loads(raw), len(raw)
+
+    def open(self, key):
+        # Потоковое чтение сырого JSON без json.loads; None - промах
+        body = self._lookup(key)
+        return None if body is None else io.BufferedReader(_InflateReader(body))
+
+    def put(self, key, data, ttl=None):
+        body = zlib.compress(json.dumps(data, separators=(",", ":")).encode(), 6)
+        self.put_compressed(key, body, ttl)
+
+    def put_compressed(self, key, body, ttl=None):
+        now = time.time()
+        expires = now + ttl if ttl is not None else None
+        with self.lock:
+            old = self.db.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self.db.execute(
+                "INSERT OR REPLACE INTO responses (key, body, size, expires, accessed)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, body, len(body), expires, now),
+            )
+            self.total += len(body) - (old[0] if old else 0)
+            if self.total > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Сначала просроченные, затем самые давно читавшиеся записи
+        self.db.execute("DELETE FROM responses WHERE expires IS NOT NULL AND expires < ?", (time.time(),))
+        self.total = self.db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        rows = self.db.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall()
+        doomed = []
+        for key, size in rows:
+            if self.total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            self.total -= size
+        self.db.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+# ----------------------------- ✦ MEMORY ✦ -----------------------------
+class MemoryCache:
+    # LRU уже разобранных ответов в памяти процесса, общий для всех клиентов:
+    # повторный get_json того же пути не читает SQLite и не вызывает json.loads.
+    # Размер записи - длина её JSON (для одинаковых ответов пропорционален
+    # памяти объекта); при превышении max_bytes вытесняются давно читавшиеся,
+    # ответ больше max_bytes не хранится. TTL - как у дискового кэша.
+    # Объекты отдаются всем вызывающим общими - менять их нельзя.
+
+    def __init__(self, max_bytes=DEFAULT_MEMORY_BYTES):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # ключ -> (данные, размер, истекает)
+        self.total = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[2] is not None and entry[2] < time.time():
+                del self.entries[key]
+                self.total -= entry[1]
+                entry = None
+            if entry is None:
+                self.misses += 1
+            else:
+                self.entries.move_to_end(key)
+                self.hits += 1
+        METRICS.count("memory_cache_lookups", result="miss" if entry is None else "hit")
+        return None if entry is None else entry[0]
+
+    def put(self, key, data, size, ttl=None):
+        if size > self.max_bytes:
+            return
+        evicted = 0
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.total -= old[1]
+            self.entries[key] = (data, size, time.time() + ttl if ttl is not None else None)
+            self.total += size
+            while self.total > self.max_bytes:
+                _, (_, old_size, _) = self.entries.popitem(last=False)
+                self.total -= old_size
+                evicted += 1
+            self.evictions += evicted
+        if evicted:
+            METRICS.count("memory_cache_evictions", evicted)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.total,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total = 0
+
+
+class _InflateReader(io.RawIOBase):
+    # Распаковывает zlib-тело записи кусками по мере чтения
+
+    def __init__(self, body, chunk=64 * 1024):
+        self.body = memoryview(body)
+        self.pos = 0
+        self.chunk = chunk
+        self.inflate = zlib.decompressobj()
+        self.pending = memoryview(b"")
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self.pending and self.pos < len(self.body):
+            piece = self.body[self.pos : self.pos + self.chunk]
+            self.pos += len(piece)
+            self.pending = memoryview(self.inflate.decompress(piece))
+        if not self.pending:
+            self.pending = memoryview(self.inflate.flush())
+        n = min(len(buffer), len(self.pending))
+        buffer[:n] = self.pending[:n]
+        self.pending = self.pending[n:]
+        return n
+
+
+class CacheWriter:
+    # Прозрачно пропускает поток ответа и одновременно сжимает его в кэш.
+    # Запись сохраняется только если поток дочитан до конца.
+
+    def __init__(self, cache, key, stream, ttl=None):
+        self.cache = cache
+        self.key = key
+        self.stream = stream
+        self.ttl = ttl
+        self.deflate = zlib.compressobj(6)
+        self.parts = []
+        self.done = False
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        if data:
+            self.parts.append(self.deflate.compress(data))
+        elif size != 0 and not self.done:  # read(0) - проба типа потока, а не EOF
+            self.done = True
+            self.parts.append(self.deflate.flush())
+            self.cache.put_compressed(self.key, b"".join(self.parts), self.ttl)
+            self.parts = []
+        return data
+
+    def close(self):
+        # Недочитанный ответ в кэш не попадает
+        self.parts = []
+        self.stream.close()
+
+
+_defaults = {}  # путь -> общий ResponseCache процесса
+_default_lock = threading.Lock()
+
+
+def get_cache(path=None):
+    path = path or DEFAULT_PATH
+    with _default_lock:
+        if path not in _defaults:
+            _defaults[path] = ResponseCache(path)
+        return _defaults[path]
+
+
+_memory = None
+
+
+def get_memory():
+    global _memory
+    with _default_lock:
+        if _memory is None:
+            _memory = MemoryCache()
+        return _memory
@@ -0,0 +1,372 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from srr.cache import CacheWriter, cache_key, cache_path, get_cache, get_memory, ttl_for
+from srr.metrics import METRICS
+
+try:
+    import brotli  # noqa: F401  (urllib3 распаковывает br только при наличии brotli)
+
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+BASE_URL = "https://blockchain.info"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+DEFAULT_TIMEOUT = (5, 30)  # (подключение, чтение), сек.
+
+log = logging.getLogger("srr.client")
+
+
+# ----------------------------- ✦ RATE LIMIT ✦ -----------------------------
+class TokenBucket:
+    # Ведро токенов: rate запросов в секунду, burst - запас на всплеск.
+    # На 429/5xx скорость режется вдвое, на успешных ответах плавно возвращается.
+
+    def __init__(self, rate=5.0, burst=5, min_rate=0.2):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                else:
+                    wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def backoff(self, retry_after=None):
+        with self.lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            pause = retry_after if retry_after is not None else 1 / self.rate
+            self.paused_until = max(self.paused_until, time.monotonic() + pause)
+            self.tokens = 0.0
+
+    def reward(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate * 1.1)
+
+
+# ----------------------------- ✦ STATS ✦ -----------------------------
+class _TimedHTTPConnection(HTTPConnection):
+    # Новое соединение: DNS + TCP (+ TLS ниже) - стадия http.connect
+    def connect(self):
+        with METRICS.stage("http.connect"):
+            super().connect()
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        with METRICS.stage("http.connect"):
+            super().connect()
+
+
+class _TimedHTTPPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+def endpoint_of(url):
+    # /rawblock/<hash> -> /rawblock, /block-height/<h> -> /block-height
+    path = urlsplit(url).path.strip("/")
+    return "/" + path.split("/", 1)[0]
+
+
+class RequestStats:
+    # Счётчики по эндпоинтам: запросы, повторы, ошибки, байты, суммарная задержка
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+
+    def record(self, url, status, latency, size, wire_size, retried=False):
+        name = endpoint_of(url)
+        with self.lock:
+            row = self.endpoints.setdefault(
+                name,
+                {"requests": 0, "retries": 0, "errors": 0, "bytes": 0, "wire_bytes": 0,
+                 "latency": 0.0, "max_latency": 0.0},
+            )
+            row["requests"] += 1
+            row["retries"] += retried
+            row["errors"] += status is None or status >= 400
+            row["bytes"] += size
+            row["wire_bytes"] += wire_size
+            row["latency"] += latency
+            row["max_latency"] = max(row["max_latency"], latency)
+        # Те же счётчики - в общий реестр метрик прогона (все клиенты вместе)
+        METRICS.count("http_requests", endpoint=name)
+        METRICS.count("http_retries", int(retried), endpoint=name)
+        METRICS.count("http_errors", int(status is None or status >= 400), endpoint=name)
+        METRICS.count("http_bytes", size, endpoint=name)
+        METRICS.count("http_wire_bytes", wire_size, endpoint=name)
+
+    def summary(self):
+        with self.lock:
+            return {name: dict(row) for name, row in self.endpoints.items()}
+
+    @property
+    def requests(self):
+        with self.lock:
+            return sum(row["requests"] for row in self.endpoints.values())
+
+
+# ----------------------------- ✦ SINGLE FLIGHT ✦ -----------------------------
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    # Одновременные одинаковые запросы - один поход в сеть: первый вызов по ключу
+    # (ведущий) выполняет fn, остальные ждут его и получают тот же результат или
+    # то же исключение. После завершения ключ освобождается - это не кэш.
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = {}  # ключ -> _Call в полёте
+        self.leaders = 0
+        self.coalesced = 0
+
+    def do(self, key, fn):
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+                self.leaders += 1
+            else:
+                self.coalesced += 1
+        METRICS.count("single_flight", result="leader" if leader else "coalesced")
+        if not leader:
+            with METRICS.stage("http.coalesced"):
+                call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+
+    def stats(self):
+        with self.lock:
+            return {"leaders": self.leaders, "coalesced": self.coalesced, "in_flight": len(self.calls)}
+
+
+# Общий для всех клиентов процесса: ключ - полный URL
+FLIGHTS = SingleFlight()
+
+
+# ----------------------------- ✦ CLIENT ✦ -----------------------------
+class HttpClient:
+    # Общий клиент: пул keep-alive соединений, сжатие, таймауты,
+    # повторы с экспоненциальной задержкой и джиттером, лимит скорости и кэш.
+    # cache=None - общий дисковый кэш (для base_url не blockchain.info - свой файл),
+    # cache=False - без кэша.
+    # memory=None - общий LRU разобранных ответов (только вместе с дисковым кэшем),
+    # memory=False - без него. Одинаковые get_json в полёте сливаются (flight).
+
+    def __init__(
+        self,
+        base_url=BASE_URL,
+        timeout=DEFAULT_TIMEOUT,
+        retries=5,
+        backoff=0.5,
+        max_backoff=30.0,
+        rate=None,
+        burst=None,
+        pool_size=16,
+        cache=None,
+        memory=None,
+        flight=FLIGHTS,
+        session=None,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.bucket = TokenBucket(rate=rate, burst=burst or pool_size) if rate else None
+        self.cache = get_cache(cache_path(self.base_url, BASE_URL)) if cache is None else (cache or None)
+        if memory is None:
+            memory = get_memory() if self.cache is not None else None
+        self.memory = memory if memory is not False else None
+        self.flight = flight
+        self.stats = RequestStats()
+
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        adapter.poolmanager.pool_classes_by_scheme = {"http": _TimedHTTPPool, "https": _TimedHTTPSPool}
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(
+            {"Accept-Encoding": ACCEPT_ENCODING, "Connection": "keep-alive"}
+        )
+
+    def url(self, path_or_url):
+        if path_or_url.startswith(("http://", "https://")):
+            return path_or_url
+        return self.base_url + "/" + path_or_url.lstrip("/")
+
+    def _delay(self, attempt, retry_after=None):
+        if retry_after is not None:
+            return min(self.max_backoff, retry_after)
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+
+    def get(self, path_or_url, **kwargs):
+        url = self.url(path_or_url)
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.retries + 1):
+            if self.bucket:
+                self.bucket.acquire()
+            started = time.perf_counter()
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.stats.record(url, None, time.perf_counter() - started, 0, 0, attempt > 0)
+                if attempt == self.retries:
+                    raise
+                log.debug("GET %s: %s, повтор %d", url, e, attempt + 1)
+                time.sleep(self._delay(attempt))
+                continue
+
+            latency = time.perf_counter() - started
+            # ttfb - от отправки до заголовков ответа (у нового соединения включает
+            # http.connect), body - чтение и распаковка тела
+            ttfb = response.elapsed.total_seconds()
+            METRICS.observe("http.ttfb", ttfb)
+            if not kwargs.get("stream"):
+                METRICS.observe("http.body", max(0.0, latency - ttfb))
+            if kwargs.get("stream") and response.ok:
+                # Тело ещё не прочитано: учитываем заявленный размер
+                size = wire_size = int(response.headers.get("Content-Length") or 0)
+            else:
+                size = len(response.content)
+                wire_size = int(response.headers.get("Content-Length") or size)
+            self.stats.record(url, response.status_code, latency, size, wire_size, attempt > 0)
+            log.debug(
+                "GET %s -> %d за %.3f c, %d байт (%d по сети)",
+                url, response.status_code, latency, size, wire_size,
+            )
+
+            if response.status_code in RETRY_STATUSES and attempt < self.retries:
+                retry_after = _retry_after(response)
+                if self.bucket:
+                    self.bucket.backoff(retry_after)
+                time.sleep(self._delay(attempt, retry_after))
+                continue
+
+            response.raise_for_status()
+            if self.bucket:
+                self.bucket.reward()
+            return response
+
+    def get_json(self, path_or_url):
+        # Память -> (один запрос на все одновременные) диск -> сеть
+        url = self.url(path_or_url)
+        key = cache_key(url)
+        if self.memory is not None:
+            data = self.memory.get(key)
+            if data is not None:
+                return data
+        if self.flight is None:
+            return self._load_json(url, key)
+        return self.flight.do(url, lambda: self._load_json(url, key))
+
+    def _load_json(self, url, key):
+        found = self.cache.get_sized(key) if self.cache is not None else None
+        if found is not None:
+            data, size = found
+            ttl = ttl_for(key, data)
+        else:
+            response = self.get(url)
+            with METRICS.stage("decode.json"):
+                data = response.json()
+            size = len(response.content)
+            ttl = ttl_for(key, data)
+            if self.cache is not None:
+                self.cache.put(key, data, ttl)
+        # В память - до освобождения ключа в flight: следующий вызов найдёт ответ там
+        if self.memory is not None:
+            self.memory.put(key, data, size, ttl)
+        return data
+
+    def open_stream(self, path_or_url):
+        # Файлоподобный поток с телом JSON-ответа для инкрементального разбора.
+        # Из кэша читается без сети; при промахе ответ по мере чтения пишется в кэш.
+        url = self.url(path_or_url)
+        if self.cache is not None:
+            key = cache_key(url)
+            cached = self.cache.open(key)
+            if cached is not None:
+                return cached
+        response = self.get(url, stream=True)
+        response.raw.decode_content = True
+        if self.cache is None:
+            return response.raw
+        return CacheWriter(self.cache, key, response.raw, ttl_for(key, None))
+
+    def close(self):
+        self.session.close()
+
+
+def _retry_after(response):
+    value = response.headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def get_client():
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = HttpClient()
+        return _default
+
+
+def get_json(url):
+    return get_client().get_json(url)
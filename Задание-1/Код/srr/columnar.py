@@ -0,0 +1,165 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import numpy as np
+
+from srr.metrics import METRICS
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+DEFAULT_PERCENTILES = (10, 25, 50, 75, 90, 99)
+
+
+# ----------------------------- ✦ HELPERS ✦ -----------------------------
+def _segment_sums(values, offsets):
+    # Суммы по отрезкам [offsets[i], offsets[i + 1]); пустые отрезки дают 0
+    cumsum = np.concatenate(([0], np.cumsum(values, dtype=np.int64)))
+    return cumsum[offsets[1:]] - cumsum[offsets[:-1]]
+
+
+# ----------------------------- ✦ COLUMNS ✦ -----------------------------
+class BlockColumns:
+    # Транзакции набора блоков в виде столбцов NumPy.
+    # Входы и выходы хранятся плоскими массивами, tx i владеет
+    # input_values[input_offsets[i]:input_offsets[i + 1]] (аналогично для выходов).
+    # fee - входы минус выходы (как calculate_fee), reported_fee - поле fee ответа
+    # API, как его брал исходный СРР-2-FIX (fee_reported - поле есть).
+
+    def __init__(self, blocks):
+        txids = []
+        block_index = []
+        is_coinbase = []
+        sizes = []
+        vsizes = []
+        reported = []
+        input_values = []
+        input_known = []
+        input_offsets = [0]
+        output_values = []
+        output_offsets = [0]
+
+        # Плоский проход с локальными ссылками на append - это основная цена построения
+        add_input = input_values.append
+        add_known = input_known.append
+        add_outputs = output_values.extend
+        for b, block in enumerate(blocks):
+            txs = block.get("tx", [])
+            block_index.extend([b] * len(txs))
+            is_coinbase.extend([True] + [False] * (len(txs) - 1) if txs else [])
+            for tx in txs:
+                txids.append(tx.get("hash") or tx.get("txid"))
+                sizes.append(tx.get("size", 0))
+                # Виртуальный размер (BIP 141) - по weight, если он есть в ответе
+                weight = tx.get("weight")
+                vsizes.append((weight + 3) // 4 if weight else tx.get("size", 0))
+                reported.append(tx.get("fee"))
+
+                for inp in tx.get("inputs") or tx.get("vin") or ():
+                    prev = inp.get("prev_out") or inp.get("prevtx") or inp.get("output")
+                    value = prev.get("value") if prev else None
+                    add_known(value is not None)
+                    add_input(value or 0)
+                input_offsets.append(len(input_values))
+
+                add_outputs([o.get("value", 0) for o in tx.get("out") or tx.get("outputs") or ()])
+                output_offsets.append(len(output_values))
+
+        self.block_count = len(blocks)
+        self.txids = txids
+        self.block_index = np.asarray(block_index, dtype=np.int64)
+        self.is_coinbase = np.asarray(is_coinbase, dtype=bool)
+        self.size = np.asarray(sizes, dtype=np.int64)
+        self.vsize = np.asarray(vsizes, dtype=np.int64)
+        self.fee_reported = np.asarray([fee is not None for fee in reported], dtype=bool)
+        self.reported_fee = np.asarray([fee or 0 for fee in reported], dtype=np.int64)
+        self.input_values = np.asarray(input_values, dtype=np.int64)
+        self.input_known = np.asarray(input_known, dtype=bool)
+        self.input_offsets = np.asarray(input_offsets, dtype=np.int64)
+        self.output_values = np.asarray(output_values, dtype=np.int64)
+        self.output_offsets = np.asarray(output_offsets, dtype=np.int64)
+
+        self.input_sum = _segment_sums(self.input_values, self.input_offsets)
+        self.output_sum = _segment_sums(self.output_values, self.output_offsets)
+        unknown = _segment_sums(~self.input_known, self.input_offsets)
+        # Как sum_inputs_sats: сумма входов известна, только если у всех входов есть value
+        self.inputs_complete = (unknown == 0) & ~self.is_coinbase
+        self.fee = self.input_sum - self.output_sum
+
+    @classmethod
+    def from_blocks(cls, blocks):
+        with METRICS.stage("decode.columns"):
+            return cls(list(blocks))
+
+    def __len__(self):
+        return len(self.txids)
+
+    def fee_mask(self):
+        # Векторная форма srr.fees.fee_from_sums (и calculate_ratio)
+        return (
+            self.inputs_complete
+            & (self.input_sum != 0)
+            & (self.output_sum != 0)
+            & (self.fee > 0)
+        )
+
+    def reported_fee_mask(self):
+        # Условия исходного СРР-2-FIX: не coinbase, fee из ответа > 0, сумма выходов > 0;
+        # полнота входов не нужна
+        return self.fee_reported & ~self.is_coinbase & (self.reported_fee > 0) & (self.output_sum > 0)
+
+
+# ----------------------------- ✦ REDUCTIONS ✦ -----------------------------
+def ratio_extremes(cols, reported=False):
+    # (ratio, txid, fee, sum_out) для минимального и максимального отношения;
+    # reported=True - по полю fee ответа API (reported_fee_mask), иначе входы минус выходы
+    mask = cols.reported_fee_mask() if reported else cols.fee_mask()
+    fee = cols.reported_fee if reported else cols.fee
+    if not mask.any():
+        return None, None
+    idx = np.flatnonzero(mask)
+    ratio = fee[idx] / cols.output_sum[idx]
+
+    def item(j):
+        i = idx[j]
+        return float(ratio[j]), cols.txids[i], int(fee[i]), int(cols.output_sum[i])
+
+    return item(int(np.argmin(ratio))), item(int(np.argmax(ratio)))
+
+
+def fee_stats(cols, percentiles=DEFAULT_PERCENTILES):
+    mask = cols.fee_mask()
+    fees = cols.fee[mask]
+    sizes = cols.size[mask]
+    if not len(fees):
+        return {"count": 0}
+    ratio = fees / cols.output_sum[mask]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        per_byte = np.where(sizes > 0, fees / sizes, np.nan)
+    return {
+        "count": int(len(fees)),
+        "total_fee": int(fees.sum()),
+        "avg_fee": float(fees.mean()),
+        "fee_percentiles": dict(zip(percentiles, np.percentile(fees, percentiles).tolist())),
+        "ratio_min": float(ratio.min()),
+        "ratio_max": float(ratio.max()),
+        "fee_per_byte_avg": float(np.nanmean(per_byte)) if np.isfinite(per_byte).any() else None,
+        "fee_per_byte_percentiles": (
+            dict(zip(percentiles, np.nanpercentile(per_byte, percentiles).tolist()))
+            if np.isfinite(per_byte).any()
+            else {}
+        ),
+    }
+
+
+def block_fee_totals(cols):
+    # По блокам: max(0, входы - выходы) по всем транзакциям, кроме coinbase.
+    # Входы без prev_out считаются нулевыми, как в СРР-3.
+    regular = ~cols.is_coinbase
+    inputs = np.bincount(
+        cols.block_index[regular], weights=cols.input_sum[regular], minlength=cols.block_count
+    )
+    outputs = np.bincount(
+        cols.block_index[regular], weights=cols.output_sum[regular], minlength=cols.block_count
+    )
+    return np.maximum(0, inputs - outputs).astype(np.int64)
+
+
+def block_fee(block):
+    return int(block_fee_totals(BlockColumns.from_blocks([block]))[0])
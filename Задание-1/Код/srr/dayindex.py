@@ -0,0 +1,279 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime, timezone
+
+from srr.cache import RECENT_DAY_TTL
+from srr.metrics import METRICS
+from srr.source import SUMMARY_FIELDS, TIME_SLACK, open_source, to_seconds
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+DEFAULT_PATH = os.environ.get(
+    "SRR_DAY_INDEX_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "srr", "days.sqlite3"),
+)
+DAY = 86400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS days (
+    source TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    fetched REAL NOT NULL,
+    final INTEGER NOT NULL,
+    PRIMARY KEY (source, day)
+);
+CREATE TABLE IF NOT EXISTS blocks (
+    source TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    height INTEGER,
+    time INTEGER,
+    size INTEGER,
+    n_tx INTEGER,
+    fee INTEGER,
+    PRIMARY KEY (source, day, position)
+);
+CREATE INDEX IF NOT EXISTS blocks_hash ON blocks(source, hash);
+"""
+
+
+# ----------------------------- ✦ HELPERS ✦ -----------------------------
+def day_start(timestamp):
+    # Начало суток UTC; timestamp - секунды или миллисекунды
+    seconds = to_seconds(timestamp)
+    return seconds - seconds % DAY
+
+
+def complete(summary):
+    return summary is not None and all(summary.get(key) is not None for key in ("size", "n_tx"))
+
+
+# Вопросы 1-5 СРР-3 по сводкам блоков, без транзакций. Для 3 и 4 хватает
+# списка /blocks (hash, time), для 1, 2 и 5 нужны n_tx, size и fee.
+def total_transactions(blocks):
+    return sum(block["n_tx"] for block in blocks)
+
+
+def total_size(blocks):
+    return sum(block["size"] for block in blocks)
+
+
+def avg_block_time(blocks):
+    times = [block["time"] for block in blocks]
+    return sum(abs(b - a) for a, b in zip(times, times[1:])) / (len(times) - 1) if len(times) > 1 else 0
+
+
+def smallest_hash(blocks):
+    return min((block["hash"] for block in blocks), default=None)
+
+
+def avg_fee(block):
+    # Средняя комиссия за транзакцию блока, без coinbase; 0 - нет данных
+    try:
+        return float(block["fee"]) / (block["n_tx"] - 1)
+    except Exception:
+        return 0
+
+
+def summary_answers(summaries):
+    # Ключи - как у stats.day_answers
+    return {
+        "total_transactions": total_transactions(summaries),
+        "total_size": total_size(summaries),
+        "avg_block_time": avg_block_time(summaries),
+        "smallest_hash": smallest_hash(summaries),
+        "avg_fee_5": avg_fee(summaries[4]) if len(summaries) > 4 else 0,
+    }
+
+
+# ----------------------------- ✦ DAY ✦ -----------------------------
+class Day:
+    # Блоки одних суток: blocks - в порядке ответа /blocks/{мс} (его используют
+    # «первые 10 блоков» СРР-3), by_time - позиции по возрастанию времени для бисекции.
+
+    def __init__(self, start, blocks, fetched, final):
+        self.start = start
+        self.blocks = blocks
+        self.fetched = fetched
+        self.final = final
+        self.by_time = sorted(range(len(blocks)), key=lambda i: (blocks[i]["time"], blocks[i]["height"] or 0))
+        self.times = [blocks[i]["time"] for i in self.by_time]
+
+    def fresh(self, now):
+        return self.final or now - self.fetched < RECENT_DAY_TTL
+
+    def between(self, start, end):
+        # Блоки с time в [start, end) по возрастанию времени: две бисекции
+        lo, hi = bisect_left(self.times, start), bisect_left(self.times, end)
+        return [self.blocks[i] for i in self.by_time[lo:hi]]
+
+
+# ----------------------------- ✦ INDEX ✦ -----------------------------
+class DayIndex:
+    # Мемоизированный и постоянный (SQLite) индекс «сутки -> упорядоченные сводки
+    # блоков». Список блоков за сутки запрашивается у источника один раз; поля
+    # size/n_tx/fee догружаются только для нужных блоков (или берутся из уже
+    # разобранных через record) и тоже сохраняются. Прошедшие сутки неизменны,
+    # текущие перезапрашиваются не чаще раза в RECENT_DAY_TTL.
+
+    def __init__(self, source, path=DEFAULT_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.source = source
+        self.name = source.name
+        self.lock = threading.Lock()
+        self.memo = {}  # начало суток -> Day
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript(SCHEMA)
+
+    # ----------------------------- ✦ DAYS ✦ -----------------------------
+    def day(self, timestamp):
+        # Все блоки суток (сводки могут быть неполными: size/n_tx/fee = None)
+        start = day_start(timestamp)
+        now = time.time()
+        day = self.memo.get(start)
+        if day is not None and day.fresh(now):
+            METRICS.count("day_index_lookups", result="memo")
+            return day
+        day = self._load(start)
+        if day is not None and day.fresh(now):
+            METRICS.count("day_index_lookups", result="disk")
+        else:
+            METRICS.count("day_index_lookups", result="fetch")
+            day = self._fetch(start, day, now)
+        self.memo[start] = day
+        return day
+
+    def _load(self, start):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT fetched, final FROM days WHERE source = ? AND day = ?", (self.name, start)
+            ).fetchone()
+            if row is None:
+                return None
+            rows = self.db.execute(
+                f"SELECT {', '.join(SUMMARY_FIELDS)} FROM blocks WHERE source = ? AND day = ? ORDER BY position",
+                (self.name, start),
+            ).fetchall()
+        return Day(start, [dict(zip(SUMMARY_FIELDS, row)) for row in rows], row[0], bool(row[1]))
+
+    def _fetch(self, start, old, now):
+        # Всегда миллисекунды, как ждёт /blocks/{мс}; известные сводки сохраняются
+        known = {block["hash"]: block for block in old.blocks} if old else {}
+        blocks = []
+        for block in self.source.get_blocks_by_time(start * 1000):
+            summary = known.get(block["hash"]) or {key: block.get(key) for key in SUMMARY_FIELDS}
+            blocks.append(summary)
+        # Время блока может отставать от соседних: сутки окончательны с запасом TIME_SLACK
+        day = Day(start, blocks, now, now >= start + DAY + TIME_SLACK)
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM blocks WHERE source = ? AND day = ?", (self.name, start))
+            self.db.executemany(
+                "INSERT INTO blocks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(self.name, start, i, *(b[key] for key in SUMMARY_FIELDS)) for i, b in enumerate(blocks)],
+            )
+            self.db.execute(
+                "INSERT OR REPLACE INTO days VALUES (?, ?, ?, ?)", (self.name, start, now, int(day.final))
+            )
+        return day
+
+    # ----------------------------- ✦ SUMMARIES ✦ -----------------------------
+    def summaries(self, timestamp, limit=None):
+        # Первые limit блоков суток с заполненными сводками: недостающие - одной
+        # пачкой через source.get_block_summaries
+        blocks = self.day(timestamp).blocks[:limit]
+        self.fill(blocks)
+        return blocks
+
+    def record(self, blocks):
+        # Сводки из уже разобранных блоков (/rawblock, BlockStats.blocks) - без запросов
+        self._update([
+            {**{key: block.get(key) for key in SUMMARY_FIELDS}, "n_tx": block.get("n_tx", block.get("tx_count"))}
+            for block in blocks
+            if block.get("hash")
+        ])
+
+    def fill(self, blocks):
+        # Дозаполняет сводки переданных блоков дня (на месте); уже полные не запрашиваются
+        blocks = [block for block in blocks if not complete(block)]
+        if not blocks:
+            return
+        with METRICS.stage("day_index.fill"):
+            found = self.source.get_block_summaries([block["hash"] for block in blocks])
+        self._update([summary for summary in found if summary is not None])
+
+    def _update(self, summaries):
+        by_hash = {summary["hash"]: summary for summary in summaries}
+        if not by_hash:
+            return
+        for day in self.memo.values():
+            for block in day.blocks:
+                summary = by_hash.get(block["hash"])
+                if summary is not None:
+                    block.update((key, value) for key, value in summary.items() if value is not None)
+        with self.lock, self.db:
+            self.db.executemany(
+                "UPDATE blocks SET size = COALESCE(?, size), n_tx = COALESCE(?, n_tx), fee = COALESCE(?, fee)"
+                " WHERE source = ? AND hash = ?",
+                [(s["size"], s["n_tx"], s["fee"], self.name, s["hash"]) for s in by_hash.values()],
+            )
+
+    # ----------------------------- ✦ WINDOW ✦ -----------------------------
+    def window(self, start, end, details=False):
+        # Блоки с time в [start, end) по возрастанию времени; start/end - секунды
+        # или миллисекунды. Сутки берутся из индекса, внутри суток - бисекция.
+        start, end = to_seconds(start), to_seconds(end)
+        found = []
+        for first in range(day_start(start), end, DAY):
+            found.extend(self.day(first).between(start, end))
+        if details:
+            self.fill(found)
+        return found
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+# ----------------------------- ✦ CLI ✦ -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m srr.dayindex", description="Сводки блоков по суткам и запросы по окну времени"
+    )
+    parser.add_argument("date", help="сутки, YYYY-MM-DD")
+    parser.add_argument("--limit", type=int, default=10, help="первые N блоков суток")
+    parser.add_argument("--window", nargs=2, metavar=("FROM", "TO"), default=None,
+                        help="вместо суток - окно времени HH:MM HH:MM в эти сутки (UTC)")
+    parser.add_argument("--db", default=DEFAULT_PATH)
+    parser.add_argument("--source", default=None, help="источник данных (по умолчанию SRR_SOURCE)")
+    args = parser.parse_args(argv)
+
+    day = datetime.strptime(args.date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    with open_source(args.source) as source:
+        index = DayIndex(source, args.db)
+        if args.window:
+            start, end = (
+                int(datetime.combine(day.date(), datetime.strptime(value, "%H:%M").time(), timezone.utc).timestamp())
+                for value in args.window
+            )
+            blocks = index.window(start, end, details=True)
+        else:
+            blocks = index.summaries(int(day.timestamp()), args.limit)
+        index.close()
+    if not blocks:
+        print("БЛОКОВ С ТАКОЙ ДАТОЙ - НЕТ")
+        return
+    for block in blocks:
+        print(f"{block['height']:>8} {block['hash']} {block['time']} {block['size']:>8} {block['n_tx']:>5} {block['fee']}")
+    for key, value in summary_answers(blocks).items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
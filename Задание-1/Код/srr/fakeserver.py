@@ -0,0 +1,653 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+
+from srr.cache import ResponseCache, cache_key
+from srr.client import BASE_URL
+from srr.source import RpcError
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+GENESIS_TIME = 1231006505
+BLOCK_INTERVAL = 600
+SUBSIDY = 5000000000
+RPC_BITS = "1d00ffff"
+SEND_CHUNK = 16384  # тело отправляется такими кусками, если задан bandwidth
+
+
+# ----------------------------- ✦ SYNTHETIC CHAIN ✦ -----------------------------
+def _hex(*parts):
+    return hashlib.sha256(":".join(map(str, parts)).encode()).hexdigest()
+
+
+def block_hash(seed, height):
+    # Высота зашита в хэш, чтобы /rawblock/<hash> находил блок без таблицы
+    return f"00000000{height:08x}" + _hex(seed, "block", height)[:48]
+
+
+def tx_hash(seed, height, position):
+    return f"{height:08x}{position:06x}" + _hex(seed, "tx", height, position)[:50]
+
+
+class SyntheticChain:
+    # Детерминированная цепочка в формате blockchain.info: блок высоты h
+    # генерируется по запросу из seed и h; держится только LRU последних блоков.
+    # mine() и reorg() двигают вершину, чтобы проверять слежение за цепочкой.
+
+    def __init__(self, seed=1, heights=1000, txs_per_block=200, addresses=500):
+        self.seed = seed
+        self.heights = heights
+        self.txs_per_block = txs_per_block
+        self.addresses = [f"1Synth{_hex(seed, 'addr', i)[:26]}" for i in range(addresses)]
+        self.miners = self.addresses[:5]
+        self.forks = []  # высоты, начиная с которых цепочка была заменена
+
+    def _seed(self, height):
+        # После каждого reorg блоки выше точки форка строятся от нового seed
+        forks = sum(1 for fork in self.forks if fork <= height)
+        return f"{self.seed}/{forks}" if forks else self.seed
+
+    def mine(self, count=1):
+        self.heights += count
+        return self.heights - 1
+
+    def reorg(self, depth=1, extra=1):
+        # Заменяет depth верхних блоков и добавляет extra новых сверху
+        self.forks.append(self.heights - depth)
+        self.heights += extra
+        self.block.cache_clear()
+        return self.heights - 1
+
+    def _tx_index(self, height, position):
+        return height * 100000 + position
+
+    def _tx(self, rng, height, position):
+        txid = tx_hash(self._seed(height), height, position)
+        tx_index = self._tx_index(height, position)
+        if position == 0:
+            inputs = [{"sequence": 4294967295, "script": _hex(self._seed(height), "cb", height)[:16]}]
+            value = SUBSIDY >> (height // 210000)
+            outputs = [{"value": value, "addr": rng.choice(self.miners)}]
+        else:
+            inputs = []
+            for n in range(rng.randint(1, 3)):
+                prev_height = rng.randrange(max(1, height))
+                inputs.append(
+                    {
+                        "sequence": 4294967295,
+                        "script": "",
+                        "prev_out": {
+                            "tx_index": self._tx_index(prev_height, rng.randrange(1, 10)),
+                            "n": n,
+                            "value": rng.randint(10000, 10**8),
+                            "addr": rng.choice(self.addresses),
+                            "spent": True,
+                        },
+                    }
+                )
+            total_in = sum(inp["prev_out"]["value"] for inp in inputs)
+            fee = rng.randint(0, min(total_in // 10, 200000))
+            left = total_in - fee
+            outputs = []
+            for _ in range(rng.randint(1, 3)):
+                value = rng.randint(0, left) if left else 0
+                outputs.append({"value": value, "addr": rng.choice(self.addresses)})
+                left -= value
+        for n, out in enumerate(outputs):
+            # Выход генезис-блока потратить нельзя - как в настоящей цепочке
+            out.update(n=n, tx_index=tx_index, spent=rng.random() < 0.5 and height > 0, type=0, script="76a914")
+        size = 10 + 148 * len(inputs) + 34 * len(outputs)
+        return {
+            "hash": txid,
+            "ver": 1,
+            "vin_sz": len(inputs),
+            "vout_sz": len(outputs),
+            "size": size,
+            "weight": size * 4,
+            "lock_time": 0,
+            "tx_index": tx_index,
+            "block_height": height,
+            "inputs": inputs,
+            "out": outputs,
+        }
+
+    @lru_cache(maxsize=256)
+    def block(self, height):
+        if not 0 <= height < self.heights:
+            return None
+        rng = random.Random(f"{self._seed(height)}:{height}")
+        count = 1 if height == 0 else rng.randint(self.txs_per_block // 2, self.txs_per_block * 3 // 2)
+        txs = [self._tx(rng, height, position) for position in range(count)]
+        fee = 0
+        for tx in txs[1:]:
+            tx["fee"] = sum(i["prev_out"]["value"] for i in tx["inputs"]) - sum(
+                o["value"] for o in tx["out"]
+            )
+            fee += tx["fee"]
+        txs[0]["fee"] = 0
+        return {
+            "hash": block_hash(self._seed(height), height),
+            "ver": 1,
+            "prev_block": block_hash(self._seed(height - 1), height - 1) if height else "0" * 64,
+            "mrkl_root": _hex(self._seed(height), "merkle", height),
+            "time": GENESIS_TIME + height * BLOCK_INTERVAL,
+            "bits": 486604799,
+            "fee": fee,
+            "nonce": rng.getrandbits(32),
+            "n_tx": len(txs),
+            "size": 80 + sum(tx["size"] for tx in txs),
+            "block_index": height,
+            "main_chain": True,
+            "height": height,
+            "weight": 320 + sum(tx["weight"] for tx in txs),
+            "tx": txs,
+        }
+
+    def block_by_hash(self, value):
+        try:
+            height = int(value[8:16], 16)
+        except ValueError:
+            return None
+        return self.block(height) if block_hash(self._seed(height), height) == value else None
+
+    def transaction(self, value):
+        try:
+            height, position = int(value[:8], 16), int(value[8:14], 16)
+        except ValueError:
+            return None
+        block = self.block(height)
+        if block is None or position >= len(block["tx"]):
+            return None
+        tx = block["tx"][position]
+        return tx if tx["hash"] == value else None
+
+    def day(self, timestamp):
+        start = timestamp // 1000 if timestamp > 10**11 else timestamp
+        first = max(0, -(-(start - GENESIS_TIME) // BLOCK_INTERVAL))
+        last = min(self.heights, -(-(start + 86400 - GENESIS_TIME) // BLOCK_INTERVAL))
+        return [
+            {
+                "hash": block_hash(self._seed(h), h),
+                "height": h,
+                "time": GENESIS_TIME + h * BLOCK_INTERVAL,
+                "block_index": h,
+            }
+            for h in range(first, last)
+        ]
+
+    def latest(self):
+        height = self.heights - 1
+        return {
+            "hash": block_hash(self._seed(height), height),
+            "time": GENESIS_TIME + height * BLOCK_INTERVAL,
+            "block_index": height,
+            "height": height,
+        }
+
+    def payload(self, path):
+        parts = path.strip("/").split("/")
+        if parts == ["latestblock"]:
+            return self.latest()
+        if len(parts) != 2:
+            return None
+        endpoint, value = parts
+        if endpoint == "block-height":
+            block = self.block(int(value)) if value.isdigit() else None
+            return {"blocks": [block]} if block else None
+        if endpoint == "rawblock":
+            return self.block_by_hash(value)
+        if endpoint == "rawtx":
+            return self.transaction(value)
+        if endpoint == "blocks" and value.isdigit():
+            return self.day(int(value))
+        return None
+
+    # ----------------------------- ✦ JSON-RPC ✦ -----------------------------
+    # Те же блоки в формате bitcoind: суммы в BTC, входы - ссылки txid/vout,
+    # prevout у входов при verbosity 3, gettxout - по флагам spent выходов.
+
+    def _script(self, addr):
+        return {"asm": "", "hex": "76a914", "address": addr, "type": "pubkeyhash"}
+
+    def _rpc_tx(self, tx, verbosity):
+        vin = []
+        for inp in tx["inputs"]:
+            prev = inp.get("prev_out")
+            if prev is None:
+                vin.append({"coinbase": inp["script"], "sequence": inp["sequence"]})
+                continue
+            height, position = divmod(prev["tx_index"], 100000)
+            item = {
+                "txid": tx_hash(self._seed(height), height, position),
+                "vout": prev["n"],
+                "scriptSig": {"asm": "", "hex": inp["script"]},
+                "sequence": inp["sequence"],
+            }
+            if verbosity >= 3:
+                item["prevout"] = {
+                    "generated": False,
+                    "height": height,
+                    "value": prev["value"] / 1e8,
+                    "scriptPubKey": self._script(prev["addr"]),
+                }
+            vin.append(item)
+        result = {
+            "txid": tx["hash"],
+            "hash": tx["hash"],
+            "version": tx["ver"],
+            "size": tx["size"],
+            "vsize": tx["weight"] // 4,
+            "weight": tx["weight"],
+            "locktime": tx["lock_time"],
+            "vin": vin,
+            "vout": [
+                {"value": out["value"] / 1e8, "n": out["n"], "scriptPubKey": self._script(out["addr"])}
+                for out in tx["out"]
+            ],
+        }
+        if verbosity >= 2 and "prev_out" in tx["inputs"][0]:
+            result["fee"] = tx["fee"] / 1e8
+        return result
+
+    def _rpc_header(self, block):
+        height = block["height"]
+        header = {
+            "hash": block["hash"],
+            "confirmations": self.heights - height,
+            "height": height,
+            "version": block["ver"],
+            "merkleroot": block["mrkl_root"],
+            "time": block["time"],
+            "mediantime": block["time"] - 5 * BLOCK_INTERVAL,
+            "nonce": block["nonce"],
+            "bits": RPC_BITS,
+            "difficulty": 1,
+            "nTx": block["n_tx"],
+        }
+        if height:
+            header["previousblockhash"] = block["prev_block"]
+        if height + 1 < self.heights:
+            header["nextblockhash"] = block_hash(self._seed(height + 1), height + 1)
+        return header
+
+    def _rpc_block(self, block_hash_, verbosity=1):
+        block = self.block_by_hash(block_hash_)
+        if block is None:
+            raise RpcError(-5, "Block not found")
+        if verbosity not in (1, 2, 3):
+            raise RpcError(-8, "Поддерживается verbosity 1-3")
+        result = self._rpc_header(block)
+        result.update(size=block["size"], strippedsize=block["size"], weight=block["weight"])
+        if verbosity == 1:
+            result["tx"] = [tx["hash"] for tx in block["tx"]]
+        else:
+            result["tx"] = [self._rpc_tx(tx, verbosity) for tx in block["tx"]]
+        return result
+
+    def _rpc_transaction(self, txid, verbose=False, blockhash=None):
+        tx = self.transaction(txid)
+        if tx is None:
+            raise RpcError(-5, "No such mempool or blockchain transaction")
+        if not verbose:
+            raise RpcError(-8, "Сырой hex не поддерживается")
+        block = self.block(tx["block_height"])
+        result = self._rpc_tx(tx, 3 if verbose == 2 else 1)
+        result.update(blockhash=block["hash"], confirmations=self.heights - block["height"],
+                      time=block["time"], blocktime=block["time"])
+        return result
+
+    def _rpc_txout(self, txid, n, include_mempool=True):
+        tx = self.transaction(txid)
+        if tx is None or not 0 <= n < len(tx["out"]) or tx["out"][n]["spent"]:
+            return None
+        out = tx["out"][n]
+        return {
+            "bestblock": self.latest()["hash"],
+            "confirmations": self.heights - tx["block_height"],
+            "value": out["value"] / 1e8,
+            "scriptPubKey": self._script(out["addr"]),
+            "coinbase": "prev_out" not in tx["inputs"][0],
+        }
+
+    def rpc(self, method, params):
+        if method == "getblockcount":
+            return self.heights - 1
+        if method == "getbestblockhash":
+            return self.latest()["hash"]
+        if method == "getblockhash":
+            if not 0 <= params[0] < self.heights:
+                raise RpcError(-8, "Block height out of range")
+            return block_hash(self._seed(params[0]), params[0])
+        if method == "getblockheader":
+            block = self.block_by_hash(params[0])
+            if block is None:
+                raise RpcError(-5, "Block not found")
+            return self._rpc_header(block)
+        if method == "getblock":
+            return self._rpc_block(*params)
+        if method == "getrawtransaction":
+            return self._rpc_transaction(*params)
+        if method == "gettxout":
+            return self._rpc_txout(*params)
+        if method == "getblockstats":
+            block = self.block_by_hash(params[0])
+            if block is None:
+                raise RpcError(-5, "Block not found")
+            stats = {"blockhash": block["hash"], "height": block["height"], "time": block["time"],
+                     "totalfee": block["fee"], "txs": block["n_tx"]}
+            return {key: stats[key] for key in params[1]} if len(params) > 1 else stats
+        raise RpcError(-32601, "Method not found")
+
+    def rpc_reply(self, request):
+        reply = {"result": None, "error": None, "id": request.get("id")}
+        try:
+            reply["result"] = self.rpc(request.get("method"), request.get("params", []))
+        except RpcError as e:
+            reply["error"] = {"code": e.code, "message": e.message}
+        except (TypeError, IndexError, ValueError) as e:
+            reply["error"] = {"code": -1, "message": str(e)}
+        return reply
+
+
+class ReplaySource:
+    # Отдаёт ответы, ранее записанные в кэш (srr.cache.ResponseCache) с хоста origin
+
+    def __init__(self, path, origin=BASE_URL):
+        self.cache = ResponseCache(path)
+        self.origin = origin.rstrip("/")
+
+    def payload(self, path_and_query):
+        return self.cache.get(cache_key(self.origin + path_and_query))
+
+
+# ----------------------------- ✦ SERVER ✦ -----------------------------
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Клиент закрыл соединение, не дочитав ответ (чтение одного заголовка) - не ошибка
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeBlockchain:
+    # Локальная замена blockchain.info для тестов и бенчмарков:
+    # задержка, доля ошибок 5xx и ответов 429, учёт запросов и байт по эндпоинтам.
+    # bandwidth (байт/с на ответ) растягивает передачу тела - как медленная сеть.
+    # POST на любой путь - JSON-RPC узла bitcoind по той же цепочке (SyntheticChain.rpc).
+
+    def __init__(
+        self,
+        source=None,
+        latency=0.0,
+        error_rate=0.0,
+        rate_429=0.0,
+        retry_after=0.05,
+        compress=True,
+        bandwidth=None,
+        seed=1,
+        host="127.0.0.1",
+        port=0,
+    ):
+        self.source = source or SyntheticChain(seed=seed)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.compress = compress
+        self.bandwidth = bandwidth
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.reset_stats()
+        self.server = _Server((host, port), self._handler())
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def rpc_url(self):
+        # Строка для srr.source.open_source / SRR_SOURCE
+        return "rpc+" + self.base_url
+
+    def reset_stats(self):
+        with self.lock:
+            self.requests = 0
+            self.bytes = 0
+            self.by_endpoint = {}
+
+    def _record(self, path, size):
+        endpoint = "/" + path.strip("/").split("/", 1)[0]
+        with self.lock:
+            self.requests += 1
+            self.bytes += size
+            row = self.by_endpoint.setdefault(endpoint, {"requests": 0, "bytes": 0})
+            row["requests"] += 1
+            row["bytes"] += size
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body=b"", headers=()):
+                self.send_response(status)
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if not fake.bandwidth:
+                    self.wfile.write(body)
+                    return
+                for start in range(0, len(body), SEND_CHUNK):
+                    chunk = body[start:start + SEND_CHUNK]
+                    self.wfile.write(chunk)
+                    self.wfile.flush()
+                    time.sleep(len(chunk) / fake.bandwidth)
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                # Служебные пути для управления сервером из другого процесса
+                if parts.path == "/_stats":
+                    with fake.lock:
+                        stats = {
+                            "requests": fake.requests,
+                            "bytes": fake.bytes,
+                            "by_endpoint": fake.by_endpoint,
+                        }
+                    return self._send(200, json.dumps(stats).encode())
+                if parts.path == "/_reset":
+                    fake.reset_stats()
+                    return self._send(200, b"{}")
+                if parts.path in ("/_mine", "/_reorg") and hasattr(fake.source, "reorg"):
+                    query = dict(parse_qsl(parts.query))
+                    with fake.lock:
+                        if parts.path == "/_mine":
+                            tip = fake.source.mine(int(query.get("count", 1)))
+                        else:
+                            tip = fake.source.reorg(int(query.get("depth", 1)), int(query.get("extra", 1)))
+                    return self._send(200, json.dumps({"height": tip}).encode())
+
+                if self._fault(parts.path):
+                    return
+
+                source = fake.source
+                data = source.payload(self.path if isinstance(source, ReplaySource) else parts.path)
+                if data is None:
+                    fake._record(parts.path, 0)
+                    return self._send(404, b"Not found")
+
+                self._send_json(parts.path, data)
+
+            def do_POST(self):
+                # JSON-RPC в духе bitcoind: одиночный вызов или пачка (список)
+                path = "/rpc"
+                request = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"null")
+                if not hasattr(fake.source, "rpc"):
+                    fake._record(path, 0)
+                    return self._send(404, b"Not found")
+                if self._fault(path):
+                    return
+                if isinstance(request, list):
+                    data = [fake.source.rpc_reply(call) for call in request]
+                elif isinstance(request, dict):
+                    data = fake.source.rpc_reply(request)
+                else:
+                    fake._record(path, 0)
+                    return self._send(400, b"Bad request")
+                self._send_json(path, data)
+
+            def _fault(self, path):
+                # Задержка и подмешанные ошибки; True - ответ уже отправлен
+                if fake.latency:
+                    time.sleep(fake.latency)
+                with fake.lock:
+                    roll = fake.rng.random()
+                if roll < fake.rate_429:
+                    fake._record(path, 0)
+                    self._send(429, headers=[("Retry-After", str(fake.retry_after))])
+                    return True
+                if roll < fake.rate_429 + fake.error_rate:
+                    fake._record(path, 0)
+                    self._send(503)
+                    return True
+                return False
+
+            def _send_json(self, path, data):
+                body = json.dumps(data, separators=(",", ":")).encode()
+                headers = [("Content-Type", "application/json")]
+                if fake.compress and "gzip" in self.headers.get("Accept-Encoding", ""):
+                    body = gzip.compress(body, 1)
+                    headers.append(("Content-Encoding", "gzip"))
+                fake._record(path, len(body))
+                self._send(200, body, headers)
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self.base_url
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class FakeServerProcess:
+    # Тот же сервер в отдельном процессе: генерация ответов не делит GIL
+    # и tracemalloc с измеряемым кодом. Счётчики читаются через /_stats.
+
+    def __init__(self, *cli_args):
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "srr.fakeserver", "--port", "0", *map(str, cli_args)],
+            stdout=subprocess.PIPE,
+            text=True,
+            cwd=_package_root(),
+        )
+        self.base_url = self.process.stdout.readline().split()[1]
+        self.rpc_url = "rpc+" + self.base_url
+        self.session = requests.Session()
+
+    def stats(self):
+        return self.session.get(self.base_url + "/_stats", timeout=5).json()
+
+    def reset_stats(self):
+        self.session.get(self.base_url + "/_reset", timeout=5)
+
+    def mine(self, count=1):
+        return self.session.get(self.base_url + "/_mine", params={"count": count}, timeout=5).json()
+
+    def reorg(self, depth=1, extra=1):
+        params = {"depth": depth, "extra": extra}
+        return self.session.get(self.base_url + "/_reorg", params=params, timeout=5).json()
+
+    @property
+    def requests(self):
+        return self.stats()["requests"]
+
+    @property
+    def bytes(self):
+        return self.stats()["bytes"]
+
+    def stop(self):
+        self.session.close()
+        self.process.terminate()
+        self.process.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _package_root():
+    return os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# ----------------------------- ✦ CLI ✦ -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m srr.fakeserver", description="Локальная замена blockchain.info и JSON-RPC bitcoind"
+    )
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--replay", help="файл кэша SQLite с записанными ответами")
+    parser.add_argument("--replay-origin", default=BASE_URL, help="хост, с которого записаны ответы")
+    parser.add_argument("--heights", type=int, default=1000)
+    parser.add_argument("--txs-per-block", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--latency", type=float, default=0.0, help="задержка ответа, сек.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов 503")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="доля ответов 429")
+    parser.add_argument("--bandwidth", type=float, default=None, help="скорость передачи тела, байт/с")
+    args = parser.parse_args(argv)
+
+    source = (
+        ReplaySource(args.replay, args.replay_origin)
+        if args.replay
+        else SyntheticChain(seed=args.seed, heights=args.heights, txs_per_block=args.txs_per_block)
+    )
+    fake = FakeBlockchain(
+        source,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_429=args.rate_429,
+        bandwidth=args.bandwidth,
+        seed=args.seed,
+        port=args.port,
+    )
+    print(f"Слушаю {fake.base_url} (Ctrl-C - выход)", flush=True)
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
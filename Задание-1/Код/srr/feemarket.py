@@ -0,0 +1,326 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import argparse
+import heapq
+import json
+import math
+
+import numpy as np
+
+from srr.columnar import DEFAULT_PERCENTILES, BlockColumns
+from srr.metrics import METRICS
+from srr.pipeline import Pipeline
+from srr.source import open_source
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+SKETCH_ALPHA = 0.005  # относительная ошибка квантилей скетча (0.5%)
+SKETCH_BUCKETS = 2048  # предел корзин: больше - младшие сливаются в одну
+TOP_K = 10
+FEERATE_EDGES = (1, 2, 3, 5, 8, 10, 15, 20, 30, 50, 100, 200, 500, 1000)  # сат/vB, границы гистограммы
+FETCH_WORKERS = 2  # блоков, загружаемых одновременно; в работе не больше Pipeline.window блоков
+
+
+# ----------------------------- ✦ SKETCH ✦ -----------------------------
+class QuantileSketch:
+    # Скетч квантилей на логарифмических корзинах (как DDSketch): значение x > 0
+    # попадает в корзину ceil(log(x) / log(gamma)), gamma = (1 + alpha) / (1 - alpha),
+    # поэтому любой квантиль отдаётся с относительной ошибкой не больше alpha.
+    # Память ограничена max_buckets; при переполнении младшие корзины сливаются
+    # в самую младшую оставшуюся (ошибка растёт только у нижних квантилей).
+    # Слияние - сложение счётчиков корзин, поэтому оно точное: итог не зависит
+    # от того, как поток разбит на части и в каком порядке части слиты
+    # (в отличие от t-digest и KLL, где результат зависит от порядка сжатий).
+
+    def __init__(self, alpha=SKETCH_ALPHA, max_buckets=SKETCH_BUCKETS):
+        self.alpha = alpha
+        self.max_buckets = max_buckets
+        self.gamma = (1 + alpha) / (1 - alpha)
+        self.log_gamma = math.log(self.gamma)
+        self.offset = 0  # ключ корзины counts[0]
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.zeros = 0  # значения <= 0
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        return self.counts.nbytes
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values):
+            return
+        self.count += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        positive = values[values > 0]
+        self.zeros += len(values) - len(positive)
+        if not len(positive):
+            return
+        keys = np.ceil(np.log(positive) / self.log_gamma).astype(np.int64)
+        low = int(keys.min())
+        self._add_counts(low, np.bincount(keys - low))
+
+    def merge(self, other):
+        if other.alpha != self.alpha:
+            raise ValueError("скетчи с разной точностью не сливаются")
+        self.count += other.count
+        self.zeros += other.zeros
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        if len(other.counts):
+            self._add_counts(other.offset, other.counts)
+        return self
+
+    def _add_counts(self, low, counts):
+        high = low + len(counts)
+        if not len(self.counts):
+            self.offset, self.counts = low, counts.astype(np.int64)
+        else:
+            start, end = min(self.offset, low), max(self.offset + len(self.counts), high)
+            if (start, end) != (self.offset, self.offset + len(self.counts)):
+                grown = np.zeros(end - start, dtype=np.int64)
+                grown[self.offset - start:self.offset - start + len(self.counts)] = self.counts
+                self.offset, self.counts = start, grown
+            self.counts[low - self.offset:high - self.offset] += counts
+        if len(self.counts) > self.max_buckets:
+            # Всё ниже порога - в младшую оставшуюся корзину; порог зависит только
+            # от старшего ключа, поэтому итог одинаков при любом порядке слияний
+            cut = len(self.counts) - self.max_buckets
+            folded = self.counts[cut:].copy()
+            folded[0] += self.counts[:cut].sum()
+            self.offset, self.counts = self.offset + cut, folded
+        else:
+            # Пустые крайние корзины не храним - одинаковое состояние при любом разбиении
+            nonzero = np.flatnonzero(self.counts)
+            if len(nonzero) and (nonzero[0] > 0 or nonzero[-1] < len(self.counts) - 1):
+                self.offset += int(nonzero[0])
+                self.counts = self.counts[nonzero[0]:nonzero[-1] + 1]
+
+    def _value(self, key):
+        # Середина корзины в относительной мере: ошибка не больше alpha
+        return 2 * self.gamma**key / (self.gamma + 1)
+
+    def quantiles(self, qs):
+        # qs - доли 0..1; None для пустого скетча
+        if not self.count:
+            return [None] * len(qs)
+        cumulative = np.cumsum(self.counts)
+        result = []
+        for q in qs:
+            rank = q * (self.count - 1)
+            if rank < self.zeros:
+                result.append(min(self.max, 0.0))
+                continue
+            i = int(np.searchsorted(cumulative, rank - self.zeros, side="right"))
+            result.append(min(self.max, max(self.min, self._value(self.offset + min(i, len(self.counts) - 1)))))
+        return result
+
+    def percentiles(self, percentiles=DEFAULT_PERCENTILES):
+        return dict(zip(percentiles, self.quantiles([p / 100 for p in percentiles])))
+
+    def same(self, other):
+        # Совпадение состояния (проверка точности слияния)
+        return (
+            self.count == other.count and self.zeros == other.zeros
+            and self.min == other.min and self.max == other.max
+            and self.offset == other.offset and np.array_equal(self.counts, other.counts)
+        )
+
+
+# ----------------------------- ✦ TOP-K ✦ -----------------------------
+class TopK:
+    # k наибольших по ключу; ключ уникален (в него входит txid), поэтому набор
+    # не зависит от порядка добавления и слияния частей
+
+    def __init__(self, k=TOP_K):
+        self.k = k
+        self.heap = []  # мин-куча (ключ, запись)
+
+    def push(self, key, item):
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, (key, item))
+        elif key > self.heap[0][0]:
+            heapq.heapreplace(self.heap, (key, item))
+
+    def merge(self, other):
+        for key, item in other.heap:
+            self.push(key, item)
+        return self
+
+    def items(self):
+        return [item for _, item in sorted(self.heap, reverse=True)]
+
+
+# ----------------------------- ✦ ENGINE ✦ -----------------------------
+class FeeMarket:
+    # Потоковая статистика рынка комиссий по диапазону блоков: блоки подаются
+    # по одному (add_block) и сразу отбрасываются. По диапазону - скетчи квантилей
+    # отношения комиссии к сумме и комиссии за vbyte, точная гистограмма сат/vB
+    # и top-K транзакций с наибольшим и наименьшим отношением; по каждому блоку -
+    # строка сводки с точными перцентилями (блок целиком в памяти). Память не
+    # зависит от числа транзакций. merge дописывает следующий поддиапазон -
+    # результат тот же, что у одного прохода (для пула процессов srr.parallel).
+    # Учитываются транзакции с известной комиссией, как в srr.columnar.fee_mask.
+
+    def __init__(self, top=TOP_K, alpha=SKETCH_ALPHA, edges=FEERATE_EDGES):
+        self.top = top
+        self.edges = np.asarray(edges, dtype=np.float64)
+        self.blocks = []  # сводка по каждому блоку в порядке добавления
+        self.tx_count = 0
+        self.total_fee = 0
+        self.total_vsize = 0
+        self.ratio = QuantileSketch(alpha)
+        self.feerate = QuantileSketch(alpha)
+        self.histogram = np.zeros(len(self.edges) + 1, dtype=np.int64)
+        self.highest = TopK(top)  # наибольшее отношение комиссии к сумме
+        self.lowest = TopK(top)  # наименьшее
+
+    # ----------------------------- ✦ FEED ✦ -----------------------------
+    def add_block(self, block):
+        with METRICS.stage("analyze.fees", hot=True):
+            cols = BlockColumns.from_blocks([block])
+            mask = cols.fee_mask()
+            fees = cols.fee[mask]
+            vsizes = cols.vsize[mask]
+            ratio = fees / cols.output_sum[mask]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                feerate = np.where(vsizes > 0, fees / vsizes, np.nan)
+            feerate = feerate[np.isfinite(feerate)]
+
+            self.tx_count += len(fees)
+            self.total_fee += int(fees.sum())
+            self.total_vsize += int(vsizes.sum())
+            self.ratio.add(ratio)
+            self.feerate.add(feerate)
+            self.histogram += np.bincount(np.searchsorted(self.edges, feerate, side="right"),
+                                          minlength=len(self.histogram))
+            self._push_extremes(block, cols, np.flatnonzero(mask), ratio)
+
+            summary = {
+                "height": block.get("height"),
+                "hash": block.get("hash"),
+                "time": block.get("time"),
+                "tx_count": int(len(fees)),
+                "total_fee": int(fees.sum()),
+                "ratio_median": float(np.median(ratio)) if len(ratio) else None,
+                "feerate_percentiles": (
+                    dict(zip((10, 50, 90), np.percentile(feerate, (10, 50, 90)).tolist())) if len(feerate) else {}
+                ),
+            }
+            self.blocks.append(summary)
+            return summary
+
+    def _push_extremes(self, block, cols, idx, ratio):
+        # В кучи идут только кандидаты блока - не дальше k-го значения с каждого края
+        # (с равными ему, чтобы выбор по txid был тем же, что у полного перебора)
+        k = min(self.top, len(ratio))
+        if not k:
+            return
+        high = np.partition(ratio, len(ratio) - k)[len(ratio) - k]
+        low = np.partition(ratio, k - 1)[k - 1]
+        for j in np.flatnonzero((ratio >= high) | (ratio <= low)):
+            i = idx[j]
+            txid = cols.txids[i]
+            item = (float(ratio[j]), txid, int(cols.fee[i]), int(cols.output_sum[i]), block.get("height"))
+            self.highest.push((item[0], txid), item)
+            # Для минимума ключ - отрицательное отношение; при равенстве - больший txid
+            self.lowest.push((-item[0], txid), item)
+
+    # ----------------------------- ✦ MERGE ✦ -----------------------------
+    def merge(self, other):
+        with METRICS.stage("analyze.merge"):
+            self.blocks.extend(other.blocks)
+            self.tx_count += other.tx_count
+            self.total_fee += other.total_fee
+            self.total_vsize += other.total_vsize
+            self.ratio.merge(other.ratio)
+            self.feerate.merge(other.feerate)
+            self.histogram += other.histogram
+            self.highest.merge(other.highest)
+            self.lowest.merge(other.lowest)
+            return self
+
+    def same(self, other):
+        return (
+            self.blocks == other.blocks
+            and (self.tx_count, self.total_fee, self.total_vsize) == (other.tx_count, other.total_fee, other.total_vsize)
+            and self.ratio.same(other.ratio) and self.feerate.same(other.feerate)
+            and np.array_equal(self.histogram, other.histogram)
+            and self.highest.items() == other.highest.items() and self.lowest.items() == other.lowest.items()
+        )
+
+    # ----------------------------- ✦ ANSWERS ✦ -----------------------------
+    def report(self, percentiles=DEFAULT_PERCENTILES):
+        labels = [f"<{self.edges[0]:g}"] + [
+            f"{a:g}-{b:g}" for a, b in zip(self.edges, self.edges[1:])
+        ] + [f">={self.edges[-1]:g}"]
+        return {
+            "blocks": len(self.blocks),
+            "tx_count": self.tx_count,
+            "total_fee": self.total_fee,
+            "avg_feerate": self.total_fee / self.total_vsize if self.total_vsize else None,
+            "ratio_percentiles": self.ratio.percentiles(percentiles),
+            "feerate_percentiles": self.feerate.percentiles(percentiles),
+            "feerate_histogram": dict(zip(labels, self.histogram.tolist())),
+            "highest_ratio": self.highest.items(),
+            "lowest_ratio": self.lowest.items(),
+        }
+
+
+# ----------------------------- ✦ RANGE ✦ -----------------------------
+def analyze_range(source, start, end, market=None, fetch_workers=FETCH_WORKERS):
+    # Блоки start..end включительно по одному; каждый учитывается и отбрасывается.
+    # Следующие блоки загружаются, пока считается текущий (srr.pipeline); в памяти
+    # одновременно не больше окна конвейера - fetch_workers + 3 блоков
+    market = market or FeeMarket()
+    pipeline = Pipeline(source.get_block_by_height, fetch_workers=fetch_workers, queue_size=1)
+    for block in pipeline.run(range(start, end + 1)):
+        if block is not None:
+            market.add_block(block)
+    return market
+
+
+# ----------------------------- ✦ CLI ✦ -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m srr.feemarket", description="Распределение комиссий по диапазону блоков"
+    )
+    parser.add_argument("start", type=int)
+    parser.add_argument("end", type=int)
+    parser.add_argument("--top", type=int, default=TOP_K)
+    parser.add_argument("--blocks", action="store_true", help="вывести сводку по каждому блоку")
+    parser.add_argument("--json", action="store_true")
+    parser.add_argument("--source", default=None, help="источник данных (по умолчанию SRR_SOURCE)")
+    args = parser.parse_args(argv)
+
+    with open_source(args.source) as source:
+        market = analyze_range(source, args.start, args.end, FeeMarket(top=args.top))
+    report = market.report()
+    if args.blocks:
+        report["per_block"] = market.blocks
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=1))
+        return
+    print(f"Блоков: {report['blocks']}, транзакций с комиссией: {report['tx_count']},"
+          f" комиссий: {report['total_fee']} сатоши")
+    if report["avg_feerate"] is not None:
+        print(f"Средняя комиссия: {report['avg_feerate']:.2f} сат/vB")
+    for title, key in (("Отношение комиссии к сумме", "ratio_percentiles"), ("Сатоши за vbyte", "feerate_percentiles")):
+        print(title + ": " + ", ".join(
+            f"p{p}={value:.8g}" for p, value in report[key].items() if value is not None
+        ))
+    print("Гистограмма сат/vB: " + ", ".join(f"{k}: {v}" for k, v in report["feerate_histogram"].items()))
+    for title, key in (("наибольшим", "highest_ratio"), ("наименьшим", "lowest_ratio")):
+        print(f"Транзакции с {title} отношением комиссии к сумме:")
+        for ratio, txid, fee, total, height in report[key]:
+            print(f"  {ratio:.8f} {txid} комиссия {fee}, сумма {total}, блок {height}")
+    for row in report.get("per_block", []):
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+from concurrent.futures import ThreadPoolExecutor
+
+
+# ----------------------------- ✦ HELPERS ✦ -----------------------------
+def is_coinbase(tx):
+    inputs = tx.get("inputs") or tx.get("vin") or []
+    return len(inputs) == 1 and "coinbase" in inputs[0]
+
+
+def sum_inputs_sats(tx):
+    inputs = tx.get("inputs") or tx.get("vin") or []
+    total = 0
+    for inp in inputs:
+        prev = inp.get("prev_out") or inp.get("prevtx") or inp.get("output")
+        if not prev or ("value" not in prev and "vout" not in prev):
+            return None
+        val = prev.get("value")
+        if val is None:
+            return None
+        total += int(val)
+    return total
+
+
+def sum_outputs_sats(tx):
+    outs = tx.get("out") or tx.get("outputs") or []
+    total = 0
+    for o in outs:
+        total += int(o.get("value", 0))
+    return total
+
+
+def fee_from_sums(sum_in, sum_out):
+    # Единственное правило комиссии (JSON, model.Tx): входы минус выходы, если
+    # обе суммы известны и ненулевые, и только положительная
+    if not sum_in or not sum_out:
+        return None
+    fee = sum_in - sum_out
+    return fee if fee > 0 else None
+
+
+def calculate_fee(tx):
+    return fee_from_sums(sum_inputs_sats(tx), sum_outputs_sats(tx))
+
+
+def calculate_ratio(fee, sum_out):
+    if fee is None:
+        return None
+    if sum_out == 0:
+        return None
+    return fee / sum_out
+
+
+def tx_id(tx):
+    return tx.get("hash") or tx.get("txid")
+
+
+def needs_lookup(tx):
+    # Сумму входов нельзя посчитать по данным блока (нет prev_out.value)
+    return not is_coinbase(tx) and sum_inputs_sats(tx) is None
+
+
+# ----------------------------- ✦ ENGINE ✦ -----------------------------
+def fill_missing(txs, missing, txid_of, get_transaction, workers=8, on_error=None):
+    # Транзакции с позиций missing заменяются ответами get_transaction(txid) -
+    # одной параллельной пачкой; при ошибке - on_error(txid, e), транзакция остаётся
+    def lookup(i):
+        try:
+            return i, get_transaction(txid_of(txs[i])), None
+        except Exception as e:
+            return i, None, e
+
+    txs = list(txs)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for i, full_tx, error in pool.map(lookup, missing):
+            if error is not None:
+                if on_error:
+                    on_error(txid_of(txs[i]), error)
+                continue
+            txs[i] = full_tx
+    return txs
+
+
+def ratio_items(rows):
+    # (txid, fee, sum_out) -> (ratio, txid, fee, sum_out) для транзакций с известной комиссией
+    for txid, fee, sum_out in rows:
+        if not txid:
+            continue
+        ratio = calculate_ratio(fee, sum_out)
+        if fee is None or ratio is None:
+            continue
+        yield ratio, txid, fee, sum_out
+
+
+def fee_ratio_items(block, get_transaction=None, workers=8, on_error=None):
+    # Отдаёт (ratio, txid, fee, sum_out) для каждой транзакции блока с известной комиссией.
+    # Всё считается по самому блоку; /rawtx запрашивается только для транзакций
+    # без prev_out.value, одной параллельной пачкой.
+    txs = block.get("tx", [])
+    missing = [i for i, tx in enumerate(txs) if needs_lookup(tx) and tx_id(tx)]
+    if missing and get_transaction is not None:
+        txs = fill_missing(txs, missing, tx_id, get_transaction, workers, on_error)
+    yield from ratio_items((tx_id(tx), calculate_fee(tx), sum_outputs_sats(tx)) for tx in txs)
+
+
+def min_max_ratio(items):
+    min_item = None
+    max_item = None
+    for item in items:
+        if min_item is None or item[0] < min_item[0]:
+            min_item = item
+        if max_item is None or item[0] > max_item[0]:
+            max_item = item
+    return min_item, max_item
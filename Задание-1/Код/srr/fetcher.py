@@ -0,0 +1,47 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+from concurrent.futures import ThreadPoolExecutor
+
+from srr.client import BASE_URL, HttpClient
+
+
+# ----------------------------- ✦ COINBASE FETCHER ✦ -----------------------------
+class CoinbaseFetcher:
+    # Параллельно тянет /block-height/{h} и /rawtx/{coinbase} для диапазона высот.
+    # Результаты отдаются строго в порядке высот: (height, [(hash, txid, tx), ...])
+    # либо (height, Exception), если высоту не удалось обработать.
+    # cache=None - общий дисковый кэш, cache=False - без кэша.
+
+    def __init__(self, base_url=BASE_URL, workers=8, rate=5.0, cache=None, client=None):
+        self.workers = workers
+        self.client = client or HttpClient(
+            base_url, rate=rate, burst=workers, pool_size=workers, cache=cache
+        )
+        self.name = self.client.base_url  # как у BlockchainInfoSource
+
+    def get_blocks_by_height(self, height):
+        return self.client.get_json(f"/block-height/{height}?format=json").get("blocks", [])
+
+    def get_transaction(self, tx_hash):
+        return self.client.get_json(f"/rawtx/{tx_hash}")
+
+    def _fetch_height(self, height):
+        try:
+            result = []
+            for block in self.get_blocks_by_height(height):
+                coinbase_txid = block["tx"][0]["hash"]
+                result.append((block["hash"], coinbase_txid, self.get_transaction(coinbase_txid)))
+            return height, result
+        except Exception as e:
+            return height, e
+
+    def fetch(self, heights):
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            # map() сохраняет порядок высот, пока запросы идут параллельно
+            yield from pool.map(self._fetch_height, heights)
+
+    # Интерфейс srr.source.DataSource для CoinbaseScan
+    fetch_coinbases = fetch
+
+
+def fetch_coinbases(heights, **kwargs):
+    return CoinbaseFetcher(**kwargs).fetch(heights)
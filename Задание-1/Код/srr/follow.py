@@ -0,0 +1,185 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import argparse
+import time
+
+from srr.columnar import BlockColumns, block_fee_totals, ratio_extremes
+from srr.source import open_source
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+WINDOW = 144  # блоков в окне (~сутки)
+POLL_INTERVAL = 30  # сек.
+
+
+# ----------------------------- ✦ HELPERS ✦ -----------------------------
+def summarize_block(block):
+    # Вклад одного блока в агрегаты: майнер, комиссии (как в СРР-3) и крайние
+    # отношения комиссии к сумме (как в СРР-2-FIX)
+    cols = BlockColumns.from_blocks([block])
+    min_item, max_item = ratio_extremes(cols, reported=True)
+    txs = block.get("tx", [])
+    outputs = txs[0].get("out", []) if txs else []
+    return {
+        "hash": block["hash"],
+        "prev_block": block.get("prev_block"),
+        "time": block.get("time"),
+        "tx_count": len(txs),
+        "miner": outputs[0].get("addr") if outputs else None,
+        "fee_sum": int(block_fee_totals(cols)[0]),
+        "min_item": min_item,
+        "max_item": max_item,
+    }
+
+
+# ----------------------------- ✦ FOLLOWER ✦ -----------------------------
+class TipFollower:
+    # Следит за вершиной цепочки и держит агрегаты по последним window блокам.
+    # Каждый опрос запрашивает только высоты выше последней обработанной;
+    # новые блоки добавляют свой вклад в счётчики, вытесняемые из окна и
+    # откатываемые при reorg - вычитают его. source - srr.source.DataSource.
+
+    def __init__(self, source=None, window=WINDOW, start_height=None):
+        # Кэш отключён: у вершины нужен свежий ответ, а не сохранённый до reorg
+        self.source = source or open_source(cache=False)
+        self.window = window
+        self.height = None if start_height is None else start_height - 1
+        self.blocks = {}  # высота -> сводка блока (summarize_block)
+        self.miner_count = {}
+        self.miner_fees = {}
+        self.min_item = None
+        self.max_item = None
+
+    # ----------------------------- ✦ AGGREGATES ✦ -----------------------------
+    def _add(self, height, summary):
+        self.blocks[height] = summary
+        self.height = height
+        miner = summary["miner"]
+        if miner:
+            self.miner_count[miner] = self.miner_count.get(miner, 0) + 1
+            self.miner_fees[miner] = self.miner_fees.get(miner, 0) + summary["fee_sum"]
+        if summary["min_item"] and (self.min_item is None or summary["min_item"][0] < self.min_item[0]):
+            self.min_item = summary["min_item"]
+        if summary["max_item"] and (self.max_item is None or summary["max_item"][0] > self.max_item[0]):
+            self.max_item = summary["max_item"]
+
+    def _remove(self, height):
+        summary = self.blocks.pop(height)
+        miner = summary["miner"]
+        if miner:
+            self.miner_count[miner] -= 1
+            self.miner_fees[miner] -= summary["fee_sum"]
+            if not self.miner_count[miner]:
+                del self.miner_count[miner]
+                del self.miner_fees[miner]
+        # Минимум и максимум не вычитаются: пересчёт по сводкам окна, только
+        # если уходящий блок держал одну из крайних точек
+        if summary["min_item"] is not None and summary["min_item"] == self.min_item:
+            items = [s["min_item"] for s in self.blocks.values() if s["min_item"]]
+            self.min_item = min(items, key=lambda item: item[0], default=None)
+        if summary["max_item"] is not None and summary["max_item"] == self.max_item:
+            items = [s["max_item"] for s in self.blocks.values() if s["max_item"]]
+            self.max_item = max(items, key=lambda item: item[0], default=None)
+        return summary
+
+    def rollback(self, height):
+        # Убирает из агрегатов блоки с высотой >= height
+        removed = [self._remove(h) for h in sorted(self.blocks, reverse=True) if h >= height]
+        self.height = height - 1
+        return removed
+
+    # ----------------------------- ✦ SYNC ✦ -----------------------------
+    def get_block(self, height):
+        block = self.source.get_block_by_height(height)
+        return block if block is not None and block.get("main_chain", True) else None
+
+    def poll(self):
+        # Догоняет вершину; возвращает события [("block"|"rollback", высота, хэш)]
+        latest = self.source.get_latest_block()
+        tip = latest["height"]
+        if self.height is None:
+            self.height = tip - self.window
+
+        events = []
+        known = self.blocks.get(tip)
+        if known and known["hash"] != latest["hash"]:
+            events.extend(("rollback", h, s["hash"]) for h, s in self._rollback_events(tip))
+
+        height = self.height + 1
+        while height <= tip:
+            block = self.get_block(height)
+            if block is None:
+                break  # блок основной цепочки на этой высоте ещё не виден
+            parent = self.blocks.get(height - 1)
+            if parent and block.get("prev_block") != parent["hash"]:
+                # Родитель ушёл в сторону: откатываем его и проверяем высотой ниже
+                events.extend(("rollback", h, s["hash"]) for h, s in self._rollback_events(height - 1))
+                height -= 1
+                continue
+            self._add(height, summarize_block(block))
+            events.append(("block", height, block["hash"]))
+            while len(self.blocks) > self.window:
+                self._remove(min(self.blocks))
+            height += 1
+        return events
+
+    def _rollback_events(self, height):
+        heights = sorted((h for h in self.blocks if h >= height), reverse=True)
+        return list(zip(heights, self.rollback(height)))
+
+    def run(self, interval=POLL_INTERVAL, on_events=None):
+        while True:
+            events = self.poll()
+            if on_events:
+                on_events(self, events)
+            time.sleep(interval)
+
+    # ----------------------------- ✦ ANSWERS ✦ -----------------------------
+    @property
+    def top_miner(self):
+        # При равенстве - адрес, раньше попавший в окно
+        return max(self.miner_count, key=self.miner_count.get, default=None)
+
+    def miner_fee_total(self, addr):
+        return self.miner_fees.get(addr, 0)
+
+
+# ----------------------------- ✦ CLI ✦ -----------------------------
+def report(follower, events):
+    for kind, height, block_hash in events:
+        label = "Новый блок" if kind == "block" else "Откат (reorg)"
+        print(f"{label} {height}: {block_hash}")
+    if not events:
+        return
+    top = follower.top_miner
+    first, last = min(follower.blocks, default=None), max(follower.blocks, default=None)
+    print(f"Окно: блоки {first}-{last}")
+    if top:
+        print(
+            f"Лидер: {top} - {follower.miner_count[top]} блоков, "
+            f"комиссии {follower.miner_fee_total(top)} Сатоши"
+        )
+    if follower.min_item:
+        print(f"Мин. отношение комиссии к сумме: {follower.min_item[0]:.8f} ({follower.min_item[1]})")
+    if follower.max_item:
+        print(f"Макс. отношение комиссии к сумме: {follower.max_item[0]:.8f} ({follower.max_item[1]})")
+    print()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m srr.follow", description="Слежение за новыми блоками (СРР-2-FIX и СРР-3-FIX)"
+    )
+    parser.add_argument("--window", type=int, default=WINDOW, help="блоков в окне")
+    parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help="период опроса, сек.")
+    parser.add_argument("--source", "--base-url", dest="source", default=None,
+                        help="источник данных (по умолчанию SRR_SOURCE или blockchain.info)")
+    args = parser.parse_args(argv)
+
+    with open_source(args.source, cache=False) as source:
+        try:
+            TipFollower(source, window=args.window).run(args.interval, report)
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
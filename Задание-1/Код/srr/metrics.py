@@ -0,0 +1,259 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+REPORT = os.environ.get("SRR_REPORT", "")  # "text" или "json" - отчёт в stderr в конце прогона
+METRICS_FILE = os.environ.get("SRR_METRICS_FILE")  # файл для дампа в формате Prometheus
+PROFILE = os.environ.get("SRR_PROFILE", "")  # "cpu", "mem" или "cpu,mem" - профиль горячих циклов
+PROFILE_TOP = 15
+PREFIX = "srr"
+GAUGES = {"tracemalloc_peak_bytes", "pipeline_queue_peak"}  # остальные счётчики только растут
+
+
+# ----------------------------- ✦ REGISTRY ✦ -----------------------------
+class Metrics:
+    # Таймеры стадий (вызовы, сумма и максимум секунд) и счётчики с метками.
+    # Стадии называются "группа.стадия": http.connect, http.ttfb, decode.json,
+    # analyze.block... Потокобезопасно; накладные расходы - пара perf_counter на вызов.
+    # Стадии с hot=True при SRR_PROFILE дополнительно идут под cProfile/tracemalloc.
+
+    def __init__(self, profile=PROFILE):
+        self.lock = threading.Lock()
+        self.profile = {part.strip() for part in profile.split(",") if part.strip()}
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.started = time.perf_counter()
+            self.stages = {}  # стадия -> [вызовов, секунд, максимум]
+            self.counters = {}  # (имя, ((метка, значение), ...)) -> значение
+            self.cpu_profiles = {}  # стадия -> cProfile.Profile (копится по всем вызовам)
+            self.mem_profiles = {}  # стадия -> топ аллокаций последнего вызова
+
+    # ----------------------------- ✦ RECORD ✦ -----------------------------
+    def observe(self, stage, seconds):
+        with self.lock:
+            row = self.stages.get(stage)
+            if row is None:
+                row = self.stages[stage] = [0, 0.0, 0.0]
+            row[0] += 1
+            row[1] += seconds
+            if seconds > row[2]:
+                row[2] = seconds
+
+    def count(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def maximum(self, name, value, **labels):
+        # Значение-«пик» (gauge): хранится максимум из переданных
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = max(self.counters.get(key, value), value)
+
+    @contextmanager
+    def stage(self, name, hot=False):
+        if hot and self.profile:
+            with self._profiled(name):
+                started = time.perf_counter()
+                try:
+                    yield
+                finally:
+                    self.observe(name, time.perf_counter() - started)
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    @contextmanager
+    def _profiled(self, name):
+        cpu = None
+        if "cpu" in self.profile and threading.current_thread() is threading.main_thread():
+            # cProfile видит только свой поток; горячие циклы скриптов - в главном
+            with self.lock:
+                cpu = self.cpu_profiles.setdefault(name, cProfile.Profile())
+        mem = "mem" in self.profile
+        if mem:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+        if cpu:
+            cpu.enable()
+        try:
+            yield
+        finally:
+            if cpu:
+                cpu.disable()
+            if mem:
+                top = tracemalloc.take_snapshot().compare_to(before, "lineno")[:PROFILE_TOP]
+                with self.lock:
+                    self.mem_profiles[name] = [str(line) for line in top]
+                self.maximum("tracemalloc_peak_bytes", tracemalloc.get_traced_memory()[1])
+
+    # ----------------------------- ✦ READ ✦ -----------------------------
+    def counter(self, name, **labels):
+        # Сумма счётчика по всем меткам, совпадающим с заданными
+        with self.lock:
+            return sum(
+                value
+                for (key, key_labels), value in self.counters.items()
+                if key == name and all(dict(key_labels).get(k) == v for k, v in labels.items())
+            )
+
+    def report(self):
+        # Структурированный итог прогона: стадии, HTTP по эндпоинтам, кэш, память и слияние запросов, прочие счётчики
+        with self.lock:
+            wall = time.perf_counter() - self.started
+            stages = {
+                name: {
+                    "calls": calls,
+                    "seconds": round(total, 6),
+                    "max_seconds": round(peak, 6),
+                    "share": round(total / wall, 4) if wall else 0.0,
+                }
+                for name, (calls, total, peak) in sorted(self.stages.items())
+            }
+            counters = dict(self.counters)
+        http = {}
+        other = {}
+        for (name, labels), value in sorted(counters.items()):
+            labels = dict(labels)
+            if name in ("cache_lookups", "memory_cache_lookups", "single_flight"):
+                continue
+            if name.startswith("http_") and "endpoint" in labels:
+                row = http.setdefault(labels["endpoint"], {})
+                row[name[len("http_"):]] = row.get(name[len("http_"):], 0) + value
+            else:
+                other[_series(name, labels)] = value
+        hits = self.counter("cache_lookups", result="hit")
+        lookups = self.counter("cache_lookups")
+        memory_hits = self.counter("memory_cache_lookups", result="hit")
+        memory_lookups = self.counter("memory_cache_lookups")
+        report = {
+            "wall_seconds": round(wall, 6),
+            "stages": stages,
+            "http": http,
+            "cache": {
+                "hits": hits,
+                "misses": lookups - hits,
+                "hit_ratio": round(hits / lookups, 4) if lookups else None,
+            },
+            "memory": {
+                "hits": memory_hits,
+                "misses": memory_lookups - memory_hits,
+                "hit_ratio": round(memory_hits / memory_lookups, 4) if memory_lookups else None,
+                # Запросы, дождавшиеся такого же уже идущего (single-flight), а не ушедшие в сеть
+                "coalesced": self.counter("single_flight", result="coalesced"),
+            },
+            "counters": other,
+        }
+        if self.cpu_profiles or self.mem_profiles:
+            report["profiles"] = self._profiles()
+        return report
+
+    def _profiles(self):
+        profiles = {}
+        for name, profile in self.cpu_profiles.items():
+            out = io.StringIO()
+            pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+            profiles.setdefault(name, {})["cpu"] = out.getvalue()
+        for name, lines in self.mem_profiles.items():
+            profiles.setdefault(name, {})["mem"] = lines
+        return profiles
+
+    # ----------------------------- ✦ FORMATS ✦ -----------------------------
+    def format_report(self, report=None):
+        report = report or self.report()
+        lines = [f"----------------------------- ✦ ОТЧЁТ ({report['wall_seconds']:.2f} с) ✦ -----------------------------"]
+        lines.append(f"{'стадия':<24} {'вызовов':>8} {'сек.':>9} {'макс.':>8} {'доля':>6}")
+        for name, row in report["stages"].items():
+            lines.append(
+                f"{name:<24} {row['calls']:>8} {row['seconds']:>9.3f} {row['max_seconds']:>8.3f} {row['share'] * 100:>5.1f}%"
+            )
+        if report["http"]:
+            lines.append(f"{'эндпоинт':<24} {'запросов':>8} {'повторов':>9} {'КБ':>8} {'КБ сеть':>8}")
+            for endpoint, row in report["http"].items():
+                lines.append(
+                    f"{endpoint:<24} {row.get('requests', 0):>8} {row.get('retries', 0):>9}"
+                    f" {row.get('bytes', 0) / 1024:>8.0f} {row.get('wire_bytes', 0) / 1024:>8.0f}"
+                )
+        cache = report["cache"]
+        if cache["hit_ratio"] is not None:
+            lines.append(f"кэш: {cache['hits']} попаданий, {cache['misses']} промахов ({cache['hit_ratio'] * 100:.1f}%)")
+        memory = report["memory"]
+        if memory["hit_ratio"] is not None or memory["coalesced"]:
+            ratio = f" ({memory['hit_ratio'] * 100:.1f}%)" if memory["hit_ratio"] is not None else ""
+            lines.append(f"память: {memory['hits']} попаданий, {memory['misses']} промахов{ratio};"
+                         f" слито одновременных запросов: {memory['coalesced']}")
+        for series, value in report["counters"].items():
+            lines.append(f"{series}: {value}")
+        for name, profile in report.get("profiles", {}).items():
+            if "cpu" in profile:
+                lines.append(f"--- cProfile: {name} ---\n{profile['cpu'].rstrip()}")
+            if "mem" in profile:
+                lines.append(f"--- tracemalloc: {name} ---")
+                lines.extend(profile["mem"])
+        return "\n".join(lines)
+
+    def prometheus(self):
+        # Текстовый формат экспозиции Prometheus
+        with self.lock:
+            stages = sorted(self.stages.items())
+            counters = sorted(self.counters.items())
+            wall = time.perf_counter() - self.started
+        lines = [
+            f"# TYPE {PREFIX}_run_seconds gauge",
+            f"{PREFIX}_run_seconds {wall:.6f}",
+            f"# TYPE {PREFIX}_stage_seconds_total counter",
+        ]
+        lines += [f'{PREFIX}_stage_seconds_total{{stage="{name}"}} {row[1]:.6f}' for name, row in stages]
+        lines.append(f"# TYPE {PREFIX}_stage_calls_total counter")
+        lines += [f'{PREFIX}_stage_calls_total{{stage="{name}"}} {row[0]}' for name, row in stages]
+        lines.append(f"# TYPE {PREFIX}_stage_seconds_max gauge")
+        lines += [f'{PREFIX}_stage_seconds_max{{stage="{name}"}} {row[2]:.6f}' for name, row in stages]
+        typed = set()
+        for (name, labels), value in counters:
+            gauge = name in GAUGES
+            metric = f"{PREFIX}_{name}" if gauge else f"{PREFIX}_{name}_total"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} {'gauge' if gauge else 'counter'}")
+            lines.append(_series(metric, dict(labels)) + f" {value}")
+        lookups = self.counter("cache_lookups")
+        if lookups:
+            lines.append(f"# TYPE {PREFIX}_cache_hit_ratio gauge")
+            lines.append(f"{PREFIX}_cache_hit_ratio {self.counter('cache_lookups', result='hit') / lookups:.4f}")
+        return "\n".join(lines) + "\n"
+
+    def finish(self, report=REPORT, metrics_file=METRICS_FILE, out=None):
+        # Конец прогона: отчёт в stderr (SRR_REPORT) и дамп Prometheus (SRR_METRICS_FILE)
+        out = out or sys.stderr
+        if report == "json":
+            print(json.dumps(self.report(), ensure_ascii=False, indent=1), file=out)
+        elif report:
+            print(self.format_report(), file=out)
+        if metrics_file:
+            with open(metrics_file, "w") as f:
+                f.write(self.prometheus())
+
+
+def _series(name, labels):
+    if not labels:
+        return name
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"') for v in labels.values())
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + "}"
+
+
+METRICS = Metrics()
@@ -0,0 +1,172 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+from array import array
+
+from srr.fees import fee_from_sums, fill_missing, is_coinbase, ratio_items, tx_id
+from srr.metrics import METRICS
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+NO_ADDRS = ()
+
+
+# ----------------------------- ✦ HELPERS ✦ -----------------------------
+def txid_bytes(txid):
+    # 64 hex-символа -> 32 байта; всё остальное (например, тестовые id) - как есть
+    try:
+        return bytes.fromhex(txid)
+    except (TypeError, ValueError):
+        return txid.encode() if isinstance(txid, str) else b""
+
+
+def _prev_out(inp):
+    return inp.get("prev_out") or inp.get("prevtx") or inp.get("output")
+
+
+# ----------------------------- ✦ MODEL ✦ -----------------------------
+class Tx:
+    # Транзакция без исходного JSON: значения входов и выходов в array('q'),
+    # адреса - кортежи строк (output_addrs выровнен по выходам, None - выход
+    # без адреса), суммы посчитаны один раз при разборе.
+    # input_sum = None, если хотя бы у одного входа нет prev_out.value.
+    # prevouts - ((txid, vout), ...) входов, если они известны (bitcoind, wire-формат).
+
+    __slots__ = (
+        "txid",
+        "size",
+        "weight",
+        "coinbase",
+        "input_values",
+        "input_addrs",
+        "output_values",
+        "output_addrs",
+        "input_sum",
+        "output_sum",
+        "prevouts",
+    )
+
+    def __init__(self, txid, size, weight, coinbase, input_values, input_addrs,
+                 output_values, output_addrs, input_sum, prevouts=None):
+        self.txid = txid
+        self.size = size
+        self.weight = weight
+        self.coinbase = coinbase
+        self.input_values = input_values
+        self.input_addrs = input_addrs
+        self.output_values = output_values
+        self.output_addrs = output_addrs
+        self.input_sum = input_sum
+        self.output_sum = sum(output_values)
+        self.prevouts = prevouts
+
+    @property
+    def hash(self):
+        txid = self.txid
+        return txid.hex() if len(txid) == 32 else txid.decode()
+
+    @property
+    def fee(self):
+        return fee_from_sums(self.input_sum, self.output_sum)
+
+    @property
+    def needs_lookup(self):
+        return not self.coinbase and self.input_sum is None
+
+    def addresses(self):
+        addrs = set(self.input_addrs).union(self.output_addrs)
+        addrs.discard(None)
+        return addrs
+
+    def __repr__(self):
+        return f"Tx({self.hash})"
+
+
+class Block:
+    __slots__ = ("hash", "prev_block", "height", "time", "size", "fee", "txs")
+
+    def __init__(self, hash, prev_block, height, time, size, fee, txs):
+        self.hash = hash
+        self.prev_block = prev_block
+        self.height = height
+        self.time = time
+        self.size = size
+        self.fee = fee
+        self.txs = txs
+
+    @property
+    def miner(self):
+        txs = self.txs
+        return txs[0].output_addrs[0] if txs and txs[0].output_addrs else None
+
+    def __len__(self):
+        return len(self.txs)
+
+    def __repr__(self):
+        return f"Block({self.height}, {self.hash.hex()})"
+
+
+# ----------------------------- ✦ PARSERS ✦ -----------------------------
+def parse_tx(data, coinbase=None):
+    inputs = data.get("inputs") or data.get("vin") or []
+    input_values = array("q")
+    input_addrs = []
+    prevouts = []
+    complete = True
+    for inp in inputs:
+        if "txid" in inp and "vout" in inp:
+            prevouts.append((txid_bytes(inp["txid"]), inp["vout"]))
+        prev = _prev_out(inp)
+        value = prev.get("value") if prev else None
+        if value is None:
+            complete = False
+            input_values.append(0)
+        else:
+            input_values.append(int(value))
+        if prev and prev.get("addr") is not None:
+            input_addrs.append(prev["addr"])
+
+    outputs = data.get("out") or data.get("outputs") or []
+    output_values = array("q", [int(out.get("value", 0)) for out in outputs])
+    output_addrs = [out.get("addr") for out in outputs]
+
+    return Tx(
+        txid_bytes(tx_id(data)),
+        data.get("size", 0),
+        data.get("weight", 0),
+        is_coinbase(data) if coinbase is None else coinbase,
+        input_values,
+        tuple(input_addrs) if input_addrs else NO_ADDRS,
+        output_values,
+        tuple(output_addrs) if output_addrs else NO_ADDRS,
+        sum(input_values) if complete else None,
+        tuple(prevouts) if prevouts else None,
+    )
+
+
+def parse_block(data):
+    # Первая транзакция блока - coinbase, даже если у её входа нет ключа "coinbase"
+    with METRICS.stage("decode.model"):
+        txs = [parse_tx(tx, coinbase=i == 0 or None) for i, tx in enumerate(data.get("tx", []))]
+    prev_block = data.get("prev_block") or data.get("previousblockhash")
+    return Block(
+        txid_bytes(data["hash"]) if data.get("hash") else b"",
+        txid_bytes(prev_block) if prev_block else None,
+        data.get("height"),
+        data.get("time"),
+        data.get("size", 0),
+        data.get("fee"),
+        txs,
+    )
+
+
+# ----------------------------- ✦ ENGINE ✦ -----------------------------
+def fee_ratio_items(block, get_transaction=None, workers=8, on_error=None):
+    # fees.fee_ratio_items по модели: та же догрузка и те же правила, транзакции - Tx.
+    # get_transaction может вернуть как Tx, так и JSON ответа /rawtx.
+    def fetch(txid):
+        full = get_transaction(txid)
+        return full if isinstance(full, Tx) else parse_tx(full)
+
+    txs = block.txs
+    missing = [i for i, tx in enumerate(txs) if tx.needs_lookup and tx.txid]
+    if missing and get_transaction is not None:
+        txs = fill_missing(txs, missing, lambda tx: tx.hash, fetch, workers, on_error)
+    yield from ratio_items((tx.hash if tx.txid else None, tx.fee, tx.output_sum) for tx in txs)
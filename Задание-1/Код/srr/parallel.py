@@ -0,0 +1,155 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import argparse
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from multiprocessing import shared_memory
+
+from srr.metrics import METRICS
+from srr.source import open_source
+from srr.stats import BlockStats, day_answers
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+CHUNK_BLOCKS = 4  # блоков в одной задаче (и в одном сегменте разделяемой памяти)
+CHUNKS_PER_WORKER = 2  # задач в полёте на процесс: ограничивает память под сегменты
+# Процессы пула стартуют от чистого forkserver, а не fork родителя: родитель держит
+# потоки загрузки и большую кучу, копирование её страниц при сборке мусора в потомке
+# съедало выигрыш
+START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+# ----------------------------- ✦ WORKER ✦ -----------------------------
+def analyze_segment(name, spans, factory=BlockStats):
+    # Частичный итог по блокам одного сегмента: spans - [(смещение, длина)] JSON блоков.
+    # Сегмент создаёт и удаляет родитель; процессы пула делят с ним трекер ресурсов,
+    # поэтому подключение здесь повторно его не регистрирует.
+    # factory - накопитель с add_block/merge (BlockStats, FeeMarket), должен pickle-иться.
+    shm = shared_memory.SharedMemory(name)
+    try:
+        stats = factory()
+        for offset, length in spans:
+            stats.add_block(json.loads(bytes(shm.buf[offset:offset + length])))
+        return stats
+    finally:
+        shm.close()
+
+
+# ----------------------------- ✦ PARENT ✦ -----------------------------
+def _to_segment(bodies):
+    # Тела блоков подряд в новый сегмент; в задачу уходят только имя и смещения
+    with METRICS.stage("parallel.pack"):
+        shm = shared_memory.SharedMemory(create=True, size=max(1, sum(map(len, bodies))))
+        spans, offset = [], 0
+        for body in bodies:
+            shm.buf[offset:offset + len(body)] = body
+            spans.append((offset, len(body)))
+            offset += len(body)
+    return shm, spans
+
+
+def analyze_bodies(chunks, workers=None, factory=BlockStats):
+    # chunks - итератор списков тел блоков (JSON в байтах) в порядке набора.
+    # Каждый список разбирается в отдельном процессе, частичные BlockStats
+    # сливаются по порядку (reduce). Одновременно в работе не больше
+    # workers * CHUNKS_PER_WORKER сегментов, поэтому чтение следующих блоков
+    # идёт параллельно с разбором, а память ограничена.
+    workers = workers or os.cpu_count() or 1
+    stats = factory()
+    pending = []  # (future, сегмент) в порядке набора
+    context = multiprocessing.get_context(START_METHOD)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        try:
+            for bodies in chunks:
+                shm, spans = _to_segment(bodies)
+                try:
+                    future = pool.submit(analyze_segment, shm.name, spans, factory)
+                except BaseException:
+                    _release(shm)
+                    raise
+                pending.append((future, shm))
+                while len(pending) >= workers * CHUNKS_PER_WORKER:
+                    stats.merge(_collect(*pending.pop(0)))
+            while pending:
+                stats.merge(_collect(*pending.pop(0)))
+        finally:
+            for future, shm in pending:
+                future.cancel()
+                _release(shm)
+    return stats
+
+
+def _collect(future, shm):
+    try:
+        with METRICS.stage("parallel.wait"):
+            return future.result()
+    finally:
+        _release(shm)
+
+
+def _release(shm):
+    shm.close()
+    shm.unlink()
+
+
+def block_body(source, block_hash):
+    # JSON блока в байтах без разбора в родителе: из потока (кэш/сеть), иначе
+    # сериализация ответа источника (RPC, blk-файлы)
+    stream = source.open_block_stream(block_hash)
+    if stream is None:
+        return json.dumps(source.get_block_by_hash(block_hash), separators=(",", ":")).encode()
+    try:
+        return stream.read()
+    finally:
+        stream.close()
+
+
+def analyze_blocks(source, block_hashes, workers=None, fetch_workers=8, chunk_blocks=CHUNK_BLOCKS,
+                   factory=BlockStats):
+    # BlockStats по блокам block_hashes (в их порядке): загрузка потоками,
+    # разбор в пуле процессов, итог совпадает с последовательным add_block
+    block_hashes = list(block_hashes)
+
+    def chunks():
+        with ThreadPoolExecutor(max_workers=fetch_workers) as io:
+            for start in range(0, len(block_hashes), chunk_blocks):
+                part = block_hashes[start:start + chunk_blocks]
+                yield list(io.map(lambda h: block_body(source, h), part))
+
+    return analyze_bodies(chunks(), workers, factory)
+
+
+def days_blocks(source, day, days=1, limit=None):
+    # Хэши блоков за days суток с day; limit - первые limit блоков каждых суток
+    hashes = []
+    for offset in range(days):
+        start = datetime.combine(day + timedelta(days=offset), datetime.min.time(), timezone.utc)
+        blocks = source.get_blocks_by_time(int(start.timestamp()) * 1000)
+        hashes.extend(block["hash"] for block in blocks[:limit])
+    return hashes
+
+
+# ----------------------------- ✦ CLI ✦ -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m srr.parallel", description="СРР-3 по суткам или неделе в пуле процессов"
+    )
+    parser.add_argument("date", help="первые сутки, YYYY-MM-DD")
+    parser.add_argument("--days", type=int, default=1)
+    parser.add_argument("--limit", type=int, default=None, help="первые N блоков каждых суток (по умолчанию все)")
+    parser.add_argument("--workers", type=int, default=None, help="процессов (по умолчанию по числу ядер)")
+    parser.add_argument("--source", default=None, help="источник данных (по умолчанию SRR_SOURCE)")
+    args = parser.parse_args(argv)
+
+    day = datetime.strptime(args.date, "%Y-%m-%d").date()
+    with open_source(args.source) as source:
+        hashes = days_blocks(source, day, args.days, args.limit)
+        stats = analyze_blocks(source, hashes, args.workers)
+    print(f"Блоков: {len(stats.blocks)}")
+    for key, value in day_answers(stats).items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
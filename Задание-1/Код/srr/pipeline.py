@@ -0,0 +1,298 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import argparse
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from functools import partial
+
+from srr.metrics import METRICS
+from srr.parallel import days_blocks
+from srr.source import open_source
+from srr.stats import BlockStats, day_answers
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+QUEUE_SIZE = 2  # элементов в каждой очереди между стадиями
+FETCH_WORKERS = 4
+DECODE_WORKERS = 1  # разбор JSON держит GIL: больше одного потока выигрыша не даёт
+SPOOL_BYTES = 4 * 2**20  # тело блока до этого размера держится в памяти, больше - во временном файле
+COPY_CHUNK = 2**16
+POLL = 0.1  # как часто заблокированная стадия проверяет остановку конвейера, сек.
+_DONE = object()  # конец потока в очереди
+
+
+class _Stopped(Exception):
+    pass
+
+
+class _Failed:
+    # Ошибка элемента идёт по конвейеру вместо результата и поднимается у потребителя
+    def __init__(self, error):
+        self.error = error
+
+
+# ----------------------------- ✦ QUEUE ✦ -----------------------------
+class StageQueue:
+    # Ограниченная очередь между стадиями: put ждёт, пока следующая стадия не
+    # освободит место (обратное давление), get - пока предыдущая что-то не отдаст.
+    # Ожидания видны в METRICS: queue.<имя>.full - стоит производитель (узкое место
+    # дальше), queue.<имя>.empty - голодает потребитель (узкое место раньше);
+    # пик глубины - pipeline_queue_peak{queue=<имя>}.
+
+    def __init__(self, name, size, stop):
+        self.name = name
+        self.queue = queue.Queue(size)
+        self.stop = stop
+
+    def __len__(self):
+        return self.queue.qsize()
+
+    def put(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            started = time.perf_counter()
+            self._wait(self.queue.put, item)
+            METRICS.observe(f"queue.{self.name}.full", time.perf_counter() - started)
+        METRICS.maximum("pipeline_queue_peak", self.queue.qsize(), queue=self.name)
+
+    def get(self):
+        try:
+            return self.queue.get_nowait()
+        except queue.Empty:
+            started = time.perf_counter()
+            item = self._wait(self.queue.get)
+            METRICS.observe(f"queue.{self.name}.empty", time.perf_counter() - started)
+            return item
+
+    def _wait(self, call, *args):
+        while True:
+            if self.stop.is_set():
+                raise _Stopped
+            try:
+                return call(*args, timeout=POLL)
+            except (queue.Full, queue.Empty):
+                continue
+
+
+# ----------------------------- ✦ PIPELINE ✦ -----------------------------
+class Pipeline:
+    # Конвейер «загрузка -> разбор -> анализ»: fetch_workers потоков загружают
+    # ключи в очередь fetched, decode_workers потоков разбирают их в очередь decoded,
+    # run() отдаёт результаты вызывающему (анализ) строго в порядке ключей.
+    # Стадии работают одновременно: пока анализируется блок, следующие уже грузятся
+    # и разбираются, и время прогона стремится к max(сеть, CPU), а не к их сумме.
+    # В работе одновременно не больше window элементов (включая ждущие своей
+    # очереди на выдачу), поэтому память ограничена при любом числе ключей;
+    # медленный анализ останавливает загрузку, а не копит блоки. release(item)
+    # вызывается для загруженных, но не разобранных элементов при досрочной
+    # остановке (например, закрывает буферы с телами блоков).
+
+    def __init__(self, fetch, decode=None, fetch_workers=FETCH_WORKERS, decode_workers=DECODE_WORKERS,
+                 queue_size=QUEUE_SIZE, release=None):
+        self.fetch = fetch
+        self.decode = decode
+        self.release = release
+        self.fetch_workers = fetch_workers
+        self.decode_workers = decode_workers
+        self.queue_size = queue_size
+        self.window = fetch_workers + decode_workers + 2 * queue_size
+        self.queues = {}
+        self.pending = {}  # номер -> результат, пришедший раньше предыдущих
+
+    def depths(self):
+        # Текущая глубина очередей и буфера порядка - можно опрашивать из другого потока
+        depths = {name: len(q) for name, q in self.queues.items()}
+        depths["reorder"] = len(self.pending)
+        return depths
+
+    def _release(self, item):
+        if self.release is not None and not isinstance(item, _Failed):
+            self.release(item)
+
+    def run(self, keys):
+        stop = threading.Event()
+        slots = threading.Semaphore(self.window)
+        fetched = StageQueue("fetched", self.queue_size, stop)
+        decoded = StageQueue("decoded", self.queue_size, stop)
+        self.queues = {"fetched": fetched, "decoded": decoded}
+        self.pending = {}
+        numbered = enumerate(keys)
+        lock = threading.Lock()
+        fetchers_left = [self.fetch_workers]
+
+        def fetcher():
+            try:
+                while True:
+                    while not slots.acquire(timeout=POLL):
+                        if stop.is_set():
+                            raise _Stopped
+                    with lock:
+                        entry = next(numbered, None)
+                    if entry is None:
+                        slots.release()
+                        break
+                    number, key = entry
+                    try:
+                        with METRICS.stage("pipeline.fetch"):
+                            item = self.fetch(key)
+                    except Exception as e:
+                        item = _Failed(e)
+                    try:
+                        fetched.put((number, item))
+                    except _Stopped:
+                        self._release(item)
+                        raise
+            except _Stopped:
+                return
+            with lock:
+                fetchers_left[0] -= 1
+                last = fetchers_left[0] == 0
+            if last:
+                try:
+                    for _ in range(self.decode_workers):
+                        fetched.put(_DONE)
+                except _Stopped:
+                    pass
+
+        def decoder():
+            try:
+                while True:
+                    entry = fetched.get()
+                    if entry is _DONE:
+                        decoded.put(_DONE)
+                        return
+                    number, item = entry
+                    if self.decode is not None and not isinstance(item, _Failed):
+                        try:
+                            with METRICS.stage("pipeline.decode"):
+                                item = self.decode(item)
+                        except Exception as e:
+                            item = _Failed(e)
+                    decoded.put((number, item))
+            except _Stopped:
+                return
+
+        threads = [threading.Thread(target=fetcher, daemon=True) for _ in range(self.fetch_workers)]
+        threads += [threading.Thread(target=decoder, daemon=True) for _ in range(self.decode_workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            done, following = 0, 0
+            while done < self.decode_workers:
+                entry = decoded.get()
+                if entry is _DONE:
+                    done += 1
+                    continue
+                self.pending[entry[0]] = entry[1]
+                while following in self.pending:
+                    item = self.pending.pop(following)
+                    following += 1
+                    slots.release()
+                    if isinstance(item, _Failed):
+                        raise item.error
+                    METRICS.count("pipeline_items")
+                    yield item
+        finally:
+            # Досрочный выход или ошибка: стадии останавливаются на ближайшей очереди
+            stop.set()
+            for thread in threads:
+                thread.join()
+            while len(fetched):
+                entry = fetched.queue.get_nowait()
+                if entry is not _DONE:
+                    self._release(entry[1])
+
+
+# ----------------------------- ✦ BLOCKS ✦ -----------------------------
+def open_block(source, block_hash):
+    # Тело /rawblock целиком, в буфере SPOOL_BYTES (дальше - временный файл), или готовый
+    # блок от источника без потоков. Тело дочитывается здесь, в стадии загрузки: передачи
+    # идут в fetch_workers потоков, а разбор читает уже локальную копию
+    stream = source.open_block_stream(block_hash)
+    if stream is None:
+        return source.get_block_by_hash(block_hash)
+    body = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+    try:
+        shutil.copyfileobj(stream, body, COPY_CHUNK)
+        body.seek(0)
+    except BaseException:
+        body.close()
+        raise
+    finally:
+        stream.close()
+    return body
+
+
+def close_block(item):
+    if not isinstance(item, dict):
+        item.close()
+
+
+def block_stats(item):
+    # BlockStats одного блока; тело разбирается по одной транзакции, и в памяти
+    # стадии - счётчики блока, а не разобранный JSON
+    stats = BlockStats()
+    if isinstance(item, dict):
+        stats.add_block(item)
+        return stats
+    try:
+        stats.add_stream(item)
+    finally:
+        item.close()
+    return stats
+
+
+def block_pipeline(source, **options):
+    return Pipeline(partial(open_block, source), block_stats, release=close_block, **options)
+
+
+def analyze_pipeline(source, block_hashes, stats=None, pipeline=None, **options):
+    # BlockStats по блокам block_hashes: итоги блоков сливаются по порядку, ответы
+    # те же, что у последовательного add_stream
+    stats = stats if stats is not None else BlockStats()
+    pipeline = pipeline or block_pipeline(source, **options)
+    for block in pipeline.run(block_hashes):
+        stats.merge(block)
+    return stats
+
+
+# ----------------------------- ✦ CLI ✦ -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m srr.pipeline", description="СРР-3 по суткам или неделе конвейером загрузка/разбор/анализ"
+    )
+    parser.add_argument("date", help="первые сутки, YYYY-MM-DD")
+    parser.add_argument("--days", type=int, default=1)
+    parser.add_argument("--limit", type=int, default=None, help="первые N блоков каждых суток (по умолчанию все)")
+    parser.add_argument("--fetch-workers", type=int, default=FETCH_WORKERS)
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE)
+    parser.add_argument("--watch", type=float, default=0, help="печатать глубину очередей в stderr раз в N сек.")
+    parser.add_argument("--source", default=None, help="источник данных (по умолчанию SRR_SOURCE)")
+    args = parser.parse_args(argv)
+
+    day = datetime.strptime(args.date, "%Y-%m-%d").date()
+    with open_source(args.source) as source:
+        hashes = days_blocks(source, day, args.days, args.limit)
+        pipeline = block_pipeline(source, fetch_workers=args.fetch_workers, queue_size=args.queue_size)
+        finished = threading.Event()
+        if args.watch:
+            def watch():
+                while not finished.wait(args.watch):
+                    print(f"очереди: {pipeline.depths()}", file=sys.stderr)
+
+            threading.Thread(target=watch, daemon=True).start()
+        try:
+            stats = analyze_pipeline(source, hashes, pipeline=pipeline)
+        finally:
+            finished.set()
+    print(f"Блоков: {len(stats.blocks)}")
+    for key, value in day_answers(stats).items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import argparse
+from datetime import datetime, timezone
+from functools import cached_property
+
+from srr.dayindex import DayIndex, avg_block_time, avg_fee, smallest_hash, total_size, total_transactions
+from srr.metrics import METRICS
+from srr.parallel import analyze_blocks
+from srr.pipeline import analyze_pipeline
+from srr.source import open_source
+from srr.stats import DAY_QUESTIONS
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+# Уровни данных по возрастанию цены
+LIST = "list"  # список /blocks за сутки: хэш, высота, время - уже загружен
+SUMMARY = "summary"  # сводка блока: размер, n_tx, fee (заголовок /rawblock)
+FULL = "full"  # все транзакции блока
+
+# Вопрос СРР-3 -> (ключ ответа, уровень данных, номера нужных блоков; None - все)
+QUESTIONS = {
+    1: ("total_transactions", SUMMARY, None),
+    2: ("total_size", SUMMARY, None),
+    3: ("avg_block_time", LIST, None),
+    4: ("smallest_hash", LIST, None),
+    5: ("avg_fee_5", SUMMARY, (4,)),
+    6: ("top_miner", FULL, None),
+    7: ("total_fees_earned", FULL, None),
+    8: ("address_tx_count", FULL, None),
+}
+
+
+# ----------------------------- ✦ HELPERS ✦ -----------------------------
+def parse_questions(text):
+    # "1-5", "6,8", "1-3,7" -> {1, 2, 3, 7}
+    questions = set()
+    for part in filter(None, (part.strip() for part in text.split(","))):
+        first, _, last = part.partition("-")
+        questions.update(range(int(first), int(last or first) + 1))
+    unknown = questions - QUESTIONS.keys()
+    if unknown:
+        raise ValueError(f"нет вопросов {sorted(unknown)}, есть 1-{max(QUESTIONS)}")
+    return questions
+
+
+# ----------------------------- ✦ PLAN ✦ -----------------------------
+class DayPlan:
+    # Ленивый план СРР-3 по первым limit блокам суток. Каждый вопрос объявляет
+    # уровень данных и нужные ему блоки (QUESTIONS); данные загружаются при первом
+    # обращении и общие для всех вопросов: список суток - из индекса, сводки - только
+    # для затронутых блоков одной пачкой, полные блоки - только для вопросов 6-8.
+    # Если полные блоки всё равно нужны, они загружаются первыми, а сводки
+    # берутся из них без новых запросов.
+
+    def __init__(self, days, timestamp, limit=10, processes=1):
+        self.days = days
+        self.source = days.source
+        self.timestamp = timestamp
+        self.limit = limit
+        self.processes = processes
+
+    @cached_property
+    def blocks(self):
+        # Список блоков суток (хэш, высота, время) - без загрузки самих блоков
+        return self.days.day(self.timestamp).blocks[:self.limit]
+
+    @cached_property
+    def stats(self):
+        hashes = [block["hash"] for block in self.blocks]
+        with METRICS.stage("plan.full"):
+            if self.processes > 1:
+                stats = analyze_blocks(self.source, hashes, self.processes)
+            else:
+                # Следующие блоки открываются, пока текущий разбирается потоком
+                stats = analyze_pipeline(self.source, hashes)
+        self.days.record(stats.blocks)
+        return stats
+
+    def touch(self, question):
+        # Блоки, нужные вопросу, с данными его уровня
+        _, level, positions = QUESTIONS[question]
+        blocks = self.blocks if positions is None else [self.blocks[i] for i in positions if i < len(self.blocks)]
+        if level == SUMMARY:
+            self.days.fill(blocks)
+        elif level == FULL:
+            self.stats
+        return blocks
+
+    def answer(self, question):
+        key = QUESTIONS[question][0]
+        blocks = self.touch(question)
+        if key == "total_transactions":
+            return total_transactions(blocks)
+        if key == "total_size":
+            return total_size(blocks)
+        if key == "avg_block_time":
+            return avg_block_time(blocks)
+        if key == "smallest_hash":
+            return smallest_hash(blocks)
+        if key == "avg_fee_5":
+            return avg_fee(blocks[0]) if blocks else 0
+        top_miner = self.stats.top_miner
+        if key == "top_miner":
+            return top_miner
+        if key == "total_fees_earned":
+            return self.stats.miner_fee_total(top_miner)
+        return self.stats.address_tx_count(top_miner)
+
+    def answers(self, questions=None):
+        # {номер вопроса: ответ}; пустой словарь - за сутки нет блоков
+        questions = sorted(questions or QUESTIONS)
+        if not self.blocks:
+            return {}
+        levels = {QUESTIONS[q][1] for q in questions}
+        if FULL in levels:
+            self.stats  # сначала полные блоки: из них же заполнятся сводки
+        elif SUMMARY in levels:
+            # Одна пачка сводок на все затронутые блоки, а не по запросу на вопрос
+            positions = set()
+            for question in questions:
+                _, level, wanted = QUESTIONS[question]
+                if level == SUMMARY:
+                    positions.update(range(len(self.blocks)) if wanted is None else wanted)
+            self.days.fill([self.blocks[i] for i in sorted(positions) if i < len(self.blocks)])
+        return {question: self.answer(question) for question in questions}
+
+
+# ----------------------------- ✦ CLI ✦ -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m srr.planner", description="СРР-3 с загрузкой только нужных вопросам данных"
+    )
+    parser.add_argument("date", help="YYYY-MM-DD")
+    parser.add_argument("--questions", default="1-8", help="например 1-5 или 2,4,6")
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--source", default=None, help="источник данных (по умолчанию SRR_SOURCE)")
+    args = parser.parse_args(argv)
+
+    day = datetime.strptime(args.date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    with open_source(args.source) as source:
+        days = DayIndex(source)
+        answers = DayPlan(days, int(day.timestamp()) * 1000, args.limit, args.processes).answers(
+            parse_questions(args.questions)
+        )
+        days.close()
+    if not answers:
+        print("БЛОКОВ С ТАКОЙ ДАТОЙ - НЕТ")
+        return
+    print("----------------------------- ✦ РЕЗУЛЬТАТЫ ✦ -----------------------------")
+    for question, value in answers.items():
+        key = QUESTIONS[question][0]
+        print(f"{DAY_QUESTIONS[key]}: {value:.2f}" if key == "avg_block_time" else f"{DAY_QUESTIONS[key]}: {value}")
+
+
+if __name__ == "__main__":
+    main()
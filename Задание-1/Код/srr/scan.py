@@ -0,0 +1,241 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import argparse
+import hashlib
+import json
+import os
+import time
+
+from srr.source import open_source
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+DEFAULT_DIR = os.environ.get(
+    "SRR_SCAN_DIR", os.path.join(os.path.expanduser("~"), ".cache", "srr", "scans")
+)
+CHUNK_SIZE = 1000
+CHECKPOINT_EVERY = 50
+STATE_TTL = 24 * 60 * 60  # завершённый кусок перепроверяется: непотраченные coinbase могут потратить
+
+
+# ----------------------------- ✦ HELPERS ✦ -----------------------------
+def coinbase_spent(tx):
+    return any(out.get("spent") is True for out in tx.get("out", []))
+
+
+def _write_json(path, data):
+    # Через временный файл и os.replace: при обрыве остаётся либо старое, либо новое состояние
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# ----------------------------- ✦ CHECKPOINTED SCAN ✦ -----------------------------
+class CoinbaseScan:
+    # Поиск потраченных coinbase на диапазоне высот с сохранением прогресса.
+    # Диапазон режется на куски по chunk_size высот; у каждого куска свой файл
+    # состояния: курсор (следующая высота), найденные потраченные coinbase и
+    # очередь высот, которые не удалось обработать. Кусок захватывается
+    # lock-файлом, поэтому один каталог могут разбирать несколько процессов.
+    # Состояние принадлежит источнику source_name (DataSource.name): каталог по
+    # умолчанию свой у каждого источника, чужой каталог не продолжается.
+    # Завершённый кусок старше max_age сек. перепроверяется: его высоты без
+    # потраченной coinbase ставятся в очередь повторов (потраченная не «отменяется»).
+
+    def __init__(self, start, end, source_name, directory=None, chunk_size=CHUNK_SIZE, max_age=STATE_TTL):
+        self.start = start
+        self.end = end
+        self.source_name = source_name
+        self.max_age = max_age
+        tag = hashlib.sha256(source_name.encode()).hexdigest()[:16]
+        self.directory = directory or os.path.join(DEFAULT_DIR, tag, f"{start}-{end}")
+        os.makedirs(self.directory, exist_ok=True)
+
+        manifest = os.path.join(self.directory, "scan.json")
+        try:
+            with open(manifest) as f:
+                # Границы кусков уже записаны на диск - менять их нельзя
+                saved = json.load(f)
+            chunk_size = saved["chunk_size"]
+            if saved.get("source", source_name) != source_name:
+                raise ValueError(f"{self.directory}: состояние источника {saved['source']}, а не {source_name}")
+        except FileNotFoundError:
+            _write_json(manifest, {"start": start, "end": end, "chunk_size": chunk_size, "source": source_name})
+        self.chunk_size = chunk_size
+
+    # ----------------------------- ✦ CHUNKS ✦ -----------------------------
+    def chunks(self):
+        return [
+            (lo, min(lo + self.chunk_size - 1, self.end))
+            for lo in range(self.start, self.end + 1, self.chunk_size)
+        ]
+
+    def _path(self, chunk, suffix):
+        return os.path.join(self.directory, f"chunk-{chunk[0]:08d}-{chunk[1]:08d}.{suffix}")
+
+    def load(self, chunk):
+        try:
+            with open(self._path(chunk, "json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"cursor": chunk[0], "spent": [], "failed": {}}
+
+    def save(self, chunk, state):
+        _write_json(self._path(chunk, "json"), state)
+
+    def is_done(self, state, chunk):
+        return state["cursor"] > chunk[1] and not state["failed"]
+
+    def is_expired(self, state):
+        # Состояние без отметки checked - из прежней версии, его возраст неизвестен
+        return time.time() - state.get("checked", 0) > self.max_age
+
+    def expire(self, chunk, state):
+        spent = {row[0] for row in state["spent"]}
+        state["failed"] = {str(h): "перепроверка" for h in range(chunk[0], chunk[1] + 1) if h not in spent}
+        self.save(chunk, state)
+
+    def claim(self, chunk):
+        lock = self._path(chunk, "lock")
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                with open(lock) as f:
+                    owner = int(f.read() or 0)
+            except (FileNotFoundError, ValueError):
+                owner = 0
+            if owner and _pid_alive(owner):
+                return False
+            # Владелец умер, не сняв блокировку - забираем кусок себе
+            os.remove(lock)
+            return self.claim(chunk)
+        with os.fdopen(fd, "w") as f:
+            f.write(str(os.getpid()))
+        return True
+
+    def release(self, chunk):
+        try:
+            os.remove(self._path(chunk, "lock"))
+        except FileNotFoundError:
+            pass
+
+    # ----------------------------- ✦ RUN ✦ -----------------------------
+    def _apply(self, state, height, result, is_spent):
+        if isinstance(result, Exception):
+            state["failed"][str(height)] = str(result)
+            return
+        state["failed"].pop(str(height), None)
+        for block_hash, coinbase_txid, transaction in result:
+            if is_spent(transaction):
+                state["spent"].append([height, block_hash, coinbase_txid])
+
+    def run_chunk(self, chunk, source, is_spent=coinbase_spent, on_result=None,
+                  checkpoint_every=CHECKPOINT_EVERY):
+        # Сначала повторяет высоты из очереди ошибок, затем идёт от курсора до конца
+        # куска. Состояние пишется каждые checkpoint_every высот и при любом выходе,
+        # включая Ctrl-C.
+        state = self.load(chunk)
+        try:
+            retry = sorted(int(h) for h in state["failed"])
+            for height, result in source.fetch_coinbases(retry):
+                self._apply(state, height, result, is_spent)
+                if on_result:
+                    on_result(height, result)
+
+            processed = 0
+            for height, result in source.fetch_coinbases(range(state["cursor"], chunk[1] + 1)):
+                self._apply(state, height, result, is_spent)
+                state["cursor"] = height + 1
+                if on_result:
+                    on_result(height, result)
+                processed += 1
+                if processed % checkpoint_every == 0:
+                    self.save(chunk, state)
+        finally:
+            state["spent"].sort()
+            if self.is_done(state, chunk):
+                state["checked"] = time.time()
+            self.save(chunk, state)
+        return state
+
+    def run(self, source, is_spent=coinbase_spent, on_result=None, retries=1):
+        # Обрабатывает все незавершённые куски, которые удалось захватить;
+        # куски, занятые другими процессами, пропускает.
+        if source.name != self.source_name:
+            raise ValueError(f"состояние {self.directory} - для {self.source_name}, а не {source.name}")
+        for chunk in self.chunks():
+            for _ in range(1 + retries):
+                state = self.load(chunk)
+                if (self.is_done(state, chunk) and not self.is_expired(state)) or not self.claim(chunk):
+                    break
+                try:
+                    state = self.load(chunk)  # мог измениться до захвата
+                    if self.is_done(state, chunk) and self.is_expired(state):
+                        self.expire(chunk, state)
+                    self.run_chunk(chunk, source, is_spent, on_result)
+                finally:
+                    self.release(chunk)
+
+    # ----------------------------- ✦ RESULTS ✦ -----------------------------
+    def results(self):
+        # (потраченные [(height, hash, txid)], высоты с ошибкой {height: текст}, необработанные куски)
+        spent, failed, pending = [], {}, []
+        for chunk in self.chunks():
+            state = self.load(chunk)
+            spent.extend(tuple(row) for row in state["spent"])
+            failed.update({int(h): error for h, error in state["failed"].items()})
+            if state["cursor"] <= chunk[1]:
+                pending.append(chunk)
+        return sorted(spent), dict(sorted(failed.items())), pending
+
+
+# ----------------------------- ✦ CLI ✦ -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m srr.scan", description="СРР-1 на длинном диапазоне с возобновлением"
+    )
+    parser.add_argument("start", type=int)
+    parser.add_argument("end", type=int)
+    parser.add_argument("--dir", default=None,
+                        help=f"каталог состояния (по умолчанию {DEFAULT_DIR}/<источник>/START-END)")
+    parser.add_argument("--chunk", type=int, default=CHUNK_SIZE, help="высот в куске")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=5.0)
+    parser.add_argument("--retries", type=int, default=1, help="повторов очереди ошибок на кусок")
+    parser.add_argument("--max-age", type=float, default=STATE_TTL,
+                        help="сек.; завершённые куски старше перепроверяются")
+    parser.add_argument("--source", "--base-url", dest="source", default=None,
+                        help="источник данных (по умолчанию SRR_SOURCE или blockchain.info)")
+    args = parser.parse_args(argv)
+
+    source = open_source(args.source, workers=args.workers, rate=args.rate)
+    scan = CoinbaseScan(args.start, args.end, source.name, args.dir, args.chunk, args.max_age)
+    try:
+        scan.run(source, retries=args.retries)
+    except KeyboardInterrupt:
+        print("\nПрервано, прогресс сохранён")
+
+    spent, failed, pending = scan.results()
+    for height, block_hash, txid in spent:
+        print(f"\nБлок: {height}")
+        print(f"Хэш:  {block_hash}")
+        print(f"ID транзакции:  {txid}")
+    print(f"\nОбщее кол-во потраченных коинбэйс-транзакций: {len(spent)}")
+    if failed:
+        print(f"Не обработаны высоты ({len(failed)}): {', '.join(map(str, failed))}")
+    if pending:
+        print(f"Не завершены куски: {', '.join(f'{lo}-{hi}' for lo, hi in pending)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import argparse
+import json
+import os
+
+import numpy as np
+
+from srr.client import HttpClient
+from srr.fees import tx_id
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+DEFAULT_DIR = os.environ.get(
+    "SRR_SPENT_DIR", os.path.join(os.path.expanduser("~"), ".cache", "srr", "spent")
+)
+MIX = 0x9E3779B97F4A7C15
+MASK64 = (1 << 64) - 1
+MAX_LOAD = 0.5
+
+COINBASE_RECORD = 68  # хэш блока (32 байта) | txid coinbase (32) | число его выходов (uint32)
+
+# Упаковка «кто потратил»: высота (24 бита) | позиция tx в блоке (20) | номер входа (20)
+HEIGHT_BITS, POSITION_BITS, INPUT_BITS = 24, 20, 20
+
+
+# ----------------------------- ✦ HELPERS ✦ -----------------------------
+def txid_prefix(txid):
+    # Первые 8 байт txid как число; 0 зарезервирован под пустой слот
+    return int(txid[:16], 16) or 1
+
+
+def prefix_key(prefix, vout):
+    return ((prefix * MIX + vout + 1) & MASK64) or 1
+
+
+def outpoint_key(txid, vout):
+    return prefix_key(txid_prefix(txid), vout)
+
+
+def pack_spender(height, position, n):
+    return (height << (POSITION_BITS + INPUT_BITS)) | (position << INPUT_BITS) | n
+
+
+def unpack_spender(value):
+    return (
+        value >> (POSITION_BITS + INPUT_BITS),
+        (value >> INPUT_BITS) & ((1 << POSITION_BITS) - 1),
+        value & ((1 << INPUT_BITS) - 1),
+    )
+
+
+# ----------------------------- ✦ HASH TABLE ✦ -----------------------------
+class HashTable:
+    # Открытая адресация с линейным пробированием: uint64 ключ -> uint64 значение.
+    # Ключи и значения лежат в двух файлах, отображённых в память (numpy.memmap).
+    # Файлы пронумерованы поколением: рост пишет таблицу в файлы следующего
+    # поколения и атомарно заменяет <path>.json, поэтому после сбоя на диске
+    # всегда пара файлов, совпадающая с метаданными (старая или новая).
+
+    def __init__(self, path, capacity=1 << 16):
+        self.path = path
+        meta = self._read_meta()
+        self.capacity = meta.get("capacity", capacity)
+        self.count = meta.get("count", 0)
+        self.generation = meta.get("generation", 0)
+        if meta:
+            for name in self._files(self.generation):
+                size = os.path.getsize(name) if os.path.exists(name) else None
+                if size != self.capacity * 8:
+                    raise ValueError(
+                        f"{name}: {size} байт, а по {path}.json ёмкость {self.capacity} - индекс повреждён"
+                    )
+        self.keys, self.values = self._open(self.generation, "r+" if meta else "w+")
+        if meta:
+            # Вставки после последнего flush уже в файлах, а count в json - нет
+            self.count = int(np.count_nonzero(self.keys))
+
+    def _read_meta(self):
+        try:
+            with open(self.path + ".json") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _files(self, generation):
+        # Поколение 0 - имена без номера, как у таблиц, созданных до поколений
+        suffix = f".{generation}" if generation else ""
+        return self.path + suffix + ".keys", self.path + suffix + ".values"
+
+    def _open(self, generation, mode):
+        return tuple(
+            np.memmap(name, dtype=np.uint64, mode=mode, shape=(self.capacity,)) for name in self._files(generation)
+        )
+
+    def _write_meta(self):
+        tmp = self.path + ".json.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"capacity": self.capacity, "count": self.count, "generation": self.generation}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path + ".json")
+
+    def _slot(self, key):
+        mask = self.capacity - 1
+        i = (key * MIX & MASK64) >> 20 & mask
+        keys = self.keys
+        while True:
+            current = int(keys[i])
+            if current == key or current == 0:
+                return i
+            i = (i + 1) & mask
+
+    def get(self, key):
+        i = self._slot(key)
+        return int(self.values[i]) if int(self.keys[i]) == key else None
+
+    def put(self, key, value):
+        i = self._slot(key)
+        if int(self.keys[i]) == 0:
+            self.count += 1
+            self.keys[i] = key
+        self.values[i] = value
+        if self.count > self.capacity * MAX_LOAD:
+            self._grow()
+
+    def _grow(self):
+        # Новое поколение целиком пишется рядом со старым; метаданные переключаются
+        # на него одной заменой файла, только потом старые файлы удаляются
+        old_keys = np.array(self.keys)
+        old_values = np.array(self.values)
+        old_files = self._files(self.generation)
+        self.capacity *= 2
+        self.count = 0
+        self.generation += 1
+        self.keys, self.values = self._open(self.generation, "w+")
+        for key, value in zip(old_keys[old_keys != 0].tolist(), old_values[old_keys != 0].tolist()):
+            self.put(key, value)
+        self.keys.flush()
+        self.values.flush()
+        self._write_meta()
+        for name in old_files:
+            os.remove(name)
+
+    def __len__(self):
+        return self.count
+
+    def flush(self):
+        self.keys.flush()
+        self.values.flush()
+        self._write_meta()
+
+
+# ----------------------------- ✦ COINBASES ✦ -----------------------------
+class CoinbaseLog:
+    # Coinbase каждой высоты для СРР-1 без запросов к источнику: записи
+    # фиксированной длины, запись высоты h - по смещению h * COINBASE_RECORD.
+    # При открытии хвост после подтверждённых heights высот отрезается - как и
+    # таблицы, он будет дописан заново при продолжении построения.
+
+    def __init__(self, path, heights):
+        mode = "r+b" if os.path.exists(path) else "w+b"
+        self.file = open(path, mode)
+        self.file.seek(0, os.SEEK_END)
+        if self.file.tell() > heights * COINBASE_RECORD:
+            self.file.truncate(heights * COINBASE_RECORD)
+
+    def put(self, height, block_hash, txid, n_outputs):
+        self.file.seek(height * COINBASE_RECORD)
+        self.file.write(
+            bytes.fromhex(block_hash or "0" * 64) + bytes.fromhex(txid or "0" * 64) + n_outputs.to_bytes(4, "little")
+        )
+
+    def get(self, height):
+        # (хэш блока, txid coinbase, число выходов); None - высоты нет в журнале
+        # (индекс построен до появления журнала - нулевая запись)
+        self.file.seek(height * COINBASE_RECORD)
+        record = self.file.read(COINBASE_RECORD)
+        if len(record) < COINBASE_RECORD or not any(record[32:64]):
+            return None
+        return record[:32].hex(), record[32:64].hex(), int.from_bytes(record[64:], "little")
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def n_outputs(tx):
+    return tx.get("vout_sz", len(tx.get("out") or tx.get("vout") or ()))
+
+
+# ----------------------------- ✦ SPENT INDEX ✦ -----------------------------
+class SpentIndex:
+    # Индекс потраченных выходов: (txid, vout) -> (высота, позиция tx, номер входа).
+    # Строится по блокам строго в порядке высот и продолжается с последней высоты.
+    # Для ответов blockchain.info, где во входе только prev_out.tx_index, ведётся
+    # вторая таблица tx_index -> префикс txid. Coinbase каждой высоты пишется
+    # в журнал coinbases.bin - СРР-1 отвечается по индексу без запросов.
+
+    def __init__(self, directory=DEFAULT_DIR):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.spenders = HashTable(os.path.join(directory, "spenders"))
+        self.tx_prefixes = HashTable(os.path.join(directory, "tx_index"))
+        try:
+            with open(os.path.join(directory, "state.json")) as f:
+                self.last_height = json.load(f)["last_height"]
+        except FileNotFoundError:
+            self.last_height = -1
+        self.coinbases = CoinbaseLog(os.path.join(directory, "coinbases.bin"), self.last_height + 1)
+
+    def _prev_outpoint(self, inp):
+        if "txid" in inp:  # формат bitcoind (getblock, verbosity 2)
+            return txid_prefix(inp["txid"]), inp["vout"]
+        prev = inp.get("prev_out") or {}
+        if prev.get("tx_index") is None or prev.get("n") is None:
+            return None
+        prefix = self.tx_prefixes.get(prev["tx_index"] + 1)
+        return (prefix, prev["n"]) if prefix is not None else None
+
+    def ingest_block(self, block, height=None):
+        height = block.get("height") if height is None else height
+        if height <= self.last_height:
+            return False
+        if height != self.last_height + 1 and self.last_height >= 0:
+            raise ValueError(f"ожидалась высота {self.last_height + 1}, получена {height}")
+
+        txs = block.get("tx", [])
+        if txs:
+            self.coinbases.put(height, block.get("hash"), tx_id(txs[0]), n_outputs(txs[0]))
+        for position, tx in enumerate(txs):
+            if tx.get("tx_index") is not None:
+                self.tx_prefixes.put(tx["tx_index"] + 1, txid_prefix(tx_id(tx)))
+            for n, inp in enumerate(tx.get("inputs") or tx.get("vin") or []):
+                outpoint = self._prev_outpoint(inp)
+                if outpoint is None:
+                    continue
+                self.spenders.put(prefix_key(*outpoint), pack_spender(height, position, n))
+
+        self.last_height = height
+        return True
+
+    def spender(self, txid, vout):
+        value = self.spenders.get(outpoint_key(txid, vout))
+        return unpack_spender(value) if value is not None else None
+
+    def is_spent(self, txid, n_outputs=1):
+        return any(self.spender(txid, vout) is not None for vout in range(n_outputs))
+
+    def spent_coinbases(self, start, end):
+        # СРР-1 по индексу: ([(высота, хэш блока, txid)], высоты без записи в журнале)
+        spent, missing = [], []
+        for height in range(start, min(end, self.last_height) + 1):
+            record = self.coinbases.get(height)
+            if record is None:
+                missing.append(height)
+            elif self.is_spent(record[1], record[2]):
+                spent.append((height, record[0], record[1]))
+        return spent, missing
+
+    def flush(self):
+        self.spenders.flush()
+        self.tx_prefixes.flush()
+        self.coinbases.flush()
+        with open(os.path.join(self.directory, "state.json"), "w") as f:
+            json.dump({"last_height": self.last_height}, f)
+
+
+def build(index, end, client, flush_every=100):
+    # Дозаполняет индекс до высоты end включительно, продолжая с index.last_height
+    for height in range(index.last_height + 1, end + 1):
+        data = client.get_json(f"/block-height/{height}?format=json")
+        blocks = [b for b in data.get("blocks", []) if b.get("main_chain", True)]
+        if not blocks:
+            index.flush()
+            raise ValueError(f"нет блока основной цепочки на высоте {height}")
+        index.ingest_block(blocks[0], height)
+        if height % flush_every == 0:
+            index.flush()
+    index.flush()
+
+
+# ----------------------------- ✦ CLI ✦ -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m srr.spent", description="Индекс потраченных выходов"
+    )
+    parser.add_argument("--dir", default=DEFAULT_DIR)
+    parser.add_argument("--base-url", default=None)
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_cmd = commands.add_parser("build", help="дозаполнить индекс до высоты")
+    build_cmd.add_argument("end", type=int)
+    coinbases = commands.add_parser("spent-coinbases", help="СРР-1 по индексу")
+    coinbases.add_argument("start", type=int)
+    coinbases.add_argument("end", type=int)
+    args = parser.parse_args(argv)
+
+    index = SpentIndex(args.dir)
+    client = HttpClient(args.base_url) if args.base_url else HttpClient()
+
+    if args.command == "build":
+        build(index, args.end, client)
+        print(f"Индекс построен до высоты {index.last_height}, выходов: {len(index.spenders)}")
+        return
+
+    # Только по индексу: coinbase высот записаны при построении
+    spent, missing = index.spent_coinbases(args.start, args.end)
+    if missing:
+        print(f"Нет coinbase в индексе для {len(missing)} высот (индекс построен старой версией,"
+              f" пересоберите его): {missing[0]}-{missing[-1]}")
+    for height, block_hash, txid in spent:
+        print(f"\nБлок: {height}")
+        print(f"Хэш:  {block_hash}")
+        print(f"ID транзакции:  {txid}")
+    print(f"\nОбщее кол-во потраченных коинбэйс-транзакций: {len(spent)}")
+    print(f"(по данным индекса до высоты {index.last_height})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+from datetime import datetime, timezone
+
+from srr.addresses import AddressIndex
+from srr.metrics import METRICS
+from srr.stream import iter_block
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+DAY_QUESTIONS = {
+    "total_transactions": "1. сколько транзакций в них содержится?",
+    "total_size": "2. на сколько байт увеличился размер блокчейна за счет этих блоков?",
+    "avg_block_time": "3. сколько времени в среднем потребовалось на генерацию одного блока?",
+    "smallest_hash": "4. какой из блоков имеет наименьший хеш?",
+    "avg_fee_5": "5. какой была средняя комиссия (Сатоши) за транзакцию в 5 блоке?",
+    "top_miner": "6. какой адрес сгенерировал наибольшее количество из этих блоков?",
+    "total_fees_earned": "7. какой объём комиссии (Сатоши) был получен этим адресом"
+    " в дополнение к фиксированному вознаграждению?",
+    "address_tx_count": "8. сколько всего транзакций совершено с участием этого адреса?",
+}
+
+
+# ----------------------------- ✦ HELPERS ✦ -----------------------------
+def output_addresses(tx):
+    addrs = {out.get("addr") for out in tx.get("out", [])}
+    addrs.discard(None)
+    return addrs
+
+
+def tx_addresses(tx):
+    # Адреса, участвующие в транзакции (выходы и prev_out входов)
+    addrs = output_addresses(tx)
+    for inp in tx.get("inputs", []):
+        prev_out = inp.get("prev_out")
+        if prev_out and prev_out.get("addr") is not None:
+            addrs.add(prev_out["addr"])
+    return addrs
+
+
+# ----------------------------- ✦ ACCUMULATOR ✦ -----------------------------
+class BlockStats:
+    # Накопитель статистики по набору блоков: каждая транзакция обрабатывается
+    # ровно один раз, все ответы СРР-3 после этого - поиск по готовым счётчикам.
+    #
+    # Порядок вызовов на блок: begin_block() -> add_header()/add_tx() -> end_block(),
+    # либо add_block(dict) / add_stream(поток /rawblock).
+
+    def __init__(self):
+        self.blocks = []  # сводка по каждому блоку в порядке добавления
+        self.total_transactions = 0
+        self.total_size = 0
+        self.interval_sum = 0
+        self.smallest_hash = None
+        self.miner_count = {}
+        self.miner_fees = {}
+        self.miner_order = {}
+        self.top_miner = None
+        self.addresses = AddressIndex()  # адрес -> транзакции, где он во входах или выходах
+        self.current = None
+
+    # ----------------------------- ✦ FEED ✦ -----------------------------
+    def begin_block(self):
+        self.current = {
+            "tx_count": 0,
+            "total_inputs": 0,
+            "total_outputs": 0,
+            "miner": None,
+        }
+
+    def add_header(self, key, value):
+        self.current[key] = value
+
+    def add_tx(self, tx):
+        block = self.current
+        if block["tx_count"] == 0:
+            outputs = tx.get("out", [])
+            if outputs and "addr" in outputs[0]:
+                block["miner"] = outputs[0]["addr"]
+        else:
+            for inp in tx.get("inputs", []):
+                block["total_inputs"] += inp.get("prev_out", {}).get("value", 0)
+            for out in tx.get("out", []):
+                block["total_outputs"] += out.get("value", 0)
+        block["tx_count"] += 1
+
+        outputs = [out["addr"] for out in tx.get("out", []) if out.get("addr") is not None]
+        inputs = [
+            inp["prev_out"]["addr"]
+            for inp in tx.get("inputs", [])
+            if inp.get("prev_out") and inp["prev_out"].get("addr") is not None
+        ]
+        self.addresses.add_tx(outputs, inputs, tx.get("hash"))
+
+    def end_block(self):
+        block = self.current
+        self.current = None
+        block["fee_sum"] = max(0, block["total_inputs"] - block["total_outputs"])
+
+        if self.blocks and "time" in block:
+            self.interval_sum += abs(block["time"] - self.blocks[-1]["time"])
+        self.blocks.append(block)
+
+        self.total_transactions += block["tx_count"]
+        self.total_size += block.get("size", 0)
+        if block.get("hash") and (self.smallest_hash is None or block["hash"] < self.smallest_hash):
+            self.smallest_hash = block["hash"]
+
+        self._count_miner(block["miner"], block["fee_sum"])
+        return block
+
+    def _count_miner(self, miner, fee_sum):
+        if not miner:
+            return
+        count = self.miner_count.get(miner, 0) + 1
+        self.miner_count[miner] = count
+        self.miner_fees[miner] = self.miner_fees.get(miner, 0) + fee_sum
+        self.miner_order.setdefault(miner, len(self.miner_order))
+        # При равенстве побеждает адрес, встреченный первым - как max() по dict
+        top = self.top_miner
+        if top is None or count > self.miner_count[top] or (
+            count == self.miner_count[top] and self.miner_order[miner] < self.miner_order[top]
+        ):
+            self.top_miner = miner
+
+    def add_block(self, block):
+        with METRICS.stage("analyze.block", hot=True):
+            self.begin_block()
+            for key, value in block.items():
+                if key != "tx" and not isinstance(value, (dict, list)):
+                    self.add_header(key, value)
+            for tx in block.get("tx", []):
+                self.add_tx(tx)
+            return self.end_block()
+
+    def add_stream(self, fp):
+        # Чтение потока, разбор JSON и счётчики идут вперемешку - одна стадия
+        with METRICS.stage("analyze.stream", hot=True):
+            self.begin_block()
+            for event in iter_block(fp):
+                if event[0] == "header":
+                    self.add_header(event[1], event[2])
+                else:
+                    self.add_tx(event[1])
+            return self.end_block()
+
+    # ----------------------------- ✦ MERGE ✦ -----------------------------
+    def merge(self, other):
+        with METRICS.stage("analyze.merge"):
+            return self._merge(other)
+
+    def _merge(self, other):
+        # Дописывает блоки other (частичный итог по следующим блокам набора) так,
+        # будто они были добавлены сюда по порядку: ответы совпадают с одним проходом
+        if self.blocks and other.blocks and "time" in other.blocks[0]:
+            self.interval_sum += abs(other.blocks[0]["time"] - self.blocks[-1]["time"])
+        self.interval_sum += other.interval_sum
+        self.total_transactions += other.total_transactions
+        self.total_size += other.total_size
+        if other.smallest_hash and (self.smallest_hash is None or other.smallest_hash < self.smallest_hash):
+            self.smallest_hash = other.smallest_hash
+        for block in other.blocks:
+            self._count_miner(block["miner"], block["fee_sum"])
+        self.blocks.extend(other.blocks)
+        self.addresses.merge(other.addresses)
+        return self
+
+    # ----------------------------- ✦ ANSWERS ✦ -----------------------------
+    @property
+    def avg_block_time(self):
+        return self.interval_sum / (len(self.blocks) - 1) if len(self.blocks) > 1 else 0
+
+    def address_tx_count(self, addr):
+        return self.addresses.tx_count(addr)
+
+    def receiving_tx_count(self, addr):
+        return self.addresses.receiving_count(addr)
+
+    def miner_fee_total(self, addr):
+        return self.miner_fees.get(addr, 0)
+
+
+# ----------------------------- ✦ DAY ✦ -----------------------------
+def day_to_ms(day):
+    date_obj = datetime.strptime(day, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    return int(date_obj.timestamp()) * 1000
+
+
+def analyze_day(source, day_ms, limit=10):
+    # Первые limit блоков дня (в порядке get_blocks_by_time) из srr.source.DataSource:
+    # поток /rawblock разбирается по одной транзакции, источники без потоков
+    # (RPC, blk-файлы) отдают блок целиком
+    stats = BlockStats()
+    for block in source.get_blocks_by_time(day_ms)[:limit]:
+        stream = source.open_block_stream(block["hash"])
+        if stream is None:
+            stats.add_block(source.get_block_by_hash(block["hash"]))
+            continue
+        try:
+            stats.add_stream(stream)
+        finally:
+            stream.close()
+    return stats
+
+
+def day_answers(stats):
+    # Ответы на 8 вопросов СРР-3-FIX; ключи совпадают с BlockStore.day_answers
+    fifth = stats.blocks[4] if len(stats.blocks) > 4 else None
+    try:
+        avg_fee_5 = float(fifth.get("fee")) / (fifth["tx_count"] - 1)
+    except Exception:
+        avg_fee_5 = 0
+    top_miner = stats.top_miner
+    return {
+        "total_transactions": stats.total_transactions,
+        "total_size": stats.total_size,
+        "avg_block_time": stats.avg_block_time,
+        "smallest_hash": stats.smallest_hash,
+        "avg_fee_5": avg_fee_5,
+        "top_miner": top_miner,
+        "total_fees_earned": stats.miner_fee_total(top_miner),
+        "address_tx_count": stats.address_tx_count(top_miner),
+    }
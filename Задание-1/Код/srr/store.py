@@ -0,0 +1,413 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import argparse
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from srr.cache import RECENT_BLOCK_AGE, RECENT_BLOCK_TTL, RECENT_DAY_TTL, UNSPENT_TX_TTL
+from srr.client import BASE_URL
+from srr.dayindex import DAY
+from srr.fees import sum_inputs_sats, sum_outputs_sats, tx_id
+from srr.source import TIME_SLACK, open_source
+from srr.stats import DAY_QUESTIONS, day_to_ms
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+DEFAULT_PATH = os.environ.get(
+    "SRR_STORE_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "srr", "blocks.sqlite3"),
+)
+
+SCHEMA_VERSION = 2
+# Строки блоков и суток - по источнику (source = DataSource.name: хэши и высоты у
+# цепочек разные); main_chain = 0 - блок ушёл из основной цепочки источника.
+# fetched - когда блок загружен, checked - когда обновлены флаги spent его coinbase.
+# Транзакции, входы и выходы адресуются хэшем блока и общие для источников.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    source TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    height INTEGER NOT NULL,
+    time INTEGER,
+    size INTEGER,
+    fee INTEGER,
+    n_tx INTEGER NOT NULL,
+    main_chain INTEGER NOT NULL,
+    fetched REAL NOT NULL,
+    checked REAL NOT NULL,
+    PRIMARY KEY (source, hash)
+);
+CREATE INDEX IF NOT EXISTS blocks_height ON blocks(source, height);
+CREATE INDEX IF NOT EXISTS blocks_time ON blocks(source, time);
+
+CREATE TABLE IF NOT EXISTS txs (
+    block_hash TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    txid TEXT NOT NULL,
+    tx_index INTEGER,
+    size INTEGER,
+    sum_in INTEGER,
+    sum_out INTEGER NOT NULL,
+    PRIMARY KEY (block_hash, position)
+);
+CREATE INDEX IF NOT EXISTS txs_txid ON txs(txid);
+
+CREATE TABLE IF NOT EXISTS inputs (
+    block_hash TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    prev_tx_index INTEGER,
+    prev_n INTEGER,
+    value INTEGER,
+    addr TEXT,
+    PRIMARY KEY (block_hash, position, n)
+);
+CREATE INDEX IF NOT EXISTS inputs_addr ON inputs(addr);
+
+CREATE TABLE IF NOT EXISTS outputs (
+    block_hash TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    value INTEGER NOT NULL,
+    addr TEXT,
+    spent INTEGER,
+    PRIMARY KEY (block_hash, position, n)
+);
+CREATE INDEX IF NOT EXISTS outputs_addr ON outputs(addr);
+
+CREATE TABLE IF NOT EXISTS days (
+    source TEXT NOT NULL,
+    day_ms INTEGER NOT NULL,
+    hashes TEXT NOT NULL,
+    fetched REAL NOT NULL,
+    final INTEGER NOT NULL,
+    PRIMARY KEY (source, day_ms)
+);
+"""
+TABLES = ("blocks", "txs", "inputs", "outputs", "days")
+
+
+# ----------------------------- ✦ STORE ✦ -----------------------------
+class BlockStore:
+    # Локальное хранилище блоков, транзакций, входов и выходов в SQLite
+    # с индексами по высоте, хэшу, времени, txid и адресу.
+    # Транзакция адресуется парой (хэш блока, позиция в блоке).
+    # name - DataSource.name источника, из которого хранилище пополняется;
+    # запросы видят только его блоки основной цепочки. Как у кэша ответов,
+    # блоки у вершины, неокончательные сутки и непотраченные выходы coinbase
+    # перезапрашиваются по истечении своего TTL.
+
+    def __init__(self, path=DEFAULT_PATH, name=BASE_URL):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self.name = name
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        if self.db.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            # Хранилище - копия данных источника: таблицы прежней схемы пересоздаются
+            with self.db:
+                for table in TABLES:
+                    self.db.execute(f"DROP TABLE IF EXISTS {table}")
+                self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self.db.executescript(SCHEMA)
+
+    # ----------------------------- ✦ INGEST ✦ -----------------------------
+    def ingest_block(self, block):
+        block_hash = block["hash"]
+        txs = block.get("tx", [])
+        tx_rows = []
+        input_rows = []
+        output_rows = []
+
+        for position, tx in enumerate(txs):
+            tx_rows.append(
+                (block_hash, position, tx_id(tx), tx.get("tx_index"), tx.get("size"),
+                 sum_inputs_sats(tx), sum_outputs_sats(tx))
+            )
+            for n, inp in enumerate(tx.get("inputs", [])):
+                prev = inp.get("prev_out") or {}
+                input_rows.append(
+                    (block_hash, position, n, prev.get("tx_index"), prev.get("n"),
+                     prev.get("value"), prev.get("addr"))
+                )
+            for n, out in enumerate(tx.get("out", [])):
+                output_rows.append(
+                    (block_hash, position, out.get("n", n), out.get("value", 0), out.get("addr"),
+                     None if out.get("spent") is None else int(out["spent"]))
+                )
+
+        now = time.time()
+        main_chain = block.get("main_chain", True)
+        with self.lock, self.db:
+            for table in ("txs", "inputs", "outputs"):
+                self.db.execute(f"DELETE FROM {table} WHERE block_hash = ?", (block_hash,))
+            if main_chain:
+                # На высоте один блок основной цепочки: прежний ушёл в reorg
+                self.db.execute(
+                    "UPDATE blocks SET main_chain = 0 WHERE source = ? AND height = ? AND hash != ?",
+                    (self.name, block.get("height"), block_hash),
+                )
+            self.db.execute(
+                "INSERT OR REPLACE INTO blocks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (self.name, block_hash, block.get("height"), block.get("time"), block.get("size"),
+                 block.get("fee"), len(txs), int(main_chain), now, now),
+            )
+            self.db.executemany("INSERT INTO txs VALUES (?, ?, ?, ?, ?, ?, ?)", tx_rows)
+            self.db.executemany("INSERT INTO inputs VALUES (?, ?, ?, ?, ?, ?, ?)", input_rows)
+            self.db.executemany("INSERT INTO outputs VALUES (?, ?, ?, ?, ?, ?)", output_rows)
+
+    def has_block(self, block_hash):
+        with self.lock:
+            return self.db.execute(
+                "SELECT 1 FROM blocks WHERE source = ? AND hash = ?", (self.name, block_hash)
+            ).fetchone() is not None
+
+    def missing_heights(self, heights):
+        # Высоты без блока основной цепочки; блок моложе RECENT_BLOCK_AGE ещё может
+        # уйти в reorg и перезапрашивается раз в RECENT_BLOCK_TTL
+        now = time.time()
+        with self.lock:
+            present = {
+                row[0]
+                for row in self.db.execute(
+                    "SELECT DISTINCT height FROM blocks WHERE source = ? AND main_chain = 1"
+                    " AND height BETWEEN ? AND ? AND (time < ? OR fetched > ?)",
+                    (self.name, min(heights), max(heights), now - RECENT_BLOCK_AGE, now - RECENT_BLOCK_TTL),
+                )
+            }
+        return [h for h in heights if h not in present]
+
+    def ingest_heights(self, heights, source):
+        # source - srr.source.DataSource; берётся блок основной цепочки на высоте
+        heights = list(heights)
+        for height in self.missing_heights(heights) if heights else []:
+            block = source.get_block_by_height(height)
+            if block is not None:
+                self.ingest_block(block)
+
+    def refresh_coinbases(self, start, end, source):
+        # Флаги spent фиксируются при загрузке; непотраченные выходы coinbase могут
+        # потратить позже, поэтому такие coinbase перепроверяются раз в UNSPENT_TX_TTL
+        # (source.fetch_coinbases - пачками у RPC). Сменившийся на высоте блок загружается заново.
+        now = time.time()
+        stale = dict(self._query(
+            "SELECT b.height, b.hash FROM blocks b"
+            " WHERE b.source = ? AND b.main_chain = 1 AND b.height BETWEEN ? AND ? AND b.checked < ?"
+            " AND EXISTS (SELECT 1 FROM outputs o"
+            "             WHERE o.block_hash = b.hash AND o.position = 0 AND o.spent = 0)",
+            (self.name, start, end, now - UNSPENT_TX_TTL),
+        ))
+        for height, found in source.fetch_coinbases(sorted(stale)):
+            if isinstance(found, Exception):
+                raise found
+            for block_hash, _, tx in found:
+                if block_hash != stale[height]:
+                    self.ingest_block(source.get_block_by_hash(block_hash))
+                    continue
+                rows = [
+                    (int(out["spent"]), block_hash, out.get("n", n))
+                    for n, out in enumerate(tx.get("out", []))
+                    if out.get("spent") is not None
+                ]
+                with self.lock, self.db:
+                    self.db.executemany(
+                        "UPDATE outputs SET spent = ? WHERE block_hash = ? AND position = 0 AND n = ?", rows
+                    )
+                    self.db.execute(
+                        "UPDATE blocks SET checked = ? WHERE source = ? AND hash = ?", (now, self.name, block_hash)
+                    )
+
+    def day_hashes(self, day_ms):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT hashes FROM days WHERE source = ? AND day_ms = ?", (self.name, day_ms)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def ingest_day(self, day_ms, source, limit=None):
+        # Список блоков суток окончателен, как в DayIndex, спустя сутки и TIME_SLACK
+        # после их конца; до того - перезапрашивается раз в RECENT_DAY_TTL
+        now = time.time()
+        with self.lock:
+            row = self.db.execute(
+                "SELECT hashes, fetched, final FROM days WHERE source = ? AND day_ms = ?", (self.name, day_ms)
+            ).fetchone()
+        if row is not None and (row[2] or now - row[1] < RECENT_DAY_TTL):
+            hashes = json.loads(row[0])
+        else:
+            hashes = [b["hash"] for b in source.get_blocks_by_time(day_ms)]
+            final = now >= day_ms // 1000 + DAY + TIME_SLACK
+            with self.lock, self.db:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO days VALUES (?, ?, ?, ?, ?)",
+                    (self.name, day_ms, json.dumps(hashes), now, int(final)),
+                )
+        for block_hash in hashes[:limit]:
+            if not self.has_block(block_hash):
+                self.ingest_block(source.get_block_by_hash(block_hash))
+        return hashes
+
+    # ----------------------------- ✦ QUERIES ✦ -----------------------------
+    def _query(self, sql, params=()):
+        with self.lock:
+            return self.db.execute(sql, params).fetchall()
+
+    def spent_coinbases(self, start, end):
+        # СРР-1: блоки, у coinbase которых потрачен хотя бы один выход
+        return self._query(
+            "SELECT b.height, b.hash, t.txid FROM blocks b"
+            " JOIN txs t ON t.block_hash = b.hash AND t.position = 0"
+            " WHERE b.source = ? AND b.main_chain = 1 AND b.height BETWEEN ? AND ?"
+            " AND EXISTS (SELECT 1 FROM outputs o"
+            "             WHERE o.block_hash = b.hash AND o.position = 0 AND o.spent = 1)"
+            " ORDER BY b.height",
+            (self.name, start, end),
+        )
+
+    def fee_ratio_extremes(self, height):
+        # СРР-2: те же условия, что calculate_fee/calculate_ratio; при равенстве - первая в блоке
+        sql = (
+            "SELECT CAST(t.sum_in - t.sum_out AS REAL) / t.sum_out AS ratio, t.txid,"
+            " t.sum_in - t.sum_out, t.sum_out"
+            " FROM txs t JOIN blocks b ON b.hash = t.block_hash"
+            " WHERE b.source = ? AND b.main_chain = 1 AND b.height = ? AND t.sum_in IS NOT NULL AND t.sum_in != 0"
+            " AND t.sum_out != 0 AND t.sum_in > t.sum_out"
+            " ORDER BY ratio {}, t.position LIMIT 1"
+        )
+        low = self._query(sql.format("ASC"), (self.name, height))
+        high = self._query(sql.format("DESC"), (self.name, height))
+        return (low[0] if low else None), (high[0] if high else None)
+
+    def day_answers(self, day_ms, limit=10):
+        # СРР-3-FIX: ответы на 8 вопросов по первым limit блокам дня
+        hashes = (self.day_hashes(day_ms) or [])[:limit]
+        if not hashes:
+            return None
+        marks = ",".join("?" * len(hashes))
+        rows = {
+            row[0]: row
+            for row in self._query(
+                f"SELECT hash, time, size, fee, n_tx FROM blocks WHERE source = ? AND hash IN ({marks})",
+                [self.name] + hashes,
+            )
+        }
+        blocks = [rows[h] for h in hashes]
+
+        miners = dict(
+            self._query(
+                f"SELECT block_hash, addr FROM outputs"
+                f" WHERE block_hash IN ({marks}) AND position = 0 AND n = 0",
+                hashes,
+            )
+        )
+        fee_sums = dict(
+            self._query(
+                f"SELECT h, MAX(0, SUM(v)) FROM ("
+                f" SELECT block_hash h, COALESCE(value, 0) v FROM inputs"
+                f"  WHERE block_hash IN ({marks}) AND position > 0"
+                f" UNION ALL"
+                f" SELECT block_hash, -value FROM outputs"
+                f"  WHERE block_hash IN ({marks}) AND position > 0)"
+                f" GROUP BY h",
+                hashes + hashes,
+            )
+        )
+
+        miner_count = {}
+        miner_fees = {}
+        for block_hash in hashes:
+            miner = miners.get(block_hash)
+            if miner:
+                miner_count[miner] = miner_count.get(miner, 0) + 1
+                miner_fees[miner] = miner_fees.get(miner, 0) + fee_sums.get(block_hash, 0)
+        top_miner = max(miner_count, key=miner_count.get) if miner_count else None
+
+        address_tx_count = self._query(
+            f"SELECT COUNT(*) FROM ("
+            f" SELECT block_hash, position FROM outputs WHERE addr = ? AND block_hash IN ({marks})"
+            f" UNION"
+            f" SELECT block_hash, position FROM inputs WHERE addr = ? AND block_hash IN ({marks}))",
+            [top_miner] + hashes + [top_miner] + hashes,
+        )[0][0]
+
+        intervals = [abs(b[1] - a[1]) for a, b in zip(blocks, blocks[1:])]
+        fifth = blocks[4] if len(blocks) > 4 else None
+        return {
+            "total_transactions": sum(b[4] for b in blocks),
+            "total_size": sum(b[2] or 0 for b in blocks),
+            "avg_block_time": sum(intervals) / len(intervals) if intervals else 0,
+            "smallest_hash": min(hashes),
+            "avg_fee_5": (fifth[3] / (fifth[4] - 1)) if fifth and fifth[3] is not None and fifth[4] > 1 else 0,
+            "top_miner": top_miner,
+            "total_fees_earned": miner_fees.get(top_miner, 0),
+            "address_tx_count": address_tx_count,
+        }
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+# ----------------------------- ✦ CLI ✦ -----------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="python -m srr.store", description="Локальное хранилище блоков и запросы СРР-1/2/3"
+    )
+    parser.add_argument("--db", default=DEFAULT_PATH)
+    parser.add_argument("--source", "--base-url", dest="source", default=None,
+                        help="источник данных (по умолчанию SRR_SOURCE или blockchain.info)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    spent = commands.add_parser("spent-coinbases", help="СРР-1: потраченные coinbase")
+    spent.add_argument("start", type=int)
+    spent.add_argument("end", type=int)
+    ratio = commands.add_parser("fee-ratio", help="СРР-2: мин./макс. отношение комиссии")
+    ratio.add_argument("height", type=int)
+    day = commands.add_parser("day", help="СРР-3: статистика первых блоков дня")
+    day.add_argument("date", help="YYYY-MM-DD")
+    day.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    with open_source(args.source) as source:
+        store = BlockStore(args.db, source.name)
+        if args.command == "spent-coinbases":
+            store.ingest_heights(range(args.start, args.end + 1), source)
+            store.refresh_coinbases(args.start, args.end, source)
+            rows = store.spent_coinbases(args.start, args.end)
+            for height, block_hash, txid in rows:
+                print(f"\nБлок: {height}")
+                print(f"Хэш:  {block_hash}")
+                print(f"ID транзакции:  {txid}")
+            print(f"\nОбщее кол-во потраченных коинбэйс-транзакций: {len(rows)}")
+
+        elif args.command == "fee-ratio":
+            store.ingest_heights([args.height], source)
+            for title, item in zip(("МИНИМАЛЬНЫМ", "МАКСИМАЛЬНЫМ"), store.fee_ratio_extremes(args.height)):
+                if not item:
+                    print(f"Не удалось найти транзакцию с {title.lower()} коэффициентом.")
+                    continue
+                ratio_value, txid, fee, total = item
+                print(f"Транзакция с {title} отношением комиссии к сумме:")
+                print(f"TXID: {txid}")
+                print(f"Комиссия: {fee} сатоши")
+                print(f"Сумма: {total} сатоши")
+                print(f"Коэффициент: {ratio_value:.8f}\n")
+
+        elif args.command == "day":
+            day_ms = day_to_ms(args.date)
+            store.ingest_day(day_ms, source, limit=args.limit)
+            answers = store.day_answers(day_ms, limit=args.limit)
+            if not answers:
+                print("БЛОКОВ С ТАКОЙ ДАТОЙ - НЕТ")
+                return
+            answers["avg_block_time"] = f"{answers['avg_block_time']:.2f}"
+            print("----------------------------- ✦ РЕЗУЛЬТАТЫ ✦ -----------------------------")
+            for key, question in DAY_QUESTIONS.items():
+                print(f"{question}: {answers[key]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import json
+
+try:
+    import ijson
+except ImportError:  # без ijson блок разбирается целиком через json.load
+    ijson = None
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+SCALAR_EVENTS = {"null", "boolean", "integer", "double", "number", "string"}
+BUF_SIZE = 64 * 1024  # размер чтения ijson по умолчанию
+
+
+# ----------------------------- ✦ PARSER ✦ -----------------------------
+class _HeaderReader:
+    # Файлоподобная обёртка потока: прочитанные байты заодно идут в разбор
+    # событий, пока не начнётся массив tx - скалярные поля /rawblock идут до него
+
+    def __init__(self, fp):
+        self.fp = fp
+        self.events = ijson.sendable_list()
+        self.parser = ijson.parse_coro(self.events, use_float=True)
+
+    def read(self, size=-1):
+        data = self.fp.read(size)
+        if self.parser is not None:
+            if data:
+                self.parser.send(data)
+            elif size:  # read(0) - проверка типа потока в ijson, не конец
+                self.parser.close()
+                self.parser = None
+        return data
+
+    def headers(self):
+        for prefix, event, value in self.events:
+            if event in SCALAR_EVENTS and prefix and "." not in prefix:
+                yield "header", prefix, value
+            elif prefix == "tx" and event == "start_array":
+                self.parser = None
+                break
+        del self.events[:]
+
+
+def _iter_ijson(fp, buf_size=BUF_SIZE):
+    # Транзакции собирает C-бэкенд ijson (items) - без цикла по событиям и
+    # ObjectBuilder в Python; события разбираются только для полей блока.
+    reader = _HeaderReader(fp)
+    for tx in ijson.items(reader, "tx.item", buf_size=buf_size, use_float=True):
+        yield from reader.headers()
+        yield "tx", tx
+    yield from reader.headers()
+
+
+def _iter_json(fp, buf_size=None):
+    block = json.load(fp)
+    for key, value in block.items():
+        if key != "tx" and not isinstance(value, (dict, list)):
+            yield "header", key, value
+    for tx in block.get("tx", []):
+        yield "tx", tx
+
+
+def iter_block(fp, buf_size=BUF_SIZE):
+    # События разбора /rawblock: ("header", ключ, значение) для скалярных полей
+    # блока и ("tx", транзакция) по одной - весь блок в памяти не собирается.
+    # Маленький buf_size - для чтения одного заголовка без лишних байт из сети.
+    return _iter_ijson(fp, buf_size) if ijson is not None else _iter_json(fp)
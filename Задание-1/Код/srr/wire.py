@@ -0,0 +1,211 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import hashlib
+from array import array
+
+from srr.metrics import METRICS
+from srr.model import NO_ADDRS, Block, Tx
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+BECH32_ALPHABET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+BECH32_CONST, BECH32M_CONST = 1, 0x2BC830A3
+HRP = "bc"
+BECH32_PREFIX = HRP + "1"
+BECH32_HRP_EXPANDED = [ord(c) >> 5 for c in HRP] + [0] + [ord(c) & 31 for c in HRP]
+P2PKH_VERSION, P2SH_VERSION = b"\x00", b"\x05"
+B58_CHUNK = 58**4  # четыре цифры base58 за одно деление длинного числа
+B58_PAIRS = [a + b for a in B58_ALPHABET for b in B58_ALPHABET]  # 58*58 пар цифр
+BECH32_GENERATOR = [0x3B6A57B2, 0x26508E6D, 0x1EA119FA, 0x3D4233DD, 0x2A1462B3]
+# XOR генераторов для каждого значения 5 старших бит - один шаг polymod без цикла
+BECH32_TABLE = [0] * 32
+for _top in range(32):
+    for _i in range(5):
+        if _top >> _i & 1:
+            BECH32_TABLE[_top] ^= BECH32_GENERATOR[_i]
+
+
+# ----------------------------- ✦ HASHES ✦ -----------------------------
+def dsha256(*parts):
+    inner = hashlib.sha256()
+    for part in parts:
+        inner.update(part)
+    return hashlib.sha256(inner.digest()).digest()
+
+
+def hash160(data):
+    return hashlib.new("ripemd160", hashlib.sha256(data).digest()).digest()
+
+
+# ----------------------------- ✦ ADDRESSES ✦ -----------------------------
+def base58check(version, payload):
+    data = version + payload
+    data += dsha256(data)[:4]
+    number = int.from_bytes(data, "big")
+    pairs = B58_PAIRS
+    chunks = []
+    while number:
+        number, chunk = divmod(number, B58_CHUNK)
+        high, low = divmod(chunk, 3364)
+        chunks.append(pairs[high] + pairs[low])
+    encoded = "".join(reversed(chunks)).lstrip("1")
+    zeros = len(data) - len(data.lstrip(b"\x00"))
+    return "1" * zeros + encoded
+
+
+def _bech32_polymod(values):
+    table = BECH32_TABLE
+    chk = 1
+    for value in values:
+        chk = (chk & 0x1FFFFFF) << 5 ^ value ^ table[chk >> 25]
+    return chk
+
+
+def segwit_address(witness_version, program):
+    # BIP173 (bech32) для версии 0, BIP350 (bech32m) для версий 1+
+    bits = len(program) * 8
+    groups = -(-bits // 5)
+    number = int.from_bytes(program, "big") << (groups * 5 - bits)
+    data = [witness_version] + [number >> shift & 31 for shift in range(groups * 5 - 5, -1, -5)]
+    const = BECH32_CONST if witness_version == 0 else BECH32M_CONST
+    polymod = _bech32_polymod(BECH32_HRP_EXPANDED + data + [0] * 6) ^ const
+    checksum = [(polymod >> 5 * (5 - i)) & 31 for i in range(6)]
+    return BECH32_PREFIX + "".join([BECH32_ALPHABET[d] for d in data + checksum])
+
+
+def script_address(script):
+    # Адрес стандартного scriptPubKey так, как его показывает blockchain.info; иначе None
+    n = len(script)
+    if n == 25 and script[:3] == b"\x76\xa9\x14" and script[23:] == b"\x88\xac":
+        return base58check(P2PKH_VERSION, bytes(script[3:23]))
+    if n == 23 and script[:2] == b"\xa9\x14" and script[22] == 0x87:
+        return base58check(P2SH_VERSION, bytes(script[2:22]))
+    if n in (35, 67) and script[0] == n - 2 and script[-1] == 0xAC:
+        # P2PK: blockchain.info выводит P2PKH-адрес ключа
+        return base58check(P2PKH_VERSION, hash160(bytes(script[1:-1])))
+    if 4 <= n <= 42 and (script[0] == 0 or 0x51 <= script[0] <= 0x60) and script[1] == n - 2:
+        version = 0 if script[0] == 0 else script[0] - 0x50
+        return segwit_address(version, bytes(script[2:]))
+    return None
+
+
+# ----------------------------- ✦ PARSERS ✦ -----------------------------
+def _varint(view, pos):
+    first = view[pos]
+    if first < 0xFD:
+        return first, pos + 1
+    size = 2 if first == 0xFD else 4 if first == 0xFE else 8
+    return int.from_bytes(view[pos + 1:pos + 1 + size], "little"), pos + 1 + size
+
+
+def _parse_tx(view, pos, coinbase):
+    # Разбирает транзакцию с позиции pos; возвращает (Tx, позиция после неё).
+    # Курсор - локальное число, поля читаются срезами memoryview без копий.
+    start = pos
+    pos += 4  # version
+    segwit = view[pos] == 0 and view[pos + 1] == 1
+    if segwit:
+        pos += 2
+    body_start = pos
+
+    prevouts = []
+    count, pos = _varint(view, pos)
+    for _ in range(count):
+        prevouts.append((bytes(view[pos:pos + 32])[::-1], int.from_bytes(view[pos + 32:pos + 36], "little")))
+        length, pos = _varint(view, pos + 36)
+        pos += length + 4  # scriptSig, sequence
+
+    output_values = array("q")
+    output_addrs = []
+    count, pos = _varint(view, pos)
+    for _ in range(count):
+        output_values.append(int.from_bytes(view[pos:pos + 8], "little"))
+        length, pos = _varint(view, pos + 8)
+        output_addrs.append(script_address(view[pos:pos + length]))
+        pos += length
+    body_end = pos
+
+    if segwit:
+        for _ in prevouts:
+            items, pos = _varint(view, pos)
+            for _ in range(items):
+                length, pos = _varint(view, pos)
+                pos += length
+    pos += 4  # lock_time
+    if pos > len(view):
+        raise ValueError(f"блок обрезан: транзакция с позиции {start} выходит за конец данных")
+
+    # txid - двойной SHA-256 сериализации без witness-данных
+    if segwit:
+        txid = dsha256(view[start:start + 4], view[body_start:body_end], view[pos - 4:pos])
+        base_size = 4 + (body_end - body_start) + 4
+    else:
+        txid = dsha256(view[start:pos])
+        base_size = pos - start
+    size = pos - start
+    tx = Tx(
+        txid[::-1],
+        size,
+        base_size * 3 + size,
+        coinbase,
+        array("q", bytes(8 * len(prevouts))),
+        NO_ADDRS,
+        output_values,
+        tuple(output_addrs) if output_addrs else NO_ADDRS,
+        None,
+        None if coinbase else tuple(prevouts),
+    )
+    return tx, pos
+
+
+def bip34_height(view, pos):
+    # Высота из первого push в scriptSig coinbase (BIP34, блоки версии 2+)
+    pos += 4
+    if view[pos] == 0:
+        pos += 2
+    _, pos = _varint(view, pos)
+    length, pos = _varint(view, pos + 36)
+    script = view[pos:pos + length]
+    if not script or not 1 <= script[0] <= 8:
+        return None
+    return int.from_bytes(script[1:1 + script[0]], "little")
+
+
+def parse_block(data):
+    # Блок в wire-формате (bytes или ответ /rawblock/{hash}?format=hex) -> model.Block.
+    # Суммы и адреса входов в сериализации отсутствуют: input_sum = None,
+    # вместо них заполнены prevouts (txid, vout).
+    with METRICS.stage("decode.wire"):
+        return _parse_block(data)
+
+
+def _parse_block(data):
+    if isinstance(data, str):
+        data = bytes.fromhex(data)
+    view = memoryview(data)
+    if len(view) < 81:
+        raise ValueError("блок обрезан: нет заголовка")
+    header = view[:80]
+    version = int.from_bytes(header[:4], "little")
+    txs = []
+    height = None
+    count, pos = _varint(view, 80)
+    for i in range(count):
+        if i == 0 and version >= 2:
+            height = bip34_height(view, pos)
+        tx, pos = _parse_tx(view, pos, coinbase=i == 0)
+        txs.append(tx)
+    return Block(
+        dsha256(header)[::-1],
+        bytes(header[4:36])[::-1],
+        height,
+        int.from_bytes(header[68:72], "little"),
+        len(data),
+        None,
+        txs,
+    )
+
+
+def get_raw_block(client, block_hash):
+    # Бинарный путь вместо JSON /rawblock: ответ в hex примерно вдвое больше
+    # сериализации, но в разы меньше JSON и разбирается без json.loads
+    return parse_block(client.get(f"/rawblock/{block_hash}?format=hex").text.strip())
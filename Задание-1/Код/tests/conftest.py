@@ -0,0 +1,65 @@
+# ----------------------------- ✦ IMPS ✦ -----------------------------
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Кэш, индексы и состояние сканов - во временном каталоге, а не в ~/.cache/srr:
+# пути читаются модулями srr при импорте, поэтому задаются до него
+_TMP = tempfile.mkdtemp(prefix="srr-tests-")
+for _name, _path in (
+    ("SRR_CACHE_PATH", "cache.sqlite3"),
+    ("SRR_DAY_INDEX_PATH", "days.sqlite3"),
+    ("SRR_STORE_PATH", "store.sqlite3"),
+    ("SRR_SCAN_DIR", "scans"),
+    ("SRR_SPENT_DIR", "spent"),
+    ("SRR_BLK_INDEX_DIR", "blkindex"),
+):
+    os.environ[_name] = os.path.join(_TMP, _path)
+os.environ.pop("SRR_SOURCE", None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench.bench_blkfile import make_chain, write_blocks_dir  # noqa: E402
+from srr.fakeserver import FakeBlockchain, SyntheticChain  # noqa: E402
+
+# ----------------------------- ✦ GLOBALS ✦ -----------------------------
+HEIGHTS = 30
+TXS_PER_BLOCK = 20
+BLK_BLOCKS = 40
+
+
+# ----------------------------- ✦ FIXTURES ✦ -----------------------------
+@pytest.fixture(scope="session")
+def chain():
+    # Цепочка фейкового сервера; тесты её не меняют (reorg - на своей копии)
+    return SyntheticChain(seed=1, heights=HEIGHTS, txs_per_block=TXS_PER_BLOCK)
+
+
+@pytest.fixture(scope="session")
+def fake(chain):
+    with FakeBlockchain(source=chain) as server:
+        yield server
+
+
+@pytest.fixture
+def served(fake):
+    # Счётчики запросов сервера - с нуля для каждого теста
+    fake.reset_stats()
+    return fake
+
+
+@pytest.fixture(scope="session")
+def blk_chain():
+    # Сериализованная цепочка с тратами и сиротой: (сырые блоки, сирота, эталон)
+    return make_chain(blocks=BLK_BLOCKS, txs_per_block=TXS_PER_BLOCK, seed=1)
+
+
+@pytest.fixture
+def blocks_dir(blk_chain, tmp_path):
+    raw_blocks, orphan, _ = blk_chain
+    directory = tmp_path / "blocks"
+    directory.mkdir()
+    write_blocks_dir(str(directory), raw_blocks, orphan)
+    return directory
@@ -0,0 +1,90 @@
+import random
+from collections import Counter
+
+import pytest
+
+from srr.addresses import AddressIndex
+
+
+def random_txs(seed, count=400, pool=30):
+    rng = random.Random(seed)
+    addrs = [f"addr{i:02d}" for i in range(pool)]
+    txs = []
+    for i in range(count):
+        # Повторы внутри транзакции и адрес и во входах, и в выходах
+        outputs = rng.choices(addrs[: rng.randint(2, pool)], k=rng.randint(1, 4))
+        inputs = rng.choices(addrs, k=rng.randint(0, 3))
+        txs.append((outputs, inputs, f"tx{i}"))
+    return txs
+
+
+def build(txs):
+    index = AddressIndex()
+    for outputs, inputs, txid in txs:
+        index.add_tx(outputs, inputs, txid)
+    return index
+
+
+def first_seen(txs):
+    order = {}
+    for outputs, inputs, _ in txs:
+        for addr in list(outputs) + list(inputs):
+            order.setdefault(addr, len(order))
+    return order
+
+
+def brute_top(counts, order, n):
+    # По убыванию числа, при равенстве - встреченный раньше
+    ranked = sorted((addr for addr in counts if counts[addr]), key=lambda addr: (-counts[addr], order[addr]))
+    return [(addr, counts[addr]) for addr in ranked[:n]]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_top_matches_full_sort(seed):
+    txs = random_txs(seed)
+    index = build(txs)
+    order = first_seen(txs)
+    counts = Counter(addr for outputs, inputs, _ in txs for addr in set(outputs) | set(inputs))
+    receiving = Counter(addr for outputs, _, _ in txs for addr in set(outputs))
+    for n in (1, 3, 10, 29, 30, 100):
+        assert index.top(n) == brute_top(counts, order, n)
+        assert index.top(n, receiving=True) == brute_top(receiving, order, n)
+    assert index.top(0) == []
+    assert all(index.tx_count(addr) == counts[addr] for addr in order)
+
+
+def test_top_ties_by_first_appearance():
+    index = AddressIndex()
+    for outputs in (["c"], ["b"], ["a"], ["b", "c"], ["a"], ["c", "b", "a"]):
+        index.add_tx(outputs)
+    assert index.top(3) == [("c", 3), ("b", 3), ("a", 3)]
+    assert index.top(2) == [("c", 3), ("b", 3)]
+    index.add_tx(["a"])  # кэш топа сбрасывается
+    assert index.top(1) == [("a", 4)]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_co_occurrence_matches_sets(seed):
+    txs = random_txs(seed)
+    index = build(txs)
+    sets = [set(outputs) | set(inputs) for outputs, inputs, _ in txs]
+    addrs = sorted(first_seen(txs))
+    for a in addrs:
+        for b in addrs:
+            assert index.co_occurrence(a, b) == sum(1 for s in sets if a in s and b in s)
+    assert index.co_occurrence(addrs[0], "missing") == 0
+
+    a = addrs[0]
+    neighbours = Counter(other for s in sets if a in s for other in s if other != a)
+    assert index.cooccurring(a, 5) == brute_top(neighbours, first_seen(txs), 5)
+
+
+def test_merge_equals_one_index():
+    txs = random_txs(7)
+    whole = build(txs)
+    merged = build(txs[:150])
+    merged.merge(build(txs[150:]))
+    assert merged.names == whole.names
+    assert merged.top(10) == whole.top(10)
+    assert [merged.transactions(addr) for addr in whole.names] == [whole.transactions(addr) for addr in whole.names]
+    assert merged.co_occurrence(whole.names[0], whole.names[1]) == whole.co_occurrence(whole.names[0], whole.names[1])
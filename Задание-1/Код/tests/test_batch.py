@@ -0,0 +1,46 @@
+import io
+import json
+import time
+
+from srr.batch import RowWriter, analyze_date, run
+from srr.fakeserver import SyntheticChain
+from srr.source import DataSource
+from srr.stats import day_to_ms
+
+DATES = ["2009-01-06", "2009-01-02", "2009-01-03", "2009-01-05", "2009-01-04"]
+FAILING = "2009-01-05"
+
+
+class SlowChain(DataSource):
+    # Ранние даты отвечают дольше поздних; одна дата падает
+    name = "synthetic"
+
+    def __init__(self, chain):
+        self.chain = chain
+
+    def get_blocks_by_time(self, timestamp):
+        order = sorted(DATES).index(next(day for day in DATES if day_to_ms(day) == timestamp))
+        time.sleep(0.05 * (len(DATES) - order))
+        if timestamp == day_to_ms(FAILING):
+            raise ConnectionError("обрыв")
+        return self.chain.day(timestamp)
+
+    def get_block_by_hash(self, block_hash):
+        return self.chain.block_by_hash(block_hash)
+
+
+def test_rows_in_date_order_when_a_date_fails():
+    chain = SyntheticChain(seed=6, heights=300, txs_per_block=2)
+    source = SlowChain(chain)
+    out = io.StringIO()
+    rows = run(DATES, source, workers=len(DATES), limit=3, writer=RowWriter(out, "jsonl"))
+    written = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [row["date"] for row in written] == sorted(DATES)
+    assert written == rows
+
+    by_date = {row["date"]: row for row in rows}
+    assert by_date[FAILING]["error"] == "ConnectionError: обрыв"
+    assert by_date["2009-01-02"]["blocks"] == 0
+    assert by_date["2009-01-03"]["blocks"] == 3
+    for day in ("2009-01-03", "2009-01-04"):
+        assert by_date[day] == analyze_date(source, day, limit=3)
@@ -0,0 +1,201 @@
+import random
+
+from bench.bench_blkfile import GENESIS_TIME, p2pkh, serialize_tx, varint, write_blocks_dir
+from srr import blkfile
+from srr.blkfile import BlkIndex, BlkSource, spent_coinbases, write_blk_file
+from srr.wire import dsha256
+
+
+def block_id(raw):
+    return dsha256(raw[:80])[::-1].hex()
+
+
+def child(parent, height, rng):
+    # Блок из одной coinbase поверх parent
+    coinbase = serialize_tx(
+        [(bytes(32), 0xFFFFFFFF, b"\x03" + height.to_bytes(3, "little") + rng.randbytes(8))],
+        [(5000000000, p2pkh(rng))],
+    )
+    header = (
+        (0x20000000).to_bytes(4, "little")
+        + dsha256(parent[:80])
+        + rng.randbytes(32)
+        + (GENESIS_TIME + height * 600).to_bytes(4, "little")
+        + rng.randbytes(8)
+    )
+    return header + varint(1) + coinbase
+
+
+def test_heights_skip_orphan(blk_chain, blocks_dir, tmp_path):
+    raw_blocks, orphan, _ = blk_chain
+    index = BlkIndex(str(blocks_dir), str(tmp_path / "index"))
+    assert index.update() == len(raw_blocks) + 1
+    assert len(index) == len(raw_blocks)
+    assert len(index.entries) == len(raw_blocks) + 1
+    for height, raw in enumerate(raw_blocks):
+        assert index.block_hash(height) == block_id(raw)
+        assert index.height(block_id(raw)) == height
+    # Сирота на высоте len-2 - в индексе, но не в основной цепочке
+    assert index.height(block_id(orphan)) is None
+    first_day = index.heights_between(GENESIS_TIME, GENESIS_TIME + 86400)
+    assert first_day == list(range(len(raw_blocks)))
+
+
+def test_longer_fork_takes_over(blk_chain, blocks_dir, tmp_path):
+    raw_blocks, orphan, _ = blk_chain
+    index = BlkIndex(str(blocks_dir), str(tmp_path / "index"))
+    index.update()
+    fork_height = len(raw_blocks) - 2
+    rng = random.Random(5)
+    first = child(orphan, fork_height + 1, rng)
+    second = child(first, fork_height + 2, rng)
+    write_blk_file(str(blocks_dir / "blk00002.dat"), [first, second])
+
+    assert index.update() == 2
+    assert len(index) == len(raw_blocks) + 1
+    assert index.height(block_id(orphan)) == fork_height
+    assert index.height(block_id(second)) == fork_height + 2
+    assert index.height(block_id(raw_blocks[-1])) is None  # старая вершина ушла из цепочки
+    assert index.block_hash(fork_height - 1) == block_id(raw_blocks[fork_height - 1])
+
+
+def test_index_resumes(blk_chain, blocks_dir, tmp_path):
+    raw_blocks = blk_chain[0]
+    BlkIndex(str(blocks_dir), str(tmp_path / "index")).update()
+    index = BlkIndex(str(blocks_dir), str(tmp_path / "index"))
+    assert len(index) == len(raw_blocks)
+    assert index.update() == 0
+    # Дописанный в файл блок дочитывается с сохранённого смещения
+    extra = child(raw_blocks[-1], len(raw_blocks), random.Random(6))
+    with open(blocks_dir / "blk00001.dat", "ab") as f:
+        f.write(bytes.fromhex("fabfb5da") + len(extra).to_bytes(4, "little") + extra)
+    assert index.update() == 1
+    assert index.block_hash(len(raw_blocks)) == block_id(extra)
+
+
+def test_xor_obfuscated_files(blk_chain, tmp_path):
+    raw_blocks, orphan, _ = blk_chain
+    directory = tmp_path / "xor"
+    directory.mkdir()
+    write_blocks_dir(str(directory), raw_blocks, orphan, key=bytes(range(1, 9)))
+    source = BlkSource(str(directory), str(tmp_path / "index"))
+    try:
+        assert len(source.index) == len(raw_blocks)
+        assert source.get_block_by_height(7)["hash"] == block_id(raw_blocks[7])
+    finally:
+        source.close()
+
+
+def test_latest_block_follows_new_files(blk_chain, blocks_dir, tmp_path):
+    raw_blocks = blk_chain[0]
+    source = BlkSource(str(blocks_dir), str(tmp_path / "index"))
+    try:
+        assert source.get_latest_block() == {"hash": block_id(raw_blocks[-1]), "height": len(raw_blocks) - 1}
+        extra = child(raw_blocks[-1], len(raw_blocks), random.Random(7))
+        write_blk_file(str(blocks_dir / "blk00002.dat"), [extra])
+        assert source.get_latest_block() == {"hash": block_id(extra), "height": len(raw_blocks)}
+    finally:
+        source.close()
+
+
+def test_find_tx(blk_chain, blocks_dir, tmp_path):
+    truth = blk_chain[2]
+    source = BlkSource(str(blocks_dir), str(tmp_path / "index"))
+    try:
+        for txid in truth["fees"]:
+            assert source.get_transaction(txid)["hash"] == txid
+        assert source.get_transaction("ab" * 32) is None
+    finally:
+        source.close()
+
+
+def test_find_tx_prefix_collisions(blk_chain, blocks_dir, tmp_path, monkeypatch):
+    # Префикс из одного байта: у транзакций разных блоков он совпадает постоянно
+    monkeypatch.setattr(blkfile, "txid_prefix", lambda txid: int(txid[:2], 16) or 1)
+    truth = blk_chain[2]
+    source = BlkSource(str(blocks_dir), str(tmp_path / "index"))
+    try:
+        source.index_transactions(len(source.index) // 2)
+        found = {txid: source.find_tx(txid)[1] for txid in truth["fees"]}
+        assert source.collisions
+        assert None not in found.values()
+    finally:
+        source.close()
+    # Продолжение с сохранённого состояния находит те же высоты
+    source = BlkSource(str(blocks_dir), str(tmp_path / "index"))
+    try:
+        assert {txid: source.find_tx(txid)[1] for txid in truth["fees"]} == found
+    finally:
+        source.close()
+
+
+def test_spent_coinbases(blk_chain, blocks_dir, tmp_path):
+    truth = blk_chain[2]
+    source = BlkSource(str(blocks_dir), str(tmp_path / "index"))
+    try:
+        last = len(source.index) - 1
+        found = spent_coinbases(source, 0, last, str(tmp_path / "spent"))
+        assert found
+        assert [height for height, _, _ in found] == sorted(truth["spent"])
+        assert all(block_hash == source.index.block_hash(height) for height, block_hash, _ in found)
+    finally:
+        source.close()
+
+
+def append_blocks(path, blocks):
+    with open(path, "ab") as f:
+        for raw in blocks:
+            f.write(bytes.fromhex("fabfb5da") + len(raw).to_bytes(4, "little") + raw)
+
+
+def test_block_appended_to_mapped_file(blk_chain, blocks_dir, tmp_path):
+    raw_blocks = blk_chain[0]
+    source = BlkSource(str(blocks_dir), str(tmp_path / "index"))
+    try:
+        for height in range(len(raw_blocks)):  # отображены оба файла
+            source.get_block_by_height(height)
+        extra = child(raw_blocks[-1], len(raw_blocks), random.Random(8))
+        append_blocks(blocks_dir / "blk00000.dat", [extra])
+        assert source.get_latest_block()["height"] == len(raw_blocks)
+        assert source.get_block_by_height(len(raw_blocks))["hash"] == block_id(extra)
+    finally:
+        source.close()
+
+
+def test_fork_switch_rebuilds_height_state(blk_chain, blocks_dir, tmp_path):
+    raw_blocks, orphan, _ = blk_chain
+    fork_height = len(raw_blocks) - 2
+    probe = BlkSource(str(blocks_dir), str(tmp_path / "probe"))
+    old_tip_txs = [tx["hash"] for tx in probe.get_block_by_height(fork_height + 1)["tx"]]
+    fork_txs = [tx["hash"] for tx in probe.get_block_by_height(fork_height)["tx"]]
+    probe.close()
+
+    source = BlkSource(str(blocks_dir), str(tmp_path / "index"))
+    try:
+        spent_dir = str(tmp_path / "index" / "spent")
+        spent_coinbases(source, 0, fork_height + 1, spent_dir)
+        assert source.get_transaction(old_tip_txs[-1]) is not None
+        assert list(source.fetch_coinbases([fork_height + 1]))[0][1][0][0] == block_id(raw_blocks[-1])
+
+        # Форк от сироты становится длиннее: блоки с высоты fork_height сменились
+        rng = random.Random(9)
+        first = child(orphan, fork_height + 1, rng)
+        second = child(first, fork_height + 2, rng)
+        append_blocks(blocks_dir / "blk00000.dat", [first, second])
+        assert source.get_latest_block() == {"hash": block_id(second), "height": fork_height + 2}
+
+        assert source.get_transaction(old_tip_txs[-1]) is None
+        # Сирота - копия блока fork_height с другим nonce: те же транзакции, новый блок
+        assert source.get_transaction(fork_txs[-1])["block_height"] == fork_height
+        [(block_hash, _, _)] = list(source.fetch_coinbases([fork_height + 1]))[0][1]
+        assert block_hash == block_id(first)
+
+        fresh = BlkSource(str(blocks_dir), str(tmp_path / "fresh"))
+        try:
+            last = len(fresh.index) - 1
+            expected = spent_coinbases(fresh, 0, last, str(tmp_path / "fresh" / "spent"))
+            assert spent_coinbases(source, 0, last, spent_dir) == expected
+        finally:
+            fresh.close()
+    finally:
+        source.close()
@@ -0,0 +1,103 @@
+import time
+
+from srr import cache
+from srr.cache import (
+    LATEST_TTL,
+    RECENT_BLOCK_TTL,
+    RECENT_DAY_TTL,
+    UNSPENT_TX_TTL,
+    MemoryCache,
+    ResponseCache,
+    cache_key,
+    cache_path,
+    get_cache,
+    ttl_for,
+)
+from srr.client import BASE_URL, HttpClient
+from srr.stats import BlockStats
+
+NOW_MS = int(time.time() * 1000)
+
+
+def test_key_keeps_scheme_and_host():
+    assert cache_key("https://Blockchain.info/rawtx/ab") == "https://blockchain.info/rawtx/ab"
+    assert cache_key("http://127.0.0.1:8000/block-height/5?format=json") == (
+        "http://127.0.0.1:8000/block-height/5?format=json"
+    )
+    keys = {cache_key(origin + "/rawblock/00") for origin in
+            ("https://blockchain.info", "http://blockchain.info", "http://127.0.0.1:8000", "http://127.0.0.1:8001")}
+    assert len(keys) == 4
+
+
+def test_default_file_per_host():
+    assert cache_path(BASE_URL, BASE_URL) == cache.DEFAULT_PATH
+    assert cache_path("https://BLOCKCHAIN.info/", BASE_URL) == cache.DEFAULT_PATH
+    mirror = cache_path("http://127.0.0.1:8000", BASE_URL)
+    assert mirror != cache.DEFAULT_PATH
+    assert mirror != cache_path("http://127.0.0.1:8001", BASE_URL)
+    assert HttpClient("http://127.0.0.1:8000").cache is get_cache(mirror)
+
+
+def test_ttl_by_endpoint():
+    host = "https://blockchain.info"
+    assert ttl_for(f"{host}/blocks/{NOW_MS}?format=json", []) == RECENT_DAY_TTL
+    assert ttl_for(f"{host}/blocks/1231006505000?format=json", []) is None
+    assert ttl_for(f"{host}/latestblock", {}) == LATEST_TTL
+    recent = {"blocks": [{"time": int(time.time()) - 60}]}
+    assert ttl_for(f"{host}/block-height/900000?format=json", recent) == RECENT_BLOCK_TTL
+    assert ttl_for(f"{host}/block-height/1?format=json", {"blocks": [{"time": 1231469665}]}) is None
+    assert ttl_for(f"{host}/rawtx/ab", {"out": [{"spent": True}, {"spent": False}]}) == UNSPENT_TX_TTL
+    assert ttl_for(f"{host}/rawtx/ab", {"out": [{"spent": True}]}) is None
+    assert ttl_for(f"{host}/rawblock/ab", {"tx": []}) is None
+
+
+def test_response_cache_expiry_and_eviction(tmp_path):
+    store = ResponseCache(str(tmp_path / "cache.sqlite3"), max_bytes=10**6)
+    store.put("k", {"a": 1})
+    store.put("old", {"a": 2}, ttl=-1)
+    assert store.get("k") == {"a": 1}
+    assert store.get("old") is None
+    assert store.open("k").read() == b'{"a":1}'
+    store.close()
+
+    small = ResponseCache(str(tmp_path / "small.sqlite3"), max_bytes=300)
+    for i in range(20):
+        small.put(f"k{i}", {"payload": "x" * 40 + str(i)})
+    assert small.total <= 300
+    assert small.get("k19") is not None and small.get("k0") is None
+
+
+def test_memory_cache_ttl_and_lru():
+    memory = MemoryCache(max_bytes=100)
+    memory.put("a", "A", 40)
+    memory.put("expired", "E", 10, ttl=-1)
+    assert memory.get("expired") is None
+    memory.put("b", "B", 40)
+    assert memory.get("a") == "A"  # a свежее b
+    memory.put("c", "C", 40)
+    assert memory.get("b") is None and memory.get("a") == "A" and memory.get("c") == "C"
+    memory.put("huge", "H", 101)
+    assert memory.get("huge") is None
+
+
+def test_client_reads_warm_cache(served, chain, tmp_path):
+    store = ResponseCache(str(tmp_path / "cache.sqlite3"))
+    client = HttpClient(served.base_url, cache=store, memory=False)
+    first = client.get_json("/block-height/3?format=json")
+    assert served.requests == 1
+    assert client.get_json("/block-height/3?format=json") == first
+    assert served.requests == 1
+    assert store.get(cache_key(served.base_url + "/block-height/3?format=json")) == first
+
+    # Поток /rawblock попадает в кэш, только если дочитан до конца
+    block_hash = chain.block(4)["hash"]
+    cold, warm = BlockStats(), BlockStats()
+    for stats in (cold, warm):
+        stream = client.open_stream(f"/rawblock/{block_hash}")
+        try:
+            stats.add_stream(stream)
+        finally:
+            stream.close()
+    assert served.requests == 2
+    assert warm.blocks == cold.blocks
+    client.close()
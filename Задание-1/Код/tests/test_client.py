@@ -0,0 +1,70 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from srr.client import HttpClient, SingleFlight
+from srr.fakeserver import FakeBlockchain
+
+WAITERS = 8
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "не дождались"
+        time.sleep(0.005)
+
+
+def run_coalesced(flight, fn):
+    # WAITERS вызовов одного ключа; ведущий отпускается, когда остальные уже ждут
+    release = threading.Event()
+    calls = []
+
+    def leader():
+        calls.append(1)
+        release.wait(5)
+        return fn()
+
+    with ThreadPoolExecutor(max_workers=WAITERS) as pool:
+        futures = [pool.submit(flight.do, "key", leader) for _ in range(WAITERS)]
+        wait_for(lambda: flight.stats()["coalesced"] == WAITERS - 1)
+        release.set()
+    return futures, calls
+
+
+def test_single_flight_shares_result():
+    flight = SingleFlight()
+    futures, calls = run_coalesced(flight, lambda: object())
+    results = [future.result() for future in futures]
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert flight.stats() == {"leaders": 1, "coalesced": WAITERS - 1, "in_flight": 0}
+    # Не кэш: следующий вызов после завершения снова выполняет fn
+    assert flight.do("key", lambda: 2) == 2
+
+
+def test_single_flight_shares_error():
+    flight = SingleFlight()
+
+    def fail():
+        raise KeyError("boom")
+
+    futures, calls = run_coalesced(flight, fail)
+    assert len(calls) == 1
+    for future in futures:
+        with pytest.raises(KeyError):
+            future.result()
+    assert flight.stats()["in_flight"] == 0
+
+
+def test_client_coalesces_concurrent_requests(chain):
+    with FakeBlockchain(source=chain, latency=0.2) as fake:
+        client = HttpClient(fake.base_url, cache=False, memory=False, flight=SingleFlight())
+        with ThreadPoolExecutor(max_workers=WAITERS) as pool:
+            results = list(pool.map(lambda _: client.get_json("/block-height/7?format=json"), range(WAITERS)))
+        client.close()
+        assert fake.requests == 1
+        assert all(result is results[0] for result in results)
+        assert results[0]["blocks"][0]["hash"] == chain.block(7)["hash"]
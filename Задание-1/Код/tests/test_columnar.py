@@ -0,0 +1,46 @@
+import copy
+
+import pytest
+
+from srr.columnar import BlockColumns, fee_stats, ratio_extremes
+from srr.fees import fee_ratio_items, min_max_ratio
+
+
+def edge_block(block):
+    # Крайние случаи правил комиссии поверх настоящего блока
+    block = copy.deepcopy(block)
+    txs = block["tx"]
+    del txs[1]["inputs"][0]["prev_out"]["value"]  # неполные входы
+    txs[2]["out"] = [{"value": 0}]  # нулевая сумма выходов
+    txs[3]["out"] = [{"value": sum(i["prev_out"]["value"] for i in txs[3]["inputs"]) + 1}]  # комиссия < 0
+    txs[4]["inputs"] = []  # нет входов
+    # Равные наименьшие отношения: при равенстве - первая транзакция блока
+    for tx in txs[5:8]:
+        tx["inputs"] = [{"prev_out": {"value": 10**9 + 1}}]
+        tx["out"] = [{"value": 10**9}]
+    return block
+
+
+@pytest.mark.parametrize("height", [0, 1, 7, 29])
+def test_matches_fees_engine(chain, height):
+    blocks = [chain.block(height)] + ([edge_block(chain.block(height))] if height else [])
+    for block in blocks:
+        items = list(fee_ratio_items(block))
+        cols = BlockColumns.from_blocks([block])
+        assert ratio_extremes(cols) == min_max_ratio(items)
+        if block is not blocks[0]:
+            assert ratio_extremes(cols)[0][1] == block["tx"][5]["hash"]
+        stats = fee_stats(cols)
+        assert stats["count"] == len(items)
+        if items:
+            low, high = min_max_ratio(items)
+            assert (stats["ratio_min"], stats["ratio_max"]) == (low[0], high[0])
+            assert stats["total_fee"] == sum(item[2] for item in items)
+
+
+def test_many_blocks_at_once(chain):
+    blocks = [chain.block(h) for h in range(chain.heights)]
+    items = [item for block in blocks for item in fee_ratio_items(block)]
+    cols = BlockColumns.from_blocks(blocks)
+    assert ratio_extremes(cols) == min_max_ratio(items)
+    assert fee_stats(cols)["count"] == len(items)
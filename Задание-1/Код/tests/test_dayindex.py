@@ -0,0 +1,95 @@
+import pytest
+
+from srr import dayindex
+from srr.dayindex import DAY, DayIndex, day_start, summary_answers
+from srr.fakeserver import BLOCK_INTERVAL, GENESIS_TIME, FakeBlockchain, SyntheticChain
+from srr.source import BlockchainInfoSource
+from srr.stats import BlockStats, day_answers
+
+MIDNIGHT = day_start(GENESIS_TIME) + DAY  # конец суток генезиса
+
+
+@pytest.fixture
+def two_days():
+    # Цепочка переходит через полночь: блоки в двух сутках
+    chain = SyntheticChain(seed=2, heights=60, txs_per_block=6)
+    with FakeBlockchain(source=chain) as fake:
+        with BlockchainInfoSource(fake.base_url, cache=False) as source:
+            yield chain, fake, source
+
+
+def day_requests(fake):
+    return fake.by_endpoint.get("/blocks", {}).get("requests", 0)
+
+
+def brute(chain, start, end):
+    blocks = [chain.block(h) for h in range(chain.heights)]
+    return [b["hash"] for b in sorted(blocks, key=lambda b: b["time"]) if start <= b["time"] < end]
+
+
+def test_window_bisection_at_day_boundaries(two_days, tmp_path):
+    chain, fake, source = two_days
+    index = DayIndex(source, str(tmp_path / "days.sqlite3"))
+    assert index.day(GENESIS_TIME).blocks and index.day(MIDNIGHT).blocks
+    last = GENESIS_TIME + (chain.heights - 1) * BLOCK_INTERVAL
+    windows = [
+        (MIDNIGHT - 1, MIDNIGHT + 1),
+        (MIDNIGHT, MIDNIGHT),
+        (MIDNIGHT - BLOCK_INTERVAL, MIDNIGHT + BLOCK_INTERVAL),
+        (day_start(GENESIS_TIME), MIDNIGHT),
+        (MIDNIGHT, MIDNIGHT + DAY),
+        (GENESIS_TIME, last),
+        (GENESIS_TIME, last + 1),
+        (GENESIS_TIME + 1, GENESIS_TIME + 3 * BLOCK_INTERVAL + 1),
+    ]
+    fake.reset_stats()
+    for start, end in windows:
+        assert [b["hash"] for b in index.window(start, end)] == brute(chain, start, end)
+        # Миллисекунды - то же окно
+        assert [b["hash"] for b in index.window(start * 1000, end * 1000)] == brute(chain, start, end)
+    assert fake.requests == 0  # сутки уже в памяти
+
+    details = index.window(MIDNIGHT - 3 * BLOCK_INTERVAL, MIDNIGHT + 3 * BLOCK_INTERVAL, details=True)
+    assert [(b["size"], b["n_tx"], b["fee"]) for b in details] == [
+        (chain.block(b["height"])["size"], chain.block(b["height"])["n_tx"], chain.block(b["height"])["fee"])
+        for b in details
+    ]
+
+
+def test_final_and_recent_days(two_days, tmp_path, monkeypatch):
+    chain, fake, source = two_days
+    path = str(tmp_path / "days.sqlite3")
+    index = DayIndex(source, path)
+    assert index.day(GENESIS_TIME).final
+    fake.reset_stats()
+    # Прошедшие сутки окончательны: из памяти, а в новом процессе - с диска
+    assert DayIndex(source, path).day(GENESIS_TIME * 1000).blocks == index.day(GENESIS_TIME).blocks
+    assert fake.requests == 0
+
+    # Сутки ещё не окончательны: перезапрос раз в RECENT_DAY_TTL, сводки сохраняются
+    monkeypatch.setattr(dayindex, "TIME_SLACK", 10**12)
+    index = DayIndex(source, str(tmp_path / "recent.sqlite3"))
+    day = index.day(MIDNIGHT)
+    assert not day.final
+    index.fill(day.blocks[:2])
+    chain.mine(3)
+    fake.reset_stats()
+    assert index.day(MIDNIGHT) is day
+    assert fake.requests == 0
+    monkeypatch.setattr(dayindex, "RECENT_DAY_TTL", -1)
+    refreshed = index.day(MIDNIGHT)
+    assert day_requests(fake) == 1 and fake.requests == 1
+    assert [b["hash"] for b in refreshed.blocks] == brute(chain, MIDNIGHT, MIDNIGHT + DAY)
+    assert refreshed.blocks[0]["size"] == day.blocks[0]["size"] is not None
+
+
+def test_answers_match_stats(two_days, tmp_path):
+    chain, fake, source = two_days
+    for timestamp in (GENESIS_TIME, MIDNIGHT):
+        index = DayIndex(source, str(tmp_path / "days.sqlite3"))
+        summaries = index.summaries(timestamp, limit=10)
+        stats = BlockStats()
+        for summary in summaries:
+            stats.add_block(source.get_block_by_hash(summary["hash"]))
+        expected = day_answers(stats)
+        assert summary_answers(summaries) == {key: expected[key] for key in summary_answers(summaries)}
@@ -0,0 +1,58 @@
+import pytest
+import requests
+
+from srr.cache import ResponseCache
+from srr.client import HttpClient
+from srr.fakeserver import FakeBlockchain, FakeServerProcess, ReplaySource, SyntheticChain
+
+PATHS = ["/block-height/3?format=json", "/rawtx/{txid}", "/latestblock"]
+
+
+def test_chain_is_deterministic(chain):
+    again = SyntheticChain(seed=1, heights=chain.heights, txs_per_block=chain.txs_per_block)
+    assert again.block(9) == chain.block(9)
+    tx = chain.block(9)["tx"][2]
+    assert chain.transaction(tx["hash"]) == tx
+    assert chain.block_by_hash(chain.block(9)["hash"])["height"] == 9
+    assert chain.block(chain.heights) is None
+
+
+def test_reorg_replaces_top_blocks():
+    chain = SyntheticChain(seed=2, heights=10, txs_per_block=5)
+    before = [chain.block(h)["hash"] for h in range(10)]
+    assert chain.reorg(depth=2, extra=1) == 10
+    after = [chain.block(h)["hash"] for h in range(11)]
+    assert after[:8] == before[:8]
+    assert after[8:10] != before[8:10]
+    assert chain.block(9)["prev_block"] == after[8]
+
+
+def test_replay_of_recorded_responses(served, chain, tmp_path):
+    path = str(tmp_path / "recorded.sqlite3")
+    paths = [p.format(txid=chain.block(3)["tx"][1]["hash"]) for p in PATHS]
+    recorder = HttpClient(served.base_url, cache=ResponseCache(path), memory=False)
+    recorded = [recorder.get_json(p) for p in paths]
+    recorder.close()
+
+    with FakeBlockchain(source=ReplaySource(path, origin=served.base_url)) as replay:
+        client = HttpClient(replay.base_url, cache=False, retries=0)
+        assert [client.get_json(p) for p in paths] == recorded
+        # Чего нет в записи - 404, а не ответ другого хоста
+        with pytest.raises(requests.HTTPError):
+            client.get_json("/block-height/4?format=json")
+        client.close()
+
+    # Запись с другого хоста по этому origin не находится
+    assert ReplaySource(path).payload(paths[0]) is None
+
+
+def test_server_process_controls():
+    with FakeServerProcess("--heights", 5, "--txs-per-block", 3) as fake:
+        client = HttpClient(fake.base_url, cache=False)
+        assert client.get_json("/latestblock")["height"] == 4
+        fake.reset_stats()
+        client.get_json("/block-height/1?format=json")
+        assert fake.stats()["requests"] == 1
+        fake.reorg(1, 2)
+        assert client.get_json("/latestblock")["height"] == 6
+        client.close()
@@ -0,0 +1,112 @@
+import random
+
+import numpy as np
+import pytest
+
+from srr.feemarket import FeeMarket, QuantileSketch, analyze_range
+from srr.source import BlockchainInfoSource
+
+QS = (0.0, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1.0)
+
+
+def random_splits(values, rng, parts):
+    cuts = sorted(rng.sample(range(1, len(values)), parts - 1))
+    return [values[a:b] for a, b in zip([0] + cuts, cuts + [len(values)])]
+
+
+def merged(chunks, rng, **options):
+    sketches = []
+    for chunk in chunks:
+        sketch = QuantileSketch(**options)
+        sketch.add(chunk)
+        sketches.append(sketch)
+    rng.shuffle(sketches)
+    result = sketches[0]
+    for sketch in sketches[1:]:
+        result.merge(sketch)
+    return result
+
+
+@pytest.mark.parametrize("max_buckets", [2048, 64])
+def test_sketch_merge_is_exact(max_buckets):
+    rng = random.Random(max_buckets)
+    # Диапазон в десятки порядков: при 64 корзинах младшие сливаются
+    values = np.exp(np.random.default_rng(1).normal(0, 6, 20000))
+    values[::50] = 0.0
+    one = QuantileSketch(max_buckets=max_buckets)
+    one.add(values)
+    assert len(one.counts) <= max_buckets
+    for trial in range(5):
+        chunks = random_splits(values, rng, rng.randint(2, 40))
+        assert merged(chunks, rng, max_buckets=max_buckets).same(one)
+    # Слияние по частям - то же, что добавление частями в один скетч
+    streamed = QuantileSketch(max_buckets=max_buckets)
+    for chunk in random_splits(values, rng, 17):
+        streamed.add(chunk)
+    assert streamed.same(one)
+
+
+@pytest.mark.parametrize("alpha", [0.005, 0.02])
+def test_sketch_quantiles_within_alpha(alpha):
+    values = np.random.default_rng(2).lognormal(-5, 2, 50000)
+    sketch = QuantileSketch(alpha=alpha)
+    sketch.add(values)
+    # Скетч отдаёт порядковую статистику floor(q * (n - 1)) - method="lower"
+    exact = np.quantile(values, QS, method="lower")
+    for got, want in zip(sketch.quantiles(QS), exact):
+        assert abs(got - want) <= alpha * want * (1 + 1e-9)
+    assert QuantileSketch().quantiles([0.5]) == [None]
+
+
+def tied_block(height, rng):
+    # Много транзакций с одинаковым отношением комиссии к сумме
+    txs = [{"hash": f"{height:02x}cb", "inputs": [{}], "out": [{"value": 5000000000}], "size": 100}]
+    for i in range(40):
+        out = rng.choice((1000, 2000, 5000)) * 100
+        fee = out // 100 * rng.choice((1, 2, 3))
+        txs.append({
+            "hash": f"{height:02x}{rng.getrandbits(48):012x}",
+            "inputs": [{"prev_out": {"value": out + fee}}],
+            "out": [{"value": out}],
+            "size": 200 + i,
+        })
+    return {"height": height, "hash": f"{height:064x}", "time": height, "tx": txs}
+
+
+def test_top_k_ties_match_full_sort():
+    rng = random.Random(3)
+    blocks = [tied_block(height, rng) for height in range(6)]
+    items = []
+    for block in blocks:
+        for tx in block["tx"][1:]:
+            out = tx["out"][0]["value"]
+            fee = tx["inputs"][0]["prev_out"]["value"] - out
+            items.append((fee / out, tx["hash"], fee, out, block["height"]))
+    highest = sorted(items, key=lambda item: (item[0], item[1]), reverse=True)[:7]
+    # Минимум: по возрастанию отношения, при равенстве - больший txid
+    lowest = sorted(items, key=lambda item: (-item[0], item[1]), reverse=True)[:7]
+
+    one = FeeMarket(top=7)
+    for block in blocks:
+        one.add_block(block)
+    assert one.highest.items() == highest
+    assert one.lowest.items() == lowest
+
+    # По частям, слитым в другом порядке, - то же состояние
+    parts = [FeeMarket(top=7) for _ in range(3)]
+    for i, block in enumerate(blocks):
+        parts[i % 3].add_block(block)
+    combined = parts[0].merge(parts[1]).merge(parts[2])
+    assert combined.highest.items() == highest and combined.lowest.items() == lowest
+
+
+def test_range_merge_equals_one_pass(fake, chain):
+    with BlockchainInfoSource(fake.base_url, cache=False) as source:
+        one = analyze_range(source, 0, chain.heights - 1)
+        middle = chain.heights // 2
+        first = analyze_range(source, 0, middle - 1)
+        second = analyze_range(source, middle, chain.heights - 1)
+    assert first.merge(second).same(one)
+    assert one.report()["tx_count"] == sum(len(chain.block(h)["tx"]) - 1 for h in range(chain.heights)) - sum(
+        1 for h in range(chain.heights) for tx in chain.block(h)["tx"][1:] if tx["fee"] <= 0
+    )
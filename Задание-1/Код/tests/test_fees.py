@@ -0,0 +1,65 @@
+import copy
+
+from srr import fees, model
+from srr.model import parse_block
+
+
+def stripped(block, every=3):
+    # У каждой every-й транзакции входы без prev_out.value - её нужно догружать
+    block = copy.deepcopy(block)
+    for tx in block["tx"][1::every]:
+        for inp in tx["inputs"]:
+            del inp["prev_out"]["value"]
+    return block
+
+
+def both(block, get_transaction=None, **kwargs):
+    errors = ([], [])
+    by_json = list(fees.fee_ratio_items(
+        block, get_transaction, on_error=lambda txid, e: errors[0].append(txid), **kwargs
+    ))
+    by_model = list(model.fee_ratio_items(
+        parse_block(block), get_transaction, on_error=lambda txid, e: errors[1].append(txid), **kwargs
+    ))
+    return by_json, by_model, errors
+
+
+def test_same_items_on_full_block(chain):
+    for height in (0, 1, chain.heights - 1):
+        by_json, by_model, _ = both(chain.block(height))
+        assert by_model == by_json
+    assert len(by_json) == len([tx for tx in chain.block(chain.heights - 1)["tx"] if tx["fee"] > 0])
+
+
+def test_same_items_with_lookups(chain):
+    block = chain.block(chain.heights // 2)
+    expected = list(fees.fee_ratio_items(block))
+    by_json, by_model, _ = both(stripped(block), chain.transaction, workers=3)
+    assert by_json == by_model == expected
+    # Без источника догружаемые транзакции пропускаются одинаково
+    by_json, by_model, _ = both(stripped(block))
+    assert by_json == by_model
+    assert len(by_json) < len(expected)
+
+
+def test_same_items_on_lookup_errors(chain):
+    block = stripped(chain.block(7), every=2)
+    failing = block["tx"][1]["hash"]
+
+    def get_transaction(txid):
+        if txid == failing:
+            raise OSError("timeout")
+        return chain.transaction(txid)
+
+    by_json, by_model, errors = both(block, get_transaction)
+    assert by_json == by_model
+    assert errors == ([failing], [failing])
+    assert failing not in {txid for _, txid, _, _ in by_json}
+
+
+def test_fee_rule():
+    assert fees.fee_from_sums(None, 10) is None
+    assert fees.fee_from_sums(0, 10) is None
+    assert fees.fee_from_sums(10, 0) is None
+    assert fees.fee_from_sums(10, 10) is None
+    assert fees.fee_from_sums(15, 10) == 5
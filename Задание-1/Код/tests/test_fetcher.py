@@ -0,0 +1,56 @@
+import time
+
+import pytest
+
+from srr.client import HttpClient, TokenBucket
+from srr.fakeserver import FakeBlockchain
+from srr.fetcher import CoinbaseFetcher
+
+
+def test_coinbases_in_height_order(served, chain):
+    fetcher = CoinbaseFetcher(served.base_url, workers=4, rate=None, cache=False)
+    heights = list(range(chain.heights))[::-1] + [chain.heights]
+    results = list(fetcher.fetch(heights))
+    fetcher.client.close()
+
+    assert [height for height, _ in results] == heights
+    for height, found in results[:-1]:
+        block = chain.block(height)
+        [(block_hash, txid, tx)] = found
+        assert (block_hash, txid) == (block["hash"], block["tx"][0]["hash"])
+        assert tx == block["tx"][0]
+    # Высота за вершиной - исключение в результате, а не обрыв всего прогона
+    assert isinstance(results[-1][1], Exception)
+    assert served.requests == 2 * chain.heights + 1
+
+
+def test_rate_limit(served):
+    fetcher = CoinbaseFetcher(served.base_url, workers=4, rate=40, cache=False)
+    started = time.monotonic()
+    list(fetcher.fetch(range(10)))
+    fetcher.client.close()
+    # 20 запросов: 4 из запаса ведра, остальные 16 - не чаще 40 в секунду
+    assert time.monotonic() - started >= 16 / 40 * 0.9
+
+
+def test_retries_server_errors(chain):
+    with FakeBlockchain(source=chain, error_rate=0.3, rate_429=0.2, retry_after=0.01, seed=3) as fake:
+        client = HttpClient(fake.base_url, cache=False, backoff=0.01, retries=10)
+        blocks = [client.get_json(f"/block-height/{h}?format=json")["blocks"][0]["hash"] for h in range(10)]
+        stats = client.stats.summary()["/block-height"]
+        client.close()
+    assert blocks == [chain.block(h)["hash"] for h in range(10)]
+    assert stats["retries"] > 0 and stats["requests"] == 10 + stats["retries"]
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=50, burst=5)
+    started = time.monotonic()
+    for _ in range(15):
+        bucket.acquire()
+    # 5 из запаса, остальные 10 - по 1/50 с
+    assert time.monotonic() - started >= 10 / 50 * 0.9
+    bucket.backoff()
+    assert bucket.rate == 25 and bucket.tokens == 0
+    bucket.reward()
+    assert bucket.rate == pytest.approx(27.5)
@@ -0,0 +1,76 @@
+import pytest
+
+from srr.fakeserver import FakeBlockchain, SyntheticChain
+from srr.follow import TipFollower
+from srr.source import BlockchainInfoSource
+
+WINDOW = 12
+
+
+@pytest.fixture
+def moving():
+    # Своя копия цепочки: тесты двигают её вершину
+    chain = SyntheticChain(seed=4, heights=40, txs_per_block=10)
+    with FakeBlockchain(source=chain) as fake:
+        with BlockchainInfoSource(fake.base_url, cache=False) as source:
+            yield chain, source
+
+
+def state(follower):
+    return (
+        follower.blocks, follower.miner_count, follower.miner_fees,
+        follower.min_item, follower.max_item, follower.top_miner,
+        {addr: follower.miner_fee_total(addr) for addr in follower.miner_count},
+    )
+
+
+def recomputed(source, follower):
+    fresh = TipFollower(source, window=WINDOW, start_height=min(follower.blocks))
+    fresh.poll()
+    return fresh
+
+
+def test_tip_hash_mismatch(moving):
+    chain, source = moving
+    follower = TipFollower(source, window=WINDOW)
+    follower.poll()
+    tip = chain.heights - 1
+    old = chain.block(tip)["hash"]
+    chain.reorg(depth=1, extra=0)  # та же высота, другой блок
+    events = follower.poll()
+    assert events == [("rollback", tip, old), ("block", tip, chain.block(tip)["hash"])]
+    assert state(follower) == state(recomputed(source, follower))
+
+
+def test_parent_mismatch_several_blocks_deep(moving):
+    chain, source = moving
+    follower = TipFollower(source, window=WINDOW)
+    follower.poll()
+    tip = chain.heights - 1
+    old = {h: chain.block(h)["hash"] for h in range(tip - 3, tip + 1)}
+    chain.reorg(depth=4, extra=2)
+    events = follower.poll()
+    # Новая вершина выше старой: расхождение видно только по prev_block
+    assert [e for e in events if e[0] == "rollback"] == [("rollback", h, old[h]) for h in range(tip, tip - 4, -1)]
+    assert [e for e in events if e[0] == "block"] == [
+        ("block", h, chain.block(h)["hash"]) for h in range(tip - 3, chain.heights)
+    ]
+    assert max(follower.blocks) == chain.heights - 1 and len(follower.blocks) == WINDOW
+    assert all(follower.blocks[h]["hash"] == chain.block(h)["hash"] for h in follower.blocks)
+    assert state(follower) == state(recomputed(source, follower))
+
+
+def test_aggregates_after_rollback(moving):
+    chain, source = moving
+    follower = TipFollower(source, window=WINDOW)
+    follower.poll()
+    for depth, extra in ((3, 1), (5, 0), (2, 4)):
+        chain.reorg(depth=depth, extra=extra)
+        follower.poll()
+        assert state(follower) == state(recomputed(source, follower))
+    # Явный откат: агрегаты - как у окна без этих блоков
+    follower.rollback(max(follower.blocks) - 4)
+    fresh = TipFollower(source, window=WINDOW, start_height=min(follower.blocks))
+    for height in sorted(follower.blocks):
+        fresh._add(height, follower.blocks[height])
+    assert state(follower) == state(fresh)
@@ -0,0 +1,53 @@
+import json
+from multiprocessing import shared_memory
+
+import pytest
+
+from srr import parallel
+from srr.parallel import analyze_blocks, analyze_bodies
+from srr.source import BlockchainInfoSource
+from srr.stats import BlockStats, day_answers
+
+
+@pytest.fixture
+def segments(monkeypatch):
+    # Имена всех созданных сегментов разделяемой памяти
+    names = []
+    to_segment = parallel._to_segment
+
+    def recording(bodies):
+        shm, spans = to_segment(bodies)
+        names.append(shm.name)
+        return shm, spans
+
+    monkeypatch.setattr(parallel, "_to_segment", recording)
+    return names
+
+
+def assert_unlinked(names):
+    assert names
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name)
+
+
+def test_matches_sequential_and_unlinks(fake, chain, segments):
+    hashes = [chain.block(h)["hash"] for h in range(chain.heights)]
+    with BlockchainInfoSource(fake.base_url, cache=False) as source:
+        stats = analyze_blocks(source, hashes, workers=2, chunk_blocks=3)
+        expected = BlockStats()
+        for block_hash in hashes:
+            expected.add_block(source.get_block_by_hash(block_hash))
+    assert stats.blocks == expected.blocks
+    assert day_answers(stats) == day_answers(expected)
+    assert stats.addresses.top(20) == expected.addresses.top(20)
+    assert len(segments) == -(-len(hashes) // 3)
+    assert_unlinked(segments)
+
+
+def test_worker_error_unlinks_segments(chain, segments):
+    good = json.dumps(chain.block(1)).encode()
+    chunks = [[good], [good, b"{not json"], [good], [good]]
+    with pytest.raises(ValueError):
+        analyze_bodies(iter(chunks), workers=1)
+    assert_unlinked(segments)
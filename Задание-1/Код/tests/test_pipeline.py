@@ -0,0 +1,29 @@
+import time
+
+from srr.fakeserver import FakeBlockchain
+from srr.pipeline import analyze_pipeline
+from srr.source import BlockchainInfoSource
+from srr.stats import BlockStats, day_answers
+
+BLOCKS = 8
+
+
+def run(source, hashes, fetch_workers):
+    started = time.perf_counter()
+    stats = analyze_pipeline(source, hashes, fetch_workers=fetch_workers)
+    return time.perf_counter() - started, stats
+
+
+def test_fetchers_overlap_body_transfers(chain):
+    hashes = [chain.block(height)["hash"] for height in range(1, BLOCKS + 1)]
+    # Медленная передача тела: задержка до заголовков её не показала бы
+    with FakeBlockchain(source=chain, latency=0.02, bandwidth=20000) as fake:
+        with BlockchainInfoSource(fake.base_url, cache=False) as source:
+            serial, one = run(source, hashes, fetch_workers=1)
+            parallel, four = run(source, hashes, fetch_workers=4)
+            expected = BlockStats()
+            for block_hash in hashes:
+                expected.add_block(source.get_block_by_hash(block_hash))
+    assert parallel < serial * 0.6
+    assert day_answers(one) == day_answers(four) == day_answers(expected)
+    assert [b["hash"] for b in four.blocks] == hashes
@@ -0,0 +1,66 @@
+import pytest
+
+from srr.dayindex import DayIndex
+from srr.fakeserver import GENESIS_TIME
+from srr.planner import QUESTIONS, DayPlan, parse_questions
+from srr.source import BlockchainInfoSource, RpcSource
+from srr.stats import BlockStats, day_answers
+
+DAY_MS = (GENESIS_TIME - GENESIS_TIME % 86400) * 1000  # сутки генезиса
+LIMIT = 10
+
+
+def counts(fake):
+    return {endpoint: row["requests"] for endpoint, row in fake.by_endpoint.items()}
+
+
+def full_answers(source, chain):
+    stats = BlockStats()
+    for height in range(LIMIT):
+        stats.add_block(source.get_block_by_hash(chain.block(height)["hash"]))
+    answers = day_answers(stats)
+    return {question: answers[key] for question, (key, _, _) in QUESTIONS.items()}
+
+
+@pytest.fixture
+def rest(served):
+    with BlockchainInfoSource(served.base_url, cache=False) as source:
+        yield source
+
+
+def plan(source, tmp_path):
+    return DayPlan(DayIndex(source, str(tmp_path / "days.sqlite3")), DAY_MS, LIMIT)
+
+
+@pytest.mark.parametrize("questions, expected", [
+    ("3-4", {"/blocks": 1}),  # хватает списка суток
+    ("5", {"/blocks": 1, "/rawblock": 1}),  # сводка только пятого блока
+    ("1-5", {"/blocks": 1, "/rawblock": LIMIT}),  # сводки - начало /rawblock до tx
+    ("1-8", {"/blocks": 1, "/rawblock": LIMIT}),  # полные блоки; сводки - из них же
+])
+def test_lazy_plan_requests(served, rest, chain, tmp_path, questions, expected):
+    wanted = parse_questions(questions)
+    answers = plan(rest, tmp_path).answers(wanted)
+    assert counts(served) == expected
+    truth = full_answers(rest, chain)
+    assert answers == {question: truth[question] for question in sorted(wanted)}
+
+
+def test_summaries_then_full(served, rest, chain, tmp_path):
+    day = plan(rest, tmp_path)
+    first = day.answers(parse_questions("1-5"))
+    assert counts(served) == {"/blocks": 1, "/rawblock": LIMIT}
+    rest_of = day.answers(parse_questions("6-8"))
+    assert counts(served) == {"/blocks": 1, "/rawblock": 2 * LIMIT}
+    assert {**first, **rest_of} == full_answers(rest, chain)
+
+
+def test_rpc_plan_matches_full_path(fake, chain, tmp_path):
+    with RpcSource(fake.base_url) as rpc:
+        summaries = plan(rpc, tmp_path).answers(parse_questions("1-5"))
+        calls = rpc.calls
+        answers = plan(rpc, tmp_path / "full").answers()
+        assert rpc.calls > calls
+    truth = full_answers(rpc, chain)
+    assert answers == truth
+    assert summaries == {question: truth[question] for question in range(1, 6)}
@@ -0,0 +1,118 @@
+import multiprocessing
+import os
+import signal
+
+import pytest
+
+from srr.scan import CoinbaseScan
+from srr.source import DataSource
+
+CHUNK = 10
+
+
+class ChainSource(DataSource):
+    # Блоки SyntheticChain без сети; heights - запрошенные высоты
+    name = "synthetic"
+
+    def __init__(self, chain):
+        self.chain = chain
+        self.heights = []
+
+    def get_block_by_height(self, height):
+        self.heights.append(height)
+        return self.chain.block(height)
+
+
+def truth(chain, start, end):
+    return sorted(
+        (h, chain.block(h)["hash"], chain.block(h)["tx"][0]["hash"])
+        for h in range(start, end + 1)
+        if any(out["spent"] for out in chain.block(h)["tx"][0]["out"])
+    )
+
+
+def killed_at(stop):
+    # Жёсткий обрыв (SIGKILL) при обработке высоты stop: finally не выполняется
+    def on_result(height, result):
+        if height == stop:
+            os.kill(os.getpid(), signal.SIGKILL)
+    return on_result
+
+
+def run_killed(scan, source, stop):
+    process = multiprocessing.get_context("fork").Process(
+        target=scan.run, args=(source,), kwargs={"on_result": killed_at(stop)}
+    )
+    process.start()
+    process.join(10)
+    assert process.exitcode == -signal.SIGKILL
+
+
+def test_interrupt_resumes_from_cursor(chain, tmp_path):
+    last = chain.heights - 1
+    scan = CoinbaseScan(0, last, "synthetic", str(tmp_path), chunk_size=CHUNK)
+
+    def interrupt(height, result):
+        if height == 13:
+            raise KeyboardInterrupt
+
+    source = ChainSource(chain)
+    with pytest.raises(KeyboardInterrupt):
+        scan.run(source, on_result=interrupt)
+    assert source.heights == list(range(14))
+    assert scan.load((10, 19))["cursor"] == 14
+    assert not os.path.exists(scan._path((10, 19), "lock"))
+
+    source = ChainSource(chain)
+    scan.run(source)
+    assert source.heights == list(range(14, chain.heights))
+    assert scan.results() == (truth(chain, 0, last), {}, [])
+
+
+def test_kill_resumes_from_checkpoint_and_takes_stale_lock(chain, tmp_path):
+    last = chain.heights - 1
+    scan = CoinbaseScan(0, last, "synthetic", str(tmp_path), chunk_size=CHUNK)
+    run_killed(scan, ChainSource(chain), stop=17)
+    # Кусок 10-19 остался захваченным мёртвым процессом; курсор - с последней контрольной точки
+    lock = scan._path((10, 19), "lock")
+    with open(lock) as f:
+        owner = int(f.read())
+    assert owner != os.getpid()
+    assert scan.load((0, 9))["cursor"] == 10
+    assert scan.load((10, 19))["cursor"] == 10  # CHECKPOINT_EVERY > размера куска
+
+    source = ChainSource(chain)
+    scan.run(source)
+    assert source.heights == list(range(10, chain.heights))
+    assert not os.path.exists(lock)
+    assert scan.results() == (truth(chain, 0, last), {}, [])
+
+
+def test_live_lock_is_skipped(chain, tmp_path):
+    scan = CoinbaseScan(0, 19, "synthetic", str(tmp_path), chunk_size=CHUNK)
+    with open(scan._path((0, 9), "lock"), "w") as f:
+        f.write(str(os.getppid()))  # живой процесс
+    source = ChainSource(chain)
+    scan.run(source)
+    assert source.heights == list(range(10, 20))
+    assert scan.results()[2] == [(0, 9)]
+
+
+def test_finished_chunks_expire(chain, tmp_path):
+    last = chain.heights - 1
+    scan = CoinbaseScan(0, last, "synthetic", str(tmp_path), chunk_size=CHUNK)
+    scan.run(ChainSource(chain))
+    expected = truth(chain, 0, last)
+    assert scan.results() == (expected, {}, [])
+
+    source = ChainSource(chain)
+    scan.run(source)
+    assert source.heights == []  # свежее состояние
+
+    # Устаревшее состояние: перепроверяются только высоты без потраченной coinbase
+    stale = CoinbaseScan(0, last, "synthetic", str(tmp_path), max_age=-1)
+    source = ChainSource(chain)
+    stale.run(source, is_spent=lambda tx: True)
+    spent = {row[0] for row in expected}
+    assert sorted(source.heights) == [h for h in range(chain.heights) if h not in spent]
+    assert [row[0] for row in stale.results()[0]] == list(range(chain.heights))
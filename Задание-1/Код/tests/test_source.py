@@ -0,0 +1,111 @@
+import pytest
+
+from srr.fakeserver import GENESIS_TIME
+from srr.fees import calculate_fee
+from srr.source import BlockchainInfoSource, RpcError, RpcSource, open_source
+from srr.stats import BlockStats, day_answers
+
+DAY_MS = (GENESIS_TIME - GENESIS_TIME % 86400) * 1000  # сутки генезиса
+
+
+@pytest.fixture
+def rest(fake):
+    with BlockchainInfoSource(fake.base_url, cache=False) as source:
+        yield source
+
+
+@pytest.fixture
+def rpc(fake):
+    with RpcSource(fake.base_url, batch_size=8) as source:
+        yield source
+
+
+def block_view(block):
+    return (
+        block["hash"], block["prev_block"], block["time"], block["height"], block["n_tx"], block["fee"],
+        [(tx["hash"], calculate_fee(tx), [(o["value"], o.get("addr")) for o in tx["out"]]) for tx in block["tx"]],
+    )
+
+
+def coinbase_view(results):
+    return [
+        (height, [(block_hash, txid, [o["spent"] for o in tx["out"]]) for block_hash, txid, tx in found])
+        for height, found in results
+    ]
+
+
+def test_blocks_match_rest(rest, rpc, chain):
+    heights = [0, 1, chain.heights // 2, chain.heights - 1]
+    expected = [block_view(rest.get_block_by_height(h)) for h in heights]
+    assert [block_view(b) for b in rpc.get_blocks_by_heights(heights)] == expected
+    assert block_view(rpc.get_block_by_hash(expected[2][0])) == expected[2]
+    assert rpc.get_block_by_height(chain.heights) is None
+    assert rpc.get_block_by_hash("00" * 32) is None
+
+
+def test_transaction_matches_rest(rest, rpc, chain):
+    txid = chain.block(5)["tx"][-1]["hash"]
+    a, b = rest.get_transaction(txid), rpc.get_transaction(txid)
+    assert (b["hash"], calculate_fee(b)) == (a["hash"], calculate_fee(a))
+    assert [inp["txid"] for inp in b["inputs"]]
+    assert rpc.get_transaction("ff" * 32) is None
+
+
+def test_day_summaries_and_tip(rest, rpc):
+    day = rest.get_blocks_by_time(DAY_MS)
+    assert day
+    assert [b["hash"] for b in rpc.get_blocks_by_time(DAY_MS)] == [b["hash"] for b in day]
+    hashes = [b["hash"] for b in day[:5]]
+    keys = ("hash", "height", "time", "size", "n_tx", "fee")
+    assert [{k: s[k] for k in keys} for s in rpc.get_block_summaries(hashes)] == [
+        {k: s[k] for k in keys} for s in rest.get_block_summaries(hashes)
+    ]
+    tip = rest.get_latest_block()
+    assert rpc.get_latest_block() == {"hash": tip["hash"], "height": tip["height"]}
+
+
+def test_coinbases_match_rest(rest, rpc, chain):
+    heights = list(range(chain.heights))
+    expected = coinbase_view(rest.fetch_coinbases(heights))
+    assert coinbase_view(rpc.fetch_coinbases(heights)) == expected
+    # Высоты за вершиной - пустой результат, а не ошибка
+    assert list(rpc.fetch_coinbases([chain.heights, chain.heights + 1])) == [
+        (chain.heights, []), (chain.heights + 1, [])
+    ]
+
+
+def test_stats_match_rest(rest, rpc):
+    hashes = [b["hash"] for b in rest.get_blocks_by_time(DAY_MS)][:4]
+    streamed, built = BlockStats(), BlockStats()
+    for block_hash in hashes:
+        stream = rest.open_block_stream(block_hash)
+        try:
+            streamed.add_stream(stream)
+        finally:
+            stream.close()
+        built.add_block(rpc.get_block_by_hash(block_hash))
+    assert day_answers(built) == day_answers(streamed)
+
+
+def test_calls_are_batched(served, rpc):
+    rpc.get_blocks_by_heights(range(20))
+    # getblockhash и getblock - по три пачки из 8, 8 и 4 вызовов
+    assert (rpc.calls, rpc.posts) == (40, 6)
+    assert served.requests == 6
+
+
+def test_errors(rpc):
+    with pytest.raises(RpcError) as error:
+        rpc.call("nosuchmethod")
+    assert error.value.code == -32601
+    results = rpc.batch([("getblockcount", ()), ("getblockhash", (10**6,))], errors=True)
+    assert isinstance(results[0], int) and isinstance(results[1], RpcError)
+
+
+def test_open_source(fake):
+    with open_source(fake.rpc_url) as source:
+        assert isinstance(source, RpcSource)
+        assert source.name == "rpc+" + fake.base_url + "/"
+    with open_source(fake.base_url, cache=False) as source:
+        assert isinstance(source, BlockchainInfoSource)
+        assert source.name == fake.base_url
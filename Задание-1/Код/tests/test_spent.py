@@ -0,0 +1,115 @@
+import os
+
+import pytest
+
+from srr.blkfile import _spending_view
+from srr.client import HttpClient
+from srr.spent import HashTable, SpentIndex, build
+from srr.wire import parse_block
+
+
+def spending_blocks(raw_blocks):
+    for height, raw in enumerate(raw_blocks):
+        block = parse_block(raw)
+        yield height, {"hash": block.hash.hex(), "tx": [_spending_view(tx) for tx in block.txs]}
+
+
+def snapshot(index, chain):
+    # Кто потратил каждый выход цепочки фейкового сервера
+    result = {}
+    for height in range(chain.heights):
+        for tx in chain.block(height)["tx"]:
+            for n in range(len(tx["out"])):
+                result[tx["hash"], n] = index.spender(tx["hash"], n)
+    return result
+
+
+def test_hash_table_grows_and_reopens(tmp_path):
+    path = str(tmp_path / "table")
+    table = HashTable(path, capacity=16)
+    for key in range(1, 201):
+        table.put(key, key * 7)
+    assert table.capacity >= 512 and len(table) == 200
+    table.flush()
+    # От прошлых поколений файлов не остаётся
+    assert sorted(os.listdir(tmp_path)) == sorted(
+        [os.path.basename(name) for name in table._files(table.generation)] + ["table.json"]
+    )
+    table.put(201, 1)  # после flush: count в json устарел
+
+    reopened = HashTable(path)
+    assert reopened.capacity == table.capacity
+    assert len(reopened) == 201
+    assert all(reopened.get(key) == key * 7 for key in range(1, 201))
+    assert reopened.get(999) is None
+
+
+def test_hash_table_rejects_truncated_files(tmp_path):
+    path = str(tmp_path / "table")
+    table = HashTable(path, capacity=16)
+    table.put(1, 1)
+    table.flush()
+    with open(table._files(table.generation)[0], "r+b") as f:
+        f.truncate(64)
+    with pytest.raises(ValueError):
+        HashTable(path)
+
+
+def test_resume_after_unflushed_blocks(chain, tmp_path):
+    full = SpentIndex(str(tmp_path / "full"))
+    for height in range(chain.heights):
+        full.ingest_block(chain.block(height))
+
+    index = SpentIndex(str(tmp_path / "partial"))
+    for height in range(15):
+        index.ingest_block(chain.block(height))
+    index.flush()
+    for height in range(15, 20):  # сбой до flush: эти высоты не подтверждены
+        index.ingest_block(chain.block(height))
+
+    index = SpentIndex(str(tmp_path / "partial"))
+    assert index.last_height == 14
+    assert not index.ingest_block(chain.block(3))
+    with pytest.raises(ValueError):
+        index.ingest_block(chain.block(17))
+    for height in range(15, chain.heights):
+        index.ingest_block(chain.block(height))
+    assert snapshot(index, chain) == snapshot(full, chain)
+
+
+def test_spent_coinbases_resume(blk_chain, tmp_path):
+    raw_blocks, _, truth = blk_chain
+    blocks = list(spending_blocks(raw_blocks))
+    half = len(blocks) // 2
+
+    index = SpentIndex(str(tmp_path / "spent"))
+    for height, block in blocks[:half]:
+        index.ingest_block(block, height)
+    index.flush()
+
+    index = SpentIndex(str(tmp_path / "spent"))
+    for height, block in blocks[half:]:
+        index.ingest_block(block, height)
+    index.flush()
+    spent, missing = index.spent_coinbases(0, len(blocks) - 1)
+    assert missing == []
+    assert [height for height, _, _ in spent] == sorted(truth["spent"])
+    assert all(block_hash == blocks[height][1]["hash"] for height, block_hash, _ in spent)
+
+
+def test_build_continues_from_last_height(served, chain, tmp_path):
+    index = SpentIndex(str(tmp_path / "spent"))
+    client = HttpClient(served.base_url, cache=False)
+    try:
+        build(index, 9, client)
+        assert served.requests == 10
+        index = SpentIndex(str(tmp_path / "spent"))
+        build(index, chain.heights - 1, client)
+        assert served.requests == chain.heights
+    finally:
+        client.close()
+    assert index.last_height == chain.heights - 1
+    # Синтетическая цепочка не тратит coinbase; ответ - только по индексу
+    served.reset_stats()
+    assert index.spent_coinbases(0, chain.heights - 1) == ([], [])
+    assert served.requests == 0
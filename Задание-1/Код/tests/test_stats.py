@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from srr.stats import BlockStats, day_answers
+
+
+def state(stats):
+    index = stats.addresses
+    return {
+        "blocks": stats.blocks,
+        "totals": (stats.total_transactions, stats.total_size, stats.interval_sum, stats.smallest_hash),
+        "miners": (stats.miner_count, stats.miner_fees, list(stats.miner_order), stats.top_miner),
+        "addresses": (
+            index.names, [list(p) for p in index.postings], list(index.tx_counts), list(index.receiving),
+            list(index.tx_addr_ids), list(index.tx_offsets), index.txids,
+        ),
+        "answers": day_answers(stats),
+    }
+
+
+def part(blocks):
+    stats = BlockStats()
+    for block in blocks:
+        stats.add_block(block)
+    return stats
+
+
+def splits(blocks, rng):
+    cuts = sorted(rng.sample(range(1, len(blocks)), rng.randint(1, 6)))
+    return [blocks[a:b] for a, b in zip([0] + cuts, cuts + [len(blocks)])]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_merge_equals_one_pass(chain, seed):
+    rng = random.Random(seed)
+    blocks = [chain.block(h) for h in rng.sample(range(chain.heights), 20)]  # время идёт не по порядку
+    expected = state(part(blocks))
+
+    parts = [part(chunk) for chunk in splits(blocks, rng)]
+    merged = BlockStats()
+    for stats in parts:
+        merged.merge(stats)
+    assert state(merged) == expected
+
+    # Слияние деревом: соседние части попарно, порядок блоков тот же
+    parts = [part(chunk) for chunk in splits(blocks, rng)]
+    while len(parts) > 1:
+        parts = [parts[i].merge(parts[i + 1]) if i + 1 < len(parts) else parts[i] for i in range(0, len(parts), 2)]
+    assert state(parts[0]) == expected
+
+
+def test_merge_is_order_preserving(chain):
+    blocks = [chain.block(h) for h in range(12)]
+    first, second = part(blocks[:6]), part(blocks[6:])
+    swapped = part(blocks[6:]).merge(part(blocks[:6]))
+    assert [b["hash"] for b in first.merge(second).blocks] == [b["hash"] for b in blocks]
+    assert [b["hash"] for b in swapped.blocks] == [b["hash"] for b in blocks[6:] + blocks[:6]]
+    assert state(swapped) == state(part(blocks[6:] + blocks[:6]))
+
+
+def test_merge_with_empty(chain):
+    blocks = [chain.block(h) for h in range(5)]
+    expected = state(part(blocks))
+    assert state(BlockStats().merge(part(blocks))) == expected
+    assert state(part(blocks).merge(BlockStats())) == expected
@@ -0,0 +1,110 @@
+import pytest
+
+from srr import store as store_module
+from srr.fakeserver import GENESIS_TIME, FakeBlockchain, SyntheticChain
+from srr.source import BlockchainInfoSource
+from srr.store import BlockStore
+
+DAY_MS = (GENESIS_TIME - GENESIS_TIME % 86400) * 1000  # сутки генезиса
+
+
+@pytest.fixture
+def moving():
+    # Своя цепочка: тесты двигают её вершину
+    chain = SyntheticChain(seed=3, heights=30, txs_per_block=10)
+    with FakeBlockchain(source=chain) as fake:
+        with BlockchainInfoSource(fake.base_url, cache=False) as source:
+            yield chain, fake, source
+
+
+def open_store(tmp_path, source):
+    return BlockStore(str(tmp_path / "blocks.sqlite3"), source.name)
+
+
+def coinbase_truth(chain, start, end):
+    return [
+        (h, chain.block(h)["hash"], chain.block(h)["tx"][0]["hash"])
+        for h in range(start, end + 1)
+        if any(out["spent"] for out in chain.block(h)["tx"][0]["out"])
+    ]
+
+
+def test_rows_are_per_source(moving, tmp_path):
+    chain, fake, source = moving
+    store = open_store(tmp_path, source)
+    store.ingest_heights(range(5), source)
+    assert store.missing_heights(list(range(5))) == []
+    other = BlockStore(str(tmp_path / "blocks.sqlite3"), "rpc+http://elsewhere/")
+    assert other.missing_heights(list(range(5))) == list(range(5))
+    assert other.spent_coinbases(0, 4) == []
+    assert other.day_hashes(DAY_MS) is None
+    assert store.spent_coinbases(0, 4) == coinbase_truth(chain, 0, 4)
+
+
+def test_reorg_moves_main_chain(moving, tmp_path, monkeypatch):
+    chain, fake, source = moving
+    store = open_store(tmp_path, source)
+    store.ingest_heights(range(chain.heights), source)
+    old_tip = chain.block(chain.heights - 1)["hash"]
+    chain.reorg(depth=3, extra=1)
+
+    # Старые блоки окончательны: без истёкшего TTL не перезапрашиваются
+    fake.reset_stats()
+    store.ingest_heights(range(chain.heights - 1), source)
+    assert fake.requests == 0
+
+    # Блоки у вершины: reorg замечается, прежние блоки выпадают из запросов
+    monkeypatch.setattr(store_module, "RECENT_BLOCK_AGE", float("inf"))
+    monkeypatch.setattr(store_module, "RECENT_BLOCK_TTL", -1)
+    store.ingest_heights(range(chain.heights), source)
+    assert store._query("SELECT main_chain FROM blocks WHERE hash = ?", (old_tip,)) == [(0,)]
+    assert store.spent_coinbases(0, chain.heights - 1) == coinbase_truth(chain, 0, chain.heights - 1)
+    height = chain.heights - 2
+    low, high = store.fee_ratio_extremes(height)
+    txids = {tx["hash"] for tx in chain.block(height)["tx"]}
+    assert low[1] in txids and high[1] in txids
+
+
+def test_unspent_coinbase_flags_refresh(moving, tmp_path, monkeypatch):
+    chain, fake, source = moving
+    store = open_store(tmp_path, source)
+    last = chain.heights - 1
+    store.ingest_heights(range(chain.heights), source)
+    expected = coinbase_truth(chain, 0, last)
+    # Флаги на момент загрузки: выходы ещё не были потрачены
+    with store.db:
+        store.db.execute("UPDATE outputs SET spent = 0 WHERE position = 0")
+    assert store.spent_coinbases(0, last) == []
+
+    fake.reset_stats()
+    store.refresh_coinbases(0, last, source)
+    assert fake.requests == 0  # проверены только что, при загрузке
+
+    monkeypatch.setattr(store_module, "UNSPENT_TX_TTL", -1)
+    store.refresh_coinbases(0, last, source)
+    assert fake.requests > 0
+    assert store.spent_coinbases(0, last) == expected
+
+
+def test_non_final_day_refetched(moving, tmp_path, monkeypatch):
+    chain, fake, source = moving
+    store = open_store(tmp_path, source)
+    first = store.ingest_day(DAY_MS, source, limit=3)
+    assert first == [b["hash"] for b in chain.day(DAY_MS)]
+    fake.reset_stats()
+    assert store.ingest_day(DAY_MS, source, limit=3) == first
+    assert fake.requests == 0  # прошедшие сутки окончательны
+
+    # Сутки ещё не закончились: список блоков дополняется и меняется при reorg
+    monkeypatch.setattr(store_module, "DAY", 10**12)
+    store = BlockStore(str(tmp_path / "fresh.sqlite3"), source.name)
+    store.ingest_day(DAY_MS, source, limit=3)
+    chain.reorg(depth=2, extra=2)
+    fake.reset_stats()
+    assert store.ingest_day(DAY_MS, source, limit=3) == first
+    assert fake.requests == 0  # в пределах RECENT_DAY_TTL
+    monkeypatch.setattr(store_module, "RECENT_DAY_TTL", -1)
+    refreshed = store.ingest_day(DAY_MS, source, limit=3)
+    assert refreshed == [b["hash"] for b in chain.day(DAY_MS)] != first
+    assert store.day_hashes(DAY_MS) == refreshed
+    assert store.day_answers(DAY_MS, limit=3)["smallest_hash"] == min(refreshed[:3])
@@ -0,0 +1,38 @@
+import io
+import json
+
+import pytest
+
+from srr.stream import _iter_json, iter_block
+
+
+def split(events):
+    headers = {event[1]: event[2] for event in events if event[0] == "header"}
+    return headers, [event[1] for event in events if event[0] == "tx"]
+
+
+@pytest.mark.parametrize("buf_size", [7, 1024, 64 * 1024])
+def test_matches_json_load(chain, buf_size):
+    for height in (0, 1, 17):
+        body = json.dumps(chain.block(height)).encode()
+        events = list(iter_block(io.BytesIO(body), buf_size))
+        assert split(events) == split(list(_iter_json(io.BytesIO(body))))
+        # Поля блока - до первой транзакции
+        assert events[0][0] == "header" and events[-1][0] == "tx"
+
+
+def test_header_only_read(chain):
+    body = json.dumps(chain.block(17)).encode()
+    stream = io.BytesIO(body)
+    header = {}
+    for event in iter_block(stream, 256):
+        if event[0] != "header":
+            break
+        header[event[1]] = event[2]
+    assert header["n_tx"] == len(chain.block(17)["tx"])
+    assert stream.tell() < len(body) // 4
+
+
+def test_block_without_transactions():
+    body = b'{"hash": "ab", "n_tx": 0, "tx": []}'
+    assert list(iter_block(io.BytesIO(body))) == [("header", "hash", "ab"), ("header", "n_tx", 0)]
@@ -0,0 +1,69 @@
+import random
+
+import pytest
+
+from bench.bench_blkfile import p2pkh, serialize_tx, varint
+from srr.blkfile import BlkSource
+from srr.wire import bip34_height, dsha256, parse_block
+
+
+def txid(serialized):
+    return dsha256(serialized)[::-1].hex()
+
+
+def test_txids_and_header(blk_chain):
+    raw_blocks, _, truth = blk_chain
+    spends = set()
+    for height, raw in enumerate(raw_blocks):
+        block = parse_block(raw)
+        assert block.hash == dsha256(raw[:80])[::-1]
+        assert block.height == height  # BIP34 из coinbase
+        assert block.size == len(raw)
+        assert block.txs[0].coinbase and block.txs[0].prevouts is None
+        spends.update(tx.hash for tx in block.txs[1:])
+    # Эталонные txid - хэши сериализаций, из которых собраны блоки
+    assert spends == set(truth["fees"])
+
+
+def test_hex_input(blk_chain):
+    raw = blk_chain[0][5]
+    from_hex = parse_block(raw.hex())
+    assert [tx.hash for tx in from_hex.txs] == [tx.hash for tx in parse_block(raw).txs]
+
+
+def test_txids_match_block_json(blk_chain, blocks_dir, tmp_path):
+    raw_blocks = blk_chain[0]
+    source = BlkSource(str(blocks_dir), str(tmp_path / "index"))
+    try:
+        for height in (0, 1, len(raw_blocks) // 2, len(raw_blocks) - 1):
+            block = source.get_block_by_height(height)
+            assert [tx["hash"] for tx in block["tx"]] == [tx.hash for tx in parse_block(raw_blocks[height]).txs]
+    finally:
+        source.close()
+
+
+def test_segwit_txid_excludes_witness():
+    rng = random.Random(3)
+    coinbase = serialize_tx(
+        [(bytes(32), 0xFFFFFFFF, b"\x03" + (7).to_bytes(3, "little"))], [(5000000000, p2pkh(rng))]
+    )
+    legacy = serialize_tx([(rng.randbytes(32), 1, b"")], [(1000, p2pkh(rng))])
+    witness = b"\x02" + b"\x47" + rng.randbytes(71) + b"\x21" + rng.randbytes(33)
+    segwit = legacy[:4] + b"\x00\x01" + legacy[4:-4] + witness + legacy[-4:]
+    header = (0x20000000).to_bytes(4, "little") + bytes(76)
+    block = parse_block(header + varint(2) + coinbase + segwit)
+
+    tx = block.txs[1]
+    assert tx.hash == txid(legacy)
+    assert tx.size == len(segwit)
+    assert tx.weight == len(legacy) * 3 + len(segwit)
+    assert tx.prevouts[0][1] == 1
+    assert bip34_height(memoryview(coinbase), 0) == 7
+
+
+def test_truncated_block(blk_chain):
+    raw = blk_chain[0][3]
+    with pytest.raises(ValueError):
+        parse_block(raw[:-10])
+    with pytest.raises(ValueError):
+        parse_block(raw[:50])
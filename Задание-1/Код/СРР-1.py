@@ -1,29 +1,15 @@
-import requests
-import time
+from srr.metrics import METRICS
+from srr.scan import CoinbaseScan
+from srr.source import open_source
 
-BASE_URL = "https://blockchain.info"
 START_BLOCK = 0
 END_BLOCK = 99
+WORKERS = 8  # сколько высот обрабатывается одновременно (blockchain.info)
+RATE = 5.0  # запросов в секунду (при 429/5xx снижается автоматически)
+CHUNK_SIZE = 1000  # высот в куске; прогресс кусков хранится в ~/.cache/srr/scans/
 
 
 # ----------------------------- ✦ HELPERS ✦ -----------------------------
-def get_json(url):
-    response = requests.get(url, timeout=15)
-    response.raise_for_status()
-    return response.json()
-
-
-def get_blocks_by_height(height):
-    url = f"{BASE_URL}/block-height/{height}?format=json"
-    data = get_json(url)
-    return data.get("blocks", [])
-
-
-def get_transaction(tx_hash):
-    url = f"{BASE_URL}/rawtx/{tx_hash}"
-    return get_json(url)
-
-
 def is_transaction_spent(tx):
     for output in tx["out"]:
         if output.get("spent") is True:
@@ -34,39 +20,38 @@ def is_transaction_spent(tx):
 # ----------------------------- ✦ MASTER FN ✦ -----------------------------
 def main():
 
-    spent_blocks = []
-
-    for height in range(START_BLOCK, END_BLOCK + 1):
+    def report(height, result):
 
         print(f"Проверка блока {height}...")
 
-        try:
-            blocks = get_blocks_by_height(height)
-
-            for block in blocks:
-
-                block_hash = block["hash"]
-
-                coinbase_txid = block["tx"][0]["hash"]
-
-                transaction = get_transaction(coinbase_txid)
-
-                if is_transaction_spent(transaction):
-                    spent_blocks.append((height, block_hash, coinbase_txid))
-
-                    print(
-                        f"ПОТРАЧЕНО\n"
-                        f"Блок: {height}\n"
-                        f"Хэш: {block_hash}\n"
-                        f"ID транзакции:   {coinbase_txid}\n"
-                    )
-                else:
-                    print("НЕ ПОТРАЧЕНО")
-
-            time.sleep(1)
-
-        except Exception as e:
-            print(f"ОШИБКА {height}: {e}\n")
+        if isinstance(result, Exception):
+            print(f"ОШИБКА {height}: {result}\n")
+            return
+
+        for block_hash, coinbase_txid, transaction in result:
+
+            if is_transaction_spent(transaction):
+                print(
+                    f"ПОТРАЧЕНО\n"
+                    f"Блок: {height}\n"
+                    f"Хэш: {block_hash}\n"
+                    f"ID транзакции:   {coinbase_txid}\n"
+                )
+            else:
+                print("НЕ ПОТРАЧЕНО")
+
+    # Прогресс сохраняется по кускам: повторный запуск продолжит с места
+    # остановки и повторит высоты, завершившиеся ошибкой
+    # Источник - SRR_SOURCE: blockchain.info по умолчанию, rpc+http://... для своего узла;
+    # у каждого источника свой прогресс
+    source = open_source(workers=WORKERS, rate=RATE)
+    scan = CoinbaseScan(START_BLOCK, END_BLOCK, source.name, chunk_size=CHUNK_SIZE)
+    try:
+        scan.run(source, is_spent=is_transaction_spent, on_result=report)
+    except KeyboardInterrupt:
+        print("\nПрервано, прогресс сохранён - запустите скрипт ещё раз, чтобы продолжить")
+
+    spent_blocks, failed, pending = scan.results()
 
     # ----------------------------- ✦ RESULTS ✦ -----------------------------
     print("----------------------------- ✦ РЕЗУЛЬТАТ ✦ -----------------------------")
@@ -78,7 +63,13 @@ def main():
 
     print(f"\nОбщее кол-во потраченных коинбэйс-транзакций: {len(spent_blocks)}")
 
+    if failed:
+        print(f"Не удалось обработать высоты ({len(failed)}): {', '.join(map(str, failed))}")
+    if pending:
+        print(f"Диапазон пройден не полностью: {', '.join(f'{lo}-{hi}' for lo, hi in pending)}")
+
 
 if __name__ == "__main__":
     # ----------------------------- ✦ INIT ✦ -----------------------------
     main()
+    METRICS.finish()